@@ -10,26 +10,57 @@ Description:
 Aliases used:
 > WOI = Wallet of Interest
 """
+from python_scripts.DigiFax_Timing import mark, print_report   # Startup timing, imported first
+from python_scripts.DigiFax_Timing import traced, begin, end, is_tracing, set_tracing, reset, aggregates_report, \
+    export_chrome_trace
+
 from PyQt5.QtWidgets import *                           # UI Elements library
 from PyQt5.QtGui import QFont
-from PyQt5.QtCore import Qt, QDateTime
-from PyQt5.QtWebEngineWidgets import QWebEngineView     # Widget to display Pyvis HTML files
+from PyQt5.QtCore import Qt, QCoreApplication, QDateTime, QTimer, QEvent, pyqtSignal
 from PyQt5 import uic                                   # Library to load
-from pyvis.network import Network                       # Core library for producing the transaction network graphs
+mark("PyQt5 imported")
 
 from constants import *                                 # All constants used in the project
 from transactionWindow import TransactionWindow
 from nodeProfileWindow import NodeProfileWindow
-# from python_scripts.DigiFax_EthScan_multiproc import DigiFax_EthScan
-from python_scripts.DigiFax_EthScan_multithread import DigiFax_EthScan
+from python_scripts.DigiFax_CaseFile import load_case, save_case, mark_dirty
+from python_scripts.DigiFax_CaseJournal import CaseJournal
+from transactionListModel import TransactionListModel, ADDRESS_ROLE
+# from python_scripts.DigiFax_EthScan_multithread import DigiFax_EthScan
 
-import multiprocessing
 import threading
 
+import os
 import random                                           # To randomly choose a node color
-from pyperclip import copy                              # For putting text into user's clipboard
 import re                                               # For Text Search filtering
-import json                                             # For opening / writing case files in .json format
+import json                                             # For building the graph scripts run on the vis.js page
+mark("Project modules imported")
+
+
+def loadDashboardModules():
+    """
+    Function to import the modules only the Dashboard uses (web engine, PyVis, clipboard and the Etherscan backend),
+    so that they are not loaded before the Home window appears but once the first Dashboard opens
+    :return: None
+    """
+    global QWebEngineView, Network, Node, Edge, copy, DigiFax_EthScan, LabelStore, ProgressChannel, TxnTable, \
+        DigiFax_Crawler, relationship_weight, DEFAULT_HOPS, WALLETS, RELATIONSHIPS, DigiFax_PathFinder
+    if "QWebEngineView" in globals():
+        return
+
+    from PyQt5.QtWebEngineWidgets import QWebEngineView     # Widget to display Pyvis HTML files
+    from pyvis.network import Network                       # Core library for producing the transaction network graphs
+    from pyvis.node import Node
+    from pyvis.edge import Edge
+    from pyperclip import copy                              # For putting text into user's clipboard
+    from python_scripts.DigiFax_EthScan_multiproc import DigiFax_EthScan
+    from python_scripts.DigiFax_LabelStore import LabelStore
+    from python_scripts.DigiFax_FetchEngine import ProgressChannel
+    from python_scripts.DigiFax_TxnTable import TxnTable
+    from python_scripts.DigiFax_Crawler import DigiFax_Crawler, relationship_weight, DEFAULT_HOPS, WALLETS, \
+        RELATIONSHIPS
+    from python_scripts.DigiFax_PathFinder import DigiFax_PathFinder
+    mark("Dashboard modules imported")
 
 
 class NewCaseWindow(QMainWindow):
@@ -99,6 +130,11 @@ class HomeWindow(QMainWindow):
         self.caseinfo = dict()
         # Decalre filename where any active case will be saved into
         self.casefile = str()
+        # Journal of the edits made to the active case since its file was last written (None until it is written)
+        self.journal = None
+        # Held while the per-address data of the case is changed in place or written to file (e.g. by a background
+        # compaction), so that entries never change while they are serialised
+        self.dataLock = threading.RLock()
 
         # Connect buttons to on-click events
         self.newcasebtn.clicked.connect(self.openNewCaseWindow)
@@ -117,6 +153,7 @@ class HomeWindow(QMainWindow):
         self.caseinfo["walletaddresses"] = info["walletaddresses"]
         self.caseinfo["filename"] = info["casename"] + CASE_FILE_EXT
         self.casefile = self.caseinfo["filename"]
+        self.journal = None
 
         # Open the dashboard
         self.openDashboard()
@@ -137,25 +174,35 @@ class HomeWindow(QMainWindow):
         """
         options = QFileDialog.Options()
         options |= QFileDialog.DontUseNativeDialog
-        fileName, _ = QFileDialog.getOpenFileName(self, "Open a Existing Case File (.json)", "",
-                                                      "JSON Files (*.json);;All Files (*)", options=options)
+        fileName, _ = QFileDialog.getOpenFileName(self, "Open a Existing Case File (.json / .dgfx)", "",
+                                                      f"Case Files (*{CASE_FILE_EXT} *{CASE_BINARY_EXT});;"
+                                                      f"All Files (*)", options=options)
         if fileName:
-            # Try to load the file contents into 'self.caseinfo'
+            # Try to load the file contents into 'self.caseinfo', the transactions of each address are only read
+            # from the file once they are needed
             print(f"[*] Opening file: {fileName}")
-            with open(fileName, 'r') as f:
-                data = json.load(f)
-                # If keys do not match, reject the opening of the given file
-                if data.keys() != TEMPLATE.keys():
-                    self.displayMessage("[-] Unrecognized case file: Inconsistent data keys")
-                    return
-                elif len(data["casename"]) <= 0:
-                    self.displayMessage("[-] Unrecognized case file: No case name in given file")
-                    return
+            try:
+                data = load_case(fileName)
+            except ValueError as err:
+                self.displayMessage(f"[-] Unrecognized case file: {err}")
+                return
+            # If keys do not match, reject the opening of the given file
+            if data.keys() != TEMPLATE.keys():
+                self.displayMessage("[-] Unrecognized case file: Inconsistent data keys")
+                return
+            elif len(data["casename"]) <= 0:
+                self.displayMessage("[-] Unrecognized case file: No case name in given file")
+                return
 
-                # If all goes well, use the read data as the case data in 'self.caseinfo' and open the dashboard
-                self.caseinfo = data
-                self.casefile = data["filename"]
-                self.openDashboard()
+            # If all goes well, use the read data as the case data in 'self.caseinfo' and open the dashboard,
+            # replaying the edits journaled since the case file was last written
+            self.caseinfo = data
+            self.casefile = data["filename"]
+            self.journal = CaseJournal(os.path.splitext(self.casefile)[0] + JOURNAL_EXT)
+            replayed = self.journal.replay(self.caseinfo)
+            if replayed:
+                print(f"[*] Replayed {replayed} journaled edits")
+            self.openDashboard()
 
     def openDashboard(self):
         """
@@ -165,6 +212,8 @@ class HomeWindow(QMainWindow):
         # Display the dashboard and hide current window (Home window)
         self.db = Dashboard(self)
         self.db.show()
+        mark("Dashboard shown")
+        print_report("Dashboard timing")
 
     def openNodeProfileWindow(self, focusnode):
         """
@@ -175,13 +224,14 @@ class HomeWindow(QMainWindow):
         self.nodeprofilewindow = NodeProfileWindow(focusnode, self)
         self.nodeprofilewindow.show()
 
-    def signalProfileUpdated(self):
+    def signalProfileUpdated(self, focusnode):
         """
         Function to bind a specified alias to a node (WOI) address in the caseinfo["aliases"] dictionary
+        :param focusnode: WOI address whose profile was updated
         :return: None
         """
         self.db.populateWoiList()
-        self.db.populateGraph()
+        self.db.graphUpdateNode(focusnode)
 
     def openTransactionWindow(self, data):
         """
@@ -203,21 +253,41 @@ class HomeWindow(QMainWindow):
                 return True
         return False
 
-    def saveFile(self, wois, wrs):
+    def saveFile(self, wois, wrs, autosave=False):
         """
-        Function to save current work progress into file path specified at 'self.casefile'
+        Function to save current work progress into file path specified at 'self.casefile'.
+        Once the case file exists, only the edits since the last save are appended to its journal, the case file is
+        rewritten (compacted) in the background when transactions were retrieved or the journal grew too long
         :param wois: latest List of wallets of interests
         :param wrs: latest Dictionary of all relationships
+        :param autosave: Only journal the edits, never writing the whole case file
         :return: None
         """
         # Update wallet addresses, relationships inside 'self.caseinfo'
         self.caseinfo["walletaddresses"] = wois
         self.caseinfo["walletrelationships"] = wrs
 
-        print(f"[*] Saving to {self.casefile}")
-        # Directly save into 'self.casefile'
-        with open(self.casefile, 'w') as f:
-            json.dump(self.caseinfo, f)
+        if self.journal is None or not os.path.exists(self.casefile):
+            if autosave:
+                return
+            print(f"[*] Saving to {self.casefile}")
+            # Directly save into 'self.casefile', streaming the transactions of each address
+            with self.dataLock:
+                save_case(self.casefile, self.caseinfo)
+            self.journal = CaseJournal(os.path.splitext(self.casefile)[0] + JOURNAL_EXT)
+            self.journal.reset(self.caseinfo)
+            return
+
+        edits = self.journal.record(self.caseinfo)
+        if not autosave:
+            print(f"[*] Saved {edits} edits to {self.journal.path}")
+            # The case header is copied here, as it is only edited on this thread
+            snapshot = None
+            if self.journal.needs_compaction(self.caseinfo):
+                snapshot = self.journal.take_snapshot(self.caseinfo)
+            if snapshot is not None:
+                threading.Thread(target=self.journal.compact,
+                                 args=(self.casefile, self.caseinfo, snapshot, self.dataLock)).start()
 
     def saveFileAs(self, wois, wrs):
         """
@@ -229,14 +299,20 @@ class HomeWindow(QMainWindow):
         # Open file dialog for user to choose path to file for saving
         options = QFileDialog.Options()
         options |= QFileDialog.DontUseNativeDialog
-        fileName, _ = QFileDialog.getSaveFileName(self, "Save Case File", "",
-                                                  "JSON Files (*.json)", options=options)
+        fileName, fileFilter = QFileDialog.getSaveFileName(self, "Save Case File", "",
+                                                           f"JSON Files (*{CASE_FILE_EXT});;"
+                                                           f"Binary Case Files (*{CASE_BINARY_EXT})", options=options)
 
         if fileName:
-            # Update 'self.casefile' to new filename
-            self.casefile = fileName + CASE_FILE_EXT
+            # The file format follows the extension of the chosen file type
+            extension = CASE_BINARY_EXT if CASE_BINARY_EXT in fileFilter else CASE_FILE_EXT
+            if not fileName.endswith(extension):
+                fileName += extension
+            # Update 'self.casefile' to new filename, which gets its own journal once written
+            self.casefile = fileName
+            self.journal = None
             # Update the data structure's filename entry
-            self.caseinfo["filename"] = fileName + CASE_FILE_EXT
+            self.caseinfo["filename"] = fileName
 
             # Save the file
             self.saveFile(wois, wrs)
@@ -257,17 +333,26 @@ class Dashboard(QMainWindow):
     """
     Class definition for the main Digifax dashboard
     """
+    # Signal handing fetch progress (address, done, total) over from the fetching threads to the GUI thread
+    fetchProgress = pyqtSignal(object, int, int)
+    # Signal handing the address of a failed fetch over from its thread to the GUI thread
+    fetchFailed = pyqtSignal(str)
+    # Signal handing a finished grouping (generation, filters, dataset, counts) over from its thread to the GUI thread
+    groupingReady = pyqtSignal(int, object, object, object)
+    # Signal handing a finished crawl result over from its thread to the GUI thread
+    crawlFinished = pyqtSignal(object)
+    # Signal handing the paths found between two wallets (source, target, paths, fetched data) over to the GUI thread
+    pathsFound = pyqtSignal(str, str, object, object)
+
     def __init__(self, parent=None):
         super(Dashboard, self).__init__(parent)
+        loadDashboardModules()
         self.loaded = 0
         # Keep a local copy of the parent object
         self.homeparent = parent
         # Load the Home Window UI design from file
         uic.loadUi("./UI/dashboard.ui", self)
 
-        # Etherscan object
-        self.ethscan = DigiFax_EthScan()
-
         # Get all wallet addresses from the case
         # <Format> [WOI_1, WOI_2, WOI_3, ...]
         self.wallets_of_interest = list(set(self.homeparent.caseinfo["walletaddresses"]))
@@ -276,10 +361,34 @@ class Dashboard(QMainWindow):
         # <Format> {wallet: [[relative1, weight],[relative2, weight]], ...}
         self.wallet_relationships = self.homeparent.caseinfo["walletrelationships"]
 
-        # Declare dataset that will be used to hold filtered transactions in Transaction List
-        self.dataset = list()
+        # Label store kept next to the case file
+        self.labelStore = LabelStore(os.path.splitext(self.homeparent.casefile)[0] + LABEL_STORE_EXT)
+
+        # Etherscan object, persisting looked up labels in the store
+        self.ethscan = DigiFax_EthScan(label_cache=self.labelStore)
+
+        # Progress channel for every fetch / sync, pushing its events to the progress bar
+        self.progress = ProgressChannel()
+        self.progress.subscribe(self.fetchProgress.emit)
+
+        # Declare the filters (focus node, type, time range, search) currently applied to the Transaction List
+        self.dataset_filter = None
+        # Declare dataset (TxnTable) that will be used to hold filtered transactions in Transaction List
+        self.dataset = None
+        # Columnar transaction tables of the WOIs, built on first use
+        self.txn_tables = dict()
+        # Incremented by every new grouping request, so that groupings still in progress know they are stale
+        self.filter_generation = 0
+
+        # Debounce timer for the transaction search filter, restarted by every keystroke
+        self.searchTimer = QTimer(self)
+        self.searchTimer.setSingleShot(True)
+        self.searchTimer.setInterval(SEARCH_DEBOUNCE_MS)
         self.transactions_by_address = dict()
-        self.sorted_addresses = list()
+
+        # Autosave timer, journaling the case edits made since the last save
+        self.autosaveTimer = QTimer(self)
+        self.autosaveTimer.setInterval(AUTOSAVE_MS)
 
         # Call function to tune dimensions and window properties of dashboard
         self.resolution = QDesktopWidget().screenGeometry()
@@ -365,7 +474,7 @@ class Dashboard(QMainWindow):
                                         int(self.resolution.width() * SCREEN_WIDTH * DOPICKER_WIDTH),
                                         int(self.resolution.height() * SCREEN_HEIGHT * DOPICKER_HEIGHT))
         # Add Display Order options into "displayOrderPicker"
-        self.displayOrderPicker.addItems(["Descending", "Ascending"])
+        self.displayOrderPicker.addItems(["Descending", "Ascending", "Volume (Desc)", "Volume (Asc)"])
 
         # Set QLabel (transactionTypeLabel) position and size
         self.transactionTypeLabel.setGeometry(int(self.resolution.width() * SCREEN_WIDTH * (WEBPANEL_WIDTH + 0.055 + DOLABEL_WIDTH + DOPICKER_WIDTH)),
@@ -410,6 +519,12 @@ class Dashboard(QMainWindow):
         self.timeStartPicker.setCalendarPopup(True)
         self.timeEndPicker.setCalendarPopup(True)
 
+        # Add a QProgressBar (progressBar) for fetches to the right corner of the menubar, hidden until a fetch starts
+        self.progressBar = QProgressBar()
+        self.progressBar.setFixedWidth(int(self.resolution.width() * SIDEPANEL_WIDTH * 0.5))
+        self.menubar.setCornerWidget(self.progressBar, Qt.TopRightCorner)
+        self.progressBar.hide()
+
         # Set default time range
 
         # Set QLabel (transactionsLabel) position and size
@@ -425,12 +540,17 @@ class Dashboard(QMainWindow):
             int(self.resolution.width() * SCREEN_WIDTH * TFEDIT_WIDTH),
             int(self.resolution.height() * SCREEN_HEIGHT * TFEDIT_HEIGHT))
 
-        # Set QListWidget (transactionListWidget) position and size
-        self.transactionListWidget.setGeometry(int(self.resolution.width() * WEBPANEL_WIDTH),
+        # Set QListView (transactionListView) position and size
+        self.transactionListView.setGeometry(int(self.resolution.width() * WEBPANEL_WIDTH),
                                         int(self.resolution.height() * SCREEN_HEIGHT * (TFLABEL_Y_OFFSET + 0.035)),
                                         int(self.resolution.width() * SIDEPANEL_WIDTH),
                                         int(self.resolution.height() * SCREEN_HEIGHT * TLIST_HEIGHT))
 
+        # Back the Transaction List view with a model, so that only the rows in view are ever drawn
+        self.transactionListModel = TransactionListModel(self)
+        self.transactionListView.setModel(self.transactionListModel)
+        self.transactionListView.setUniformItemSizes(True)
+
         # Set QPushButton (dropRelationshipBtn) position and size   0.829 (1612px)
         self.dropRelationshipBtn.setGeometry(int(self.resolution.width() * SCREEN_WIDTH * (1 - 0.171)),
                                             int(self.resolution.height() * SCREEN_HEIGHT * RS_BTN_Y_OFFSET),
@@ -458,6 +578,15 @@ class Dashboard(QMainWindow):
         self.wev = QWebEngineView()
         vbox.addWidget(self.wev)
 
+        # Set once the graph page has loaded, graph edits are then sent to the page instead of re-rendering it
+        self.graphReady = False
+        # Set while a graph page is loading, the graph edits made meanwhile are queued and run once it has loaded
+        self.graphLoading = False
+        self.pendingGraphScripts = list()
+        # Timing span of the page load in progress (None while timing is off)
+        self.pageLoad = None
+        self.wev.loadFinished.connect(self.graphLoaded)
+
     def createGraph(self):
         """
         Function to initialize the PyVis Network graph with default parameters
@@ -468,6 +597,7 @@ class Dashboard(QMainWindow):
                              bgcolor='#000000',
                              font_color='#ffffff')
 
+    @traced("populateGraph", "gui")
     def populateGraph(self):
         """
         Function to update graph contents and save to a new .html file
@@ -478,23 +608,120 @@ class Dashboard(QMainWindow):
 
         # Add all given nodes to the graph
         for wallet in self.wallets_of_interest:
-            # Set display label (for the node in the graph) using the alias if it exists
-            if wallet in self.homeparent.caseinfo["aliases"].keys():
-                display_lbl = self.homeparent.caseinfo["aliases"][wallet]
-            else:
-                display_lbl = wallet[:ADDR_DISPLAY_LIMIT]
-
-            self.graph.add_node(wallet, display_lbl, color=DEFAULT_COLORS[random.randint(0,3)])
+            self.graph.add_node(wallet, self.getNodeLabel(wallet), color=DEFAULT_COLORS[random.randint(0,3)])
 
-        # Add all relationships (if any)
+        # Add all relationships (if any), a single undirected edge per pair of wallets
+        drawn = set()
         for focus, relatives in self.wallet_relationships.items():
             for relative in relatives:
-                self.graph.add_edge(focus, relative[ADDR], value=relative[WEIGHT])
+                pair = frozenset((focus, relative[ADDR]))
+                if pair not in drawn:
+                    drawn.add(pair)
+                    self.graph.add_edge(focus, relative[ADDR], value=self.getEdgeWeight(focus, relative[ADDR]))
 
         # Save the graph into a file
         self.graph.save_graph("graph.html")
         self.loadPage('graph.html')
 
+    def getNodeLabel(self, wallet):
+        """
+        Function to get the display label of a node in the graph
+        :param wallet: WOI address of the node
+        :return: The alias of the WOI if it exists, else its truncated address
+        """
+        if wallet in self.homeparent.caseinfo["aliases"].keys():
+            return self.homeparent.caseinfo["aliases"][wallet]
+        return wallet[:ADDR_DISPLAY_LIMIT]
+
+    def graphLoaded(self, ok):
+        """
+        Function to record whether the graph page is ready to receive incremental edits
+        :param ok: True if the page loaded successfully
+        :return: None
+        """
+        self.graphReady = ok
+        self.graphLoading = False
+        end(self.pageLoad)
+        self.pageLoad = None
+
+        # Apply the edits made while the page was loading (dropped if it failed, the next edit re-renders the graph)
+        scripts, self.pendingGraphScripts = self.pendingGraphScripts, list()
+        if ok and scripts:
+            self.wev.page().runJavaScript("".join(scripts))
+
+    def runGraphScript(self, script):
+        """
+        Function to apply an edit to the loaded graph page through its vis.js 'nodes' / 'edges' DataSets,
+        queueing it while a page is loading, or re-rendering the whole graph once if no page is loaded
+        :param script: JavaScript statements to run on the graph page
+        :return: None
+        """
+        if self.graphReady:
+            self.wev.page().runJavaScript(script)
+        elif self.graphLoading:
+            self.pendingGraphScripts.append(script)
+        else:
+            # The new page holds this edit, later edits are queued until it has loaded
+            self.populateGraph()
+
+    def graphAddNode(self, wallet):
+        """
+        Function to add a node to the displayed graph without re-rendering it
+        :param wallet: WOI address of the node
+        :return: None
+        """
+        node = Node(wallet, "dot", label=self.getNodeLabel(wallet), color=DEFAULT_COLORS[random.randint(0,3)],
+                    font_color=self.graph.font_color)
+        self.runGraphScript(f"nodes.update({json.dumps(node.options)});")
+
+    def graphUpdateNode(self, wallet):
+        """
+        Function to refresh the label of a node in the displayed graph (e.g. after its alias changed)
+        :param wallet: WOI address of the node
+        :return: None
+        """
+        if wallet in self.wallets_of_interest:
+            self.runGraphScript(f"nodes.update({json.dumps({'id': wallet, 'label': self.getNodeLabel(wallet)})});")
+
+    def graphDropNode(self, wallet):
+        """
+        Function to remove a node and all of its edges from the displayed graph
+        :param wallet: WOI address of the node
+        :return: None
+        """
+        node_id = json.dumps(wallet)
+        self.runGraphScript(f"edges.remove(edges.getIds({{filter: e => e.from == {node_id} || e.to == {node_id}}}));"
+                            f"nodes.remove({node_id});")
+
+    def getEdgeWeight(self, wallet_a, wallet_b):
+        """
+        Function to get the weight of the undirected edge between two nodes: the heaviest relationship registered
+        between them, in either direction
+        :param wallet_a: WOI address of the first node
+        :param wallet_b: WOI address of the second node
+        :return: The weight of the edge, None if no relationship is registered between them
+        """
+        weights = [rs[WEIGHT] for focus, relative in ((wallet_a, wallet_b), (wallet_b, wallet_a))
+                   for rs in self.wallet_relationships.get(focus, []) if rs[ADDR] == relative]
+        return max(weights, default=None)
+
+    def graphUpdateEdge(self, wallet_a, wallet_b):
+        """
+        Function to redraw the edge between two nodes of the displayed graph from the registered relationships,
+        as a full render would
+        :param wallet_a: WOI address of the first node
+        :param wallet_b: WOI address of the second node
+        :return: None
+        """
+        id_a, id_b = json.dumps(wallet_a), json.dumps(wallet_b)
+        script = (f"edges.remove(edges.getIds({{filter: e => (e.from == {id_a} && e.to == {id_b}) || "
+                  f"(e.from == {id_b} && e.to == {id_a})}}));")
+        weight = self.getEdgeWeight(wallet_a, wallet_b)
+        if weight is not None:
+            edge = Edge(wallet_a, wallet_b, self.graph.directed, value=weight)
+            script += f"edges.add({json.dumps(edge.options)});"
+        self.runGraphScript(script)
+
     def addNode(self, woi):
         """
         Function to add a specific address as a new node into the graph and backend structs
@@ -519,8 +746,8 @@ class Dashboard(QMainWindow):
                 # Update the WOI Node List
                 self.populateWoiList()
 
-                # Reload the graph
-                self.populateGraph()
+                # Add the node to the graph
+                self.graphAddNode(woi)
 
                 # Clear 'walletLineEdit' text
                 self.walletLineEdit.clear()
@@ -570,8 +797,8 @@ class Dashboard(QMainWindow):
                 # Update the WOI Node List
                 self.populateWoiList()
 
-                # Reload the graph
-                self.populateGraph()
+                # Remove the node (and its edges) from the graph
+                self.graphDropNode(woi)
         except AttributeError as err:
             # Add notification to user telling them to select a WOI (node)
             if self.loaded:
@@ -582,22 +809,79 @@ class Dashboard(QMainWindow):
         Function to get a corresponding weight for the rs between WOI and address selected in the transaction list
         :return weight: An integer representation of the weight to draw for relationship of given woi & transaction
         """
-        total_txn_count = int()
+        # No weight can be given if the transactions of the WOI have not been retrieved
+        counterparties = self.getCounterparties(focus_node)
+        if counterparties is None:
+            return
+
+        record = counterparties.get(txn_addr)
+        return relationship_weight(record[IN_COUNT] + record[OUT_COUNT] if record else 0)
+
+    def getCounterparties(self, focus_node):
+        """
+        Function to get the per-counterparty aggregate records of a WOI, computing them once for case files
+        saved before the records were kept
+        :param focus_node: WOI address
+        :return: Dictionary of {counterparty: aggregate record}, None if the transactions of the WOI are not retrieved
+        """
+        stats = self.homeparent.caseinfo["data"][STATS].get(focus_node)
+        if stats is None:
+            return None
+        if COUNTERPARTIES not in stats:
+            counterparties = self.getTxnTable(focus_node).aggregate_by_counterparty()
+            with self.homeparent.dataLock:
+                stats[COUNTERPARTIES] = counterparties
+        return stats[COUNTERPARTIES]
 
-        try:
-            if txn_addr in self.homeparent.caseinfo['data'][STATS][focus_node][UNIQ_IN].keys():
-                total_txn_count += self.homeparent.caseinfo['data'][STATS][focus_node][UNIQ_IN][txn_addr]
-            if txn_addr in self.homeparent.caseinfo['data'][STATS][focus_node][UNIQ_OUT].keys():
-                total_txn_count += self.homeparent.caseinfo['data'][STATS][focus_node][UNIQ_OUT][txn_addr]
-
-            if total_txn_count < LOWER_BOUND:
-                return LOW_WEIGHT
-            elif total_txn_count <= MIDDLE_BOUND:
-                return MEDIUM_WEIGHT
+    def getNodeToolTip(self, wallet):
+        """
+        Function to get the tooltip of a WOI entry in the Node List view: its total transactions, and the aggregates
+        of every relationship it has with another WOI whose transactions were retrieved
+        :param wallet: WOI address
+        :return: Tooltip text
+        """
+        if wallet in self.homeparent.caseinfo["data"][STATS].keys():
+            lines = [f"Total Transactions: {self.homeparent.caseinfo['data'][STATS][wallet][TOTAL_TXNS]}"]
+        else:
+            lines = [f"Total Transactions: [NO DATA]"]
+
+        # Records are read from whichever side of the relationship has data, from this wallet's point of view
+        related = dict()
+        for relative in self.wallet_relationships.get(wallet, []):
+            record = (self.getCounterparties(wallet) or {}).get(relative[ADDR])
+            if record:
+                related[relative[ADDR]] = record
+        for focus, relatives in self.wallet_relationships.items():
+            if focus in related or wallet not in [relative[ADDR] for relative in relatives]:
+                continue
+            record = (self.getCounterparties(focus) or {}).get(wallet)
+            if record:
+                related[focus] = [record[OUT_COUNT], record[IN_COUNT], record[OUT_VALUE], record[IN_VALUE],
+                                  record[FIRST_SEEN], record[LAST_SEEN]]
+
+        for addr, record in related.items():
+            first_seen = QDateTime.fromSecsSinceEpoch(record[FIRST_SEEN]).toString("yyyy/MM/dd")
+            last_seen = QDateTime.fromSecsSinceEpoch(record[LAST_SEEN]).toString("yyyy/MM/dd")
+            lines.append(f"{self.getNodeLabel(addr)}: {record[IN_COUNT]} in ({record[IN_VALUE]:.4f} ETH), "
+                         f"{record[OUT_COUNT]} out ({record[OUT_VALUE]:.4f} ETH), {first_seen} - {last_seen}")
+        return "\n".join(lines)
+
+    def eventFilter(self, obj, event):
+        """
+        Function to show the tooltip of the WOI entry hovered in the Node List view (total transactions it has and its
+        relationships' aggregates)
+        :param obj: Object the event was sent to
+        :param event: Intercepted event
+        :return: True if the event was handled, else the default handling
+        """
+        if event.type() == QEvent.ToolTip and obj is self.nodeListWidget.viewport():
+            item = self.nodeListWidget.itemAt(event.pos())
+            if item is None:
+                QToolTip.hideText()
             else:
-                return HIGH_WEIGHT
-        except KeyError:
-            pass
+                QToolTip.showText(event.globalPos(), self.getNodeToolTip(item.text().split(' ')[0].lower()), obj)
+            return True
+        return super(Dashboard, self).eventFilter(obj, event)
 
     def addRelationship(self):
         """
@@ -606,10 +890,13 @@ class Dashboard(QMainWindow):
         """
         try:
             focusedWallet = self.nodeListWidget.currentItem().text().split(' ')[0].lower()                # selected node
-            woi = self.transactionListWidget.currentItem().text().split("] ")[1].lower()    # selected transaction
+            woi = self.selectedTransaction().lower()    # selected transaction
 
             # Add node to wallet_of_interest if necessary (node doesn't exist yet)
+            new_node = woi not in self.wallets_of_interest
             self.addNode(woi)
+            if new_node:
+                self.graphAddNode(woi)
 
             # Update WOI relationships
             if focusedWallet not in self.wallet_relationships.keys():
@@ -626,8 +913,8 @@ class Dashboard(QMainWindow):
                     # Update the WOI Node List
                     self.populateWoiList()
 
-                    # Reload the graph
-                    self.populateGraph()
+                    # Draw the new edge
+                    self.graphUpdateEdge(focusedWallet, woi)
 
         except AttributeError as err:
             # Add notification to user telling them to select a WOI (node)
@@ -641,7 +928,7 @@ class Dashboard(QMainWindow):
         """
         try:
             focusedWallet = self.nodeListWidget.currentItem().text().split(' ')[0].lower()   # selected node
-            woi = self.transactionListWidget.currentItem().text().split("] ")[1].lower()      # selected transaction
+            woi = self.selectedTransaction().lower()      # selected transaction
             # Exit function if key of focusedWallet (selected node in Node List) does not exist
             if focusedWallet not in self.wallet_relationships.keys():
                 return
@@ -664,14 +951,18 @@ class Dashboard(QMainWindow):
                     # Update the WOI Node List
                     self.populateWoiList()
 
-                    # Reload the graph
-                    self.populateGraph()
+                    # Remove the edge, or the node altogether if it was dropped
+                    if woi in self.wallets_of_interest:
+                        self.graphUpdateEdge(focusedWallet, woi)
+                    else:
+                        self.graphDropNode(woi)
         except AttributeError as err:
             # Add notification to user telling them to select a WOI (node)
             if self.loaded:
                 self.homeparent.displayMessage(
                     "[-] Unable to drop relationship:\nPlease select (1) a node and (2) a transaction address")
 
+    @traced("populateWoiList", "gui")
     def populateWoiList(self):
         """
         Function to populate WOI (nodes) list
@@ -694,14 +985,6 @@ class Dashboard(QMainWindow):
                     temp.setText(wallet + f" [{self.homeparent.caseinfo['aliases'][wallet]}]")
                 else:
                     temp.setText(wallet)
-                # Set tooltip (hover) over each WOI entry as the total transactions it has (incoming+outgoing)
-                if STATS in self.homeparent.caseinfo["data"].keys():
-                    if wallet in self.homeparent.caseinfo["data"][STATS].keys():
-                        temp.setToolTip(f"Total Transactions: {self.homeparent.caseinfo['data'][STATS][wallet][TOTAL_TXNS]}")
-                    else:
-                        temp.setToolTip(f"Total Transactions: [NO DATA]")
-                else:
-                    print("[-] No STATS")
                 self.nodeListWidget.addItem(temp)
 
             # Set previous item as selected if it still exists
@@ -716,11 +999,20 @@ class Dashboard(QMainWindow):
         """
         Helper function to populateTransactionList(), helper function's main purpose is multithreading.
         """
-        txns = self.ethscan.get_ext_txns([focus_node])
+        txns = self.ethscan.get_ext_txns([focus_node], progress=self.progress)
+        if focus_node not in txns:
+            # Drop the placeholder of the failed fetch, so that the address is queried again when next selected
+            with self.homeparent.dataLock:
+                self.homeparent.caseinfo["data"][SANITIZED_DATA].pop(focus_node, None)
+            self.fetchFailed.emit(focus_node)
+            return
         self.ethscan.split_txns_based_on_direction(txns)
         self.ethscan.update_statistics()
-        self.homeparent.caseinfo["data"][SANITIZED_DATA][focus_node] = self.ethscan.ADDR_TXNS_SUMMARISED[focus_node]
-        self.homeparent.caseinfo["data"][STATS][focus_node] = self.ethscan.ADDR_TXNS_STATS[focus_node]
+        with self.homeparent.dataLock:
+            self.homeparent.caseinfo["data"][SANITIZED_DATA][focus_node] = \
+                self.ethscan.ADDR_TXNS_SUMMARISED[focus_node]
+            self.homeparent.caseinfo["data"][STATS][focus_node] = self.ethscan.ADDR_TXNS_STATS[focus_node]
+        self.txn_tables[focus_node] = self.ethscan.get_txn_table(focus_node)
 
         # If the focus node is still selected
         # if self.nodeListWidget.currentItem().text().split(' ')[0].lower() == focus_node:
@@ -729,7 +1021,7 @@ class Dashboard(QMainWindow):
 
     def populateTransactionList(self):
         """
-        Function to populate self.dataset based on currently selected filters (INCOMING/OUTGOING/ALL) and calls
+        Function to set self.dataset_filter based on currently selected filters (INCOMING/OUTGOING/ALL) and calls
         self.refreshView() to display the items accordingly
         :return: None
         """
@@ -746,7 +1038,8 @@ class Dashboard(QMainWindow):
                     # Blocking displayMessage.
                     self.homeparent.displayMessage(f"Retrieving txns for address {focus_node.lower()}")
 
-                    self.homeparent.caseinfo["data"][SANITIZED_DATA][focus_node] = {}
+                    with self.homeparent.dataLock:
+                        self.homeparent.caseinfo["data"][SANITIZED_DATA][focus_node] = {}
 
                     threading.Thread(target=self.populateTransactionList_helperfunc, args=([focus_node])).start()
 
@@ -762,22 +1055,9 @@ class Dashboard(QMainWindow):
                     # Set flag for filter the dataset if there exists user input in the transaction search filter
                     search_str = self.transactionFilterEdit.text().lower()
 
-                    # Get focused dataset based on the specified transaction type and time range
-                    if trans_type == ALL:
-                        self.dataset = [x for x in self.homeparent.caseinfo["data"][SANITIZED_DATA][focus_node][INBOUND]
-                                        if start_datetime <= int(x[TIMESTAMP]) <= end_datetime and search_str in x[FROM]] + \
-                                       [x for x in self.homeparent.caseinfo["data"][SANITIZED_DATA][focus_node][OUTBOUND]
-                                        if start_datetime <= int(x[TIMESTAMP]) <= end_datetime and search_str in x[TO]]
-                    else:
-                        target = FROM if trans_type == INBOUND else TO
-                        self.dataset = [x for x in self.homeparent.caseinfo["data"][SANITIZED_DATA][focus_node][trans_type]
-                                        if start_datetime <= int(x[TIMESTAMP]) <= end_datetime and search_str in x[target]]
-
-                    # Count # of transactions (that has been time range filtered) by transaction address
-                    self.group_transactions()
-
-                    # Refresh the Transaction List view with newly filtered and sorted data
-                    self.refreshView()
+                    # Count # of transactions (that has been time range filtered) by transaction address,
+                    # the Transaction List view is refreshed once the grouping is done
+                    self.group_transactions((focus_node, trans_type, start_datetime, end_datetime, search_str))
             else:
                 # No SANITIZED field in dictionary, just return since no data at all
                 return
@@ -793,45 +1073,104 @@ class Dashboard(QMainWindow):
         except KeyError:
             pass
 
+    @traced("refreshView", "gui")
     def refreshView(self):
         """
         Function to populate Transaction list view based on currently specified sorting choice
         :return: None
         """
-        # Claer transaction list
-        self.transactionListWidget.clear()
-
         # Get display order
         display_order = self.displayOrderPicker.currentText()
-        reverse_flag = True if display_order == "Descending" else False
+        reverse_flag = True if display_order in ("Descending", "Volume (Desc)") else False
+
+        # Sorting by volume reads the total value exchanged with each counterparty from the WOI's aggregate records
+        sort_key = None
+        if display_order.startswith("Volume") and self.dataset_filter is not None:
+            counterparties = self.getCounterparties(self.dataset_filter[0]) or dict()
+            sort_key = lambda addr: (counterparties[addr][IN_VALUE] + counterparties[addr][OUT_VALUE]
+                                     if addr in counterparties else 0)
 
-        # Sort the transactions by count
-        self.sorted_addresses = sorted(self.transactions_by_address.items(),
-                                              key=lambda item: item[1], reverse=reverse_flag)
+        # Sort the transactions by count (or volume), the view only draws the rows currently in sight
+        self.transactionListModel.setCounts(self.transactions_by_address, descending=reverse_flag, key=sort_key)
 
-        # Add the transactions into the Transaction list view in specified display order
-        for [addr,count] in self.sorted_addresses:
-            temp = QListWidgetItem()
-            temp.setText(f"[{count}] {addr}")
-            self.transactionListWidget.addItem(temp)
+    def selectedTransaction(self):
+        """
+        Function to get the counterparty address selected in the Transaction List view
+        :return: Selected address, None if no transaction is selected
+        """
+        return self.transactionListView.currentIndex().data(ADDRESS_ROLE)
 
-    def group_transactions(self):
+    def getTxnTable(self, focus_node):
         """
-        Function to group transaction count by address into a dictionary, based on data in "self.dataset"
+        Function to get the columnar transaction table of a WOI, building it from the case data on first use
+        :param focus_node: WOI address
+        :return: TxnTable of the WOI
+        """
+        if focus_node not in self.txn_tables:
+            sanitized = self.homeparent.caseinfo["data"][SANITIZED_DATA][focus_node]
+            self.txn_tables[focus_node] = TxnTable.from_txns(focus_node, sanitized[INBOUND] + sanitized[OUTBOUND],
+                                                             self.ethscan.ADDRESS_BOOK)
+        return self.txn_tables[focus_node]
+
+    def group_transactions(self, dataset_filter):
+        """
+        Function to start grouping transaction count by address into a dictionary in a separate thread
+        :param dataset_filter: Tuple of (focus node, transaction type, start datetime, end datetime, search string)
         :return: None
         """
-        # Reset Transaction by address dictionary
-        self.transactions_by_address = dict()
+        # Any grouping still in progress is now stale
+        self.filter_generation += 1
+
+        # If only the search string was extended, the new results are a subset of the current ones: refine those
+        base = None
+        if self.dataset is not None and self.dataset_filter is not None and \
+                self.dataset_filter[:4] == dataset_filter[:4] and self.dataset_filter[4] in dataset_filter[4]:
+            base = (self.dataset, self.transactions_by_address)
+
+        threading.Thread(target=self.group_transactions_helperfunc,
+                         args=(self.filter_generation, dataset_filter, base), daemon=True).start()
+
+    @traced("group_transactions", "compute")
+    def group_transactions_helperfunc(self, generation, dataset_filter, base):
+        """
+        Helper function to group_transactions(), helper function's main purpose is multithreading.
+        """
+        focus_node, trans_type, start_datetime, end_datetime, search_str = dataset_filter
+
+        def cancelled():
+            return generation != self.filter_generation
 
-        # Loop through all transactions
-        for x in self.dataset:
-            # Get the direction for this transaction (is it a incoming/outgoing transaction)
-            direction = FROM if x["direction"] == IN else TO
-            # Init / add a counter for the specific address in the dictionary accordingly
-            if x[f"{direction}"] not in self.transactions_by_address:
-                self.transactions_by_address[x[f"{direction}"]] = 1
+        try:
+            if base is not None:
+                # Counts by counterparty are not affected by a narrower search string, only the matching ones are kept
+                dataset = base[0].search(search_str, cancelled)
+                transactions_by_address = {addr: count for addr, count in base[1].items() if search_str in addr}
             else:
-                self.transactions_by_address[x[f"{direction}"]] += 1
+                # Filter the WOI's transactions with vectorized operations, then count them by counterparty address
+                dataset = self.getTxnTable(focus_node).filter(trans_type, start_datetime, end_datetime, search_str,
+                                                              cancelled)
+                transactions_by_address = dataset.count_by_counterparty() if dataset is not None else None
+        except KeyError:
+            # Transactions of the focus node are still being retrieved
+            return
+
+        if dataset is not None and not cancelled():
+            self.groupingReady.emit(generation, dataset_filter, dataset, transactions_by_address)
+
+    def applyGrouping(self, generation, dataset_filter, dataset, transactions_by_address):
+        """
+        Function to display a finished grouping, unless a newer one has been requested since
+        :return: None
+        """
+        if generation != self.filter_generation:
+            return
+
+        self.dataset_filter = dataset_filter
+        self.dataset = dataset
+        self.transactions_by_address = transactions_by_address
+
+        # Refresh the Transaction List view with newly filtered and sorted data
+        self.refreshView()
 
     def searchWOIAddresses(self):
         """
@@ -854,12 +1193,6 @@ class Dashboard(QMainWindow):
                     temp.setText(wallet + f" [{self.homeparent.caseinfo['aliases'][wallet]}]")
                 else:
                     temp.setText(wallet)
-                # Set tooltip (hover) over each WOI entry as the total transactions it has (incoming+outgoing)
-                if wallet in self.homeparent.caseinfo["data"][STATS].keys():
-                    temp.setToolTip(
-                        f"Total Transactions: {self.homeparent.caseinfo['data'][STATS][wallet][TOTAL_TXNS]}")
-                else:
-                    temp.setToolTip(f"Total Transactions: [NO DATA]")
                 self.nodeListWidget.addItem(temp)
 
     def initDashboardDefaultValues(self):
@@ -903,22 +1236,32 @@ class Dashboard(QMainWindow):
         self.nodeListWidget.itemClicked.connect(self.copyToClipboard)
         self.nodeListWidget.itemDoubleClicked.connect(self.openWOIProfile)
 
-        # Display Order Filter (Selection Changed Event)
-        self.displayOrderPicker.activated.connect(self.refreshView)
+        # Display Order Filter (Selection Changed Event), the timed slot does not take the selected index
+        self.displayOrderPicker.activated.connect(lambda index: self.refreshView())
 
         # Transaction Type Filter (Selection Changed Event)
         self.transactionTypePicker.activated.connect(self.filter)
 
-        # Transaction Search String Filter (Text Edited Event)
-        self.transactionFilterEdit.textEdited.connect(self.filter)
+        # Transaction Search String Filter (Text Edited Event, debounced)
+        self.transactionFilterEdit.textEdited.connect(lambda text: self.searchTimer.start())
+        self.searchTimer.timeout.connect(self.filter)
+
+        # Transaction grouping done (Signal emitted from grouping thread)
+        self.groupingReady.connect(self.applyGrouping)
+
+        # Crawl done (Signal emitted from crawling thread)
+        self.crawlFinished.connect(self.applyCrawl)
+
+        # Path search done (Signal emitted from path finding thread)
+        self.pathsFound.connect(self.showPaths)
 
         # Date Time Picker Changed ( Event)
         self.timeStartPicker.dateTimeChanged.connect(self.filter)
         self.timeEndPicker.dateTimeChanged.connect(self.filter)
 
         # View transactions with selected Unique wallet address under current filter conditions
-        self.transactionListWidget.itemClicked.connect(self.clipTransaction)
-        self.transactionListWidget.itemDoubleClicked.connect(self.openTransactions)
+        self.transactionListView.clicked.connect(self.clipTransaction)
+        self.transactionListView.doubleClicked.connect(self.openTransactions)
 
         # Add / Drop Relationship (On-Click Event)
         self.addRelationshipBtn.clicked.connect(self.addRelationship)
@@ -927,14 +1270,34 @@ class Dashboard(QMainWindow):
         # Drop Node (On-Click Event)
         self.dropNodeBtn.clicked.connect(self.dropNodeBtnHandler)
 
+        # Fetch / Sync progress (Signal emitted from fetching threads)
+        self.fetchProgress.connect(self.updateProgress)
+        self.fetchFailed.connect(self.reportFetchFailure)
+
+        # Autosave (Timer Event)
+        self.autosaveTimer.timeout.connect(self.autosave)
+        if AUTOSAVE_MS:
+            self.autosaveTimer.start()
+
+        # WOI tooltips (Tooltip Event), built on hover since they read the WOI's statistics from the case file
+        self.nodeListWidget.viewport().installEventFilter(self)
+
         # Menubar Events
         self.actionOpen.setShortcut("Ctrl+O")
         self.actionSave.setShortcut("Ctrl+S")
+        self.actionSync.setShortcut("Ctrl+R")
+        self.actionCrawl.setShortcut("Ctrl+G")
+        self.actionFindPath.setShortcut("Ctrl+P")
+        self.actionTiming.setShortcut("Ctrl+T")
         self.actionHelp.setShortcut("Ctrl+I")
         self.actionClose.setShortcut("Ctrl+D")
         self.actionOpen.triggered.connect(self.open)
         self.actionSave.triggered.connect(self.save)
         self.actionSave_As.triggered.connect(self.saveAs)
+        self.actionSync.triggered.connect(self.sync)
+        self.actionCrawl.triggered.connect(self.crawl)
+        self.actionFindPath.triggered.connect(self.findPath)
+        self.actionTiming.triggered.connect(self.timing)
         self.actionHelp.triggered.connect(self.help)
         self.actionClose.triggered.connect(self.closeDashboard)
 
@@ -947,17 +1310,56 @@ class Dashboard(QMainWindow):
         try:
             with open(pagename, 'r') as f:
                 html = f.read()
+            self.graphReady = False
+            self.graphLoading = True
+            # The new page is rendered from the current case data, which already holds the queued edits
+            self.pendingGraphScripts = list()
+            self.pageLoad = begin("graph.load", "gui", size=len(html))
             self.wev.setHtml(html)
         except RuntimeError:
             pass
 
+    def updateProgress(self, addr, done, total):
+        """
+        Function to reflect a fetch progress event on the progress bar
+        :param addr: Address that made progress (None for the progress of the whole batch)
+        :param done: Amount of work done (rows fetched for an address, addresses completed for a batch)
+        :param total: Total amount of work (0 if not known yet)
+        :return: None
+        """
+        # The batch is complete, hide the progress bar
+        if addr is None and done == total:
+            self.progressBar.hide()
+            return
+
+        if total:
+            # Determinate progress of the batch (number of addresses completed)
+            self.progressBar.setRange(0, total)
+            self.progressBar.setValue(done)
+            self.progressBar.setFormat("%v/%m addresses")
+        else:
+            # Rows fetched so far for an address, total not known yet (busy indicator)
+            self.progressBar.setRange(0, 0)
+            self.progressBar.setToolTip(f"{addr}: {done} transactions retrieved")
+        self.progressBar.show()
+
+    def reportFetchFailure(self, addr):
+        """
+        Function to tell the user that the transactions of an address could not be retrieved
+        :param addr: Address whose fetch failed
+        :return: None
+        """
+        self.progressBar.hide()
+        self.homeparent.displayMessage(f"[-] Unable to retrieve transactions for address {addr}\n"
+                                       f"Select it again to retry")
+
     def filter(self):
         """
         Function to handle any change in filter specified by user (transaction type, time range, search query)
         :return: None
         """
         # Clear the transaction list
-        self.transactionListWidget.clear()
+        self.transactionListModel.clear()
 
         # Repopulate the transaction list
         self.populateTransactionList()
@@ -967,7 +1369,7 @@ class Dashboard(QMainWindow):
         Function to put highlighted transaction in Transaction List Widget into clipboard
         :return: None
         """
-        copy(self.transactionListWidget.currentItem().text().split('] ')[1])
+        copy(self.selectedTransaction())
 
     def copyToClipboard(self):
         """
@@ -990,14 +1392,14 @@ class Dashboard(QMainWindow):
         that current node has under specified filters
         :return: None
         """
-        selected_txn_addr = self.transactionListWidget.currentItem().text().split("] ")[1].lower()
-        txns = [txn for txn in self.dataset if selected_txn_addr in txn[FROM] or selected_txn_addr in txn[TO]]
+        selected_txn_addr = self.selectedTransaction().lower()
+        txns = self.dataset.select_counterparty(selected_txn_addr).to_txns()
 
+        # Resolve the labels of every address involved in one round of concurrent lookups
+        labels = self.ethscan.get_addrs_labels([txn["to"] for txn in txns] + [txn["from"] for txn in txns])
         for txn in txns:
-            to_labels = self.ethscan.get_addr_labels(txn["to"])
-            from_labels = self.ethscan.get_addr_labels(txn["from"])
-            txn["to_labels"] = to_labels
-            txn["from_labels"] = from_labels
+            txn["to_labels"] = labels[txn["to"]]
+            txn["from_labels"] = labels[txn["from"]]
 
         self.homeparent.openTransactionWindow(txns)
 
@@ -1016,6 +1418,13 @@ class Dashboard(QMainWindow):
         """
         self.homeparent.saveFile(self.wallets_of_interest, self.wallet_relationships)
 
+    def autosave(self):
+        """
+        Handler Function to journal the edits made since the last save, if the case has been saved once
+        :return: None
+        """
+        self.homeparent.saveFile(self.wallets_of_interest, self.wallet_relationships, autosave=True)
+
     def saveAs(self):
         """
         Handler Function to save current work progress with a specific filename and location
@@ -1024,30 +1433,214 @@ class Dashboard(QMainWindow):
         self.homeparent.saveFileAs(self.wallets_of_interest, self.wallet_relationships)
         self.setWindowTitle("DigiTrace - " + self.homeparent.caseinfo["filename"])
 
+    def sync_helperfunc(self):
+        """
+        Helper function to sync(), helper function's main purpose is multithreading.
+        """
+        def on_synced(addr, txns):
+            # The address' entries were extended in place, the case file has to be rewritten on the next save
+            mark_dirty(self.homeparent.caseinfo["data"], addr)
+            # Rebuild the address' table from the merged data when next needed
+            self.txn_tables.pop(addr, None)
+
+        new_txns = self.ethscan.sync_ext_txns(self.homeparent.caseinfo["data"], callback=on_synced,
+                                              progress=self.progress, lock=self.homeparent.dataLock)
+        print(f"[*] Synced {sum(len(txns) for txns in new_txns.values())} new transactions for {len(new_txns)} addresses.")
+
+    def sync(self):
+        """
+        Handler Function to fetch only the new transactions of every address with cached transactions
+        :return: None
+        """
+        threading.Thread(target=self.sync_helperfunc).start()
+
+    def newEthScan(self):
+        """
+        Function to create a throwaway Etherscan object (e.g. for a crawl or a path search), so that the addresses it explores are not
+        kept by 'self.ethscan'. It shares the HTTP transport, the label store and the API rate limit of 'self.ethscan'
+        :return: DigiFax_EthScan object
+        """
+        return DigiFax_EthScan(label_cache=self.labelStore, transport=self.ethscan.transport,
+                               limiter=self.ethscan.engine.limiter)
+
+    def crawl_helperfunc(self, hops):
+        """
+        Helper function to crawl(), helper function's main purpose is multithreading.
+        """
+        crawler = DigiFax_Crawler(self.newEthScan(), hops)
+        result = crawler.crawl(self.homeparent.caseinfo["walletaddresses"], self.homeparent.caseinfo["data"],
+                               progress=self.progress)
+        self.crawlFinished.emit(result)
+
+    def crawl(self):
+        """
+        Handler Function to expand the case a number of hops out from its wallet addresses in the background
+        :return: None
+        """
+        hops, ok = QInputDialog.getInt(self, "Crawl Relationships", "Number of hops from the case's wallets:",
+                                       DEFAULT_HOPS, 1, 5)
+        if ok:
+            threading.Thread(target=self.crawl_helperfunc, args=([hops])).start()
+
+    def applyCrawl(self, result):
+        """
+        Function to add the addresses and relationships found by a crawl to the case in one go, the transactions of the
+        new addresses are only fetched once they are displayed
+        :param result: Crawl result (see DigiFax_Crawler.crawl)
+        :return: None
+        """
+        for wallet in result[WALLETS]:
+            self.addNode(wallet)
+        for focus, relatives in result[RELATIONSHIPS].items():
+            known = [relative[ADDR] for relative in self.wallet_relationships.setdefault(focus, list())]
+            self.wallet_relationships[focus].extend(relative for relative in relatives if relative[ADDR] not in known)
+
+        # Update the WOI Node List and re-render the graph once for the whole crawl
+        self.populateWoiList()
+        self.populateGraph()
+        if self.loaded:
+            self.homeparent.displayMessage(f"[+] Crawl complete:\n{len(result[WALLETS])} addresses, "
+                                           f"{sum(len(r) for r in result[RELATIONSHIPS].values())} relationships")
+
+    def findPath_helperfunc(self, source, target):
+        """
+        Helper function to findPath(), helper function's main purpose is multithreading.
+        """
+        pathfinder = DigiFax_PathFinder(self.newEthScan(), self.homeparent.caseinfo["data"], progress=self.progress)
+        paths = pathfinder.find_paths(source, target)
+        self.pathsFound.emit(source, target, paths, pathfinder.fetched)
+
+    def findPath(self):
+        """
+        Handler Function to search (in the background) for the paths funds took from the selected WOI to another wallet
+        :return: None
+        """
+        try:
+            source = self.nodeListWidget.currentItem().text().split(' ')[0].lower()
+        except AttributeError:
+            if self.loaded:
+                self.homeparent.displayMessage("[-] Unable to find path:\nNo node (WOI) was selected")
+            return
+
+        target, ok = QInputDialog.getText(self, "Find Path", f"Find how funds got from\n{source}\nto wallet address:")
+        target = target.strip().lower()
+        if not ok:
+            return
+        if not self.homeparent.isValidWalletAddress(target) or target == source:
+            self.homeparent.displayMessage("[-] Unable to find path:\nInvalid wallet address given")
+            return
+        threading.Thread(target=self.findPath_helperfunc, args=([source, target])).start()
+
+    def showPaths(self, source, target, paths, fetched):
+        """
+        Function to add the paths found between two wallets to the case, highlight them in the graph and display
+        their transactions
+        :param source: Wallet address the funds came from
+        :param target: Wallet address the funds went to
+        :param paths: List of paths, each a list of (sender, receiver, list of sanitized transactions) hops
+        :param fetched: Case data (SANITIZED_DATA and STATS) of the addresses fetched during the search
+        :return: None
+        """
+        with self.homeparent.dataLock:
+            self.homeparent.caseinfo["data"][SANITIZED_DATA].update(fetched[SANITIZED_DATA])
+            self.homeparent.caseinfo["data"][STATS].update(fetched[STATS])
+        if not paths:
+            self.homeparent.displayMessage(f"[-] No path found from\n{source}\nto\n{target}")
+            return
+
+        # Register every hop as a relationship, drawing the nodes and edges that are new to the graph
+        for path in paths:
+            for sender, receiver, txns in path:
+                for wallet in (sender, receiver):
+                    if wallet not in self.wallets_of_interest:
+                        self.addNode(wallet)
+                        self.graphAddNode(wallet)
+                relatives = self.wallet_relationships.setdefault(sender, list())
+                if receiver not in [relative[ADDR] for relative in relatives]:
+                    relatives.append([receiver, relationship_weight(len(txns))])
+                    self.graphUpdateEdge(sender, receiver)
+        self.populateWoiList()
+
+        # Highlight the nodes and edges of the paths
+        nodes = json.dumps(list({wallet for path in paths for hop in path for wallet in hop[:2]}))
+        hops = json.dumps([hop[:2] for path in paths for hop in path])
+        color = json.dumps(PATH_COLOR)
+        self.runGraphScript(f"nodes.update({nodes}.map(id => ({{id: id, color: {color}}})));"
+                            f"{hops}.forEach(([a, b]) => edges.update(edges.getIds({{filter: e => "
+                            f"(e.from == a && e.to == b) || (e.from == b && e.to == a)}})"
+                            f".map(id => ({{id: id, color: {color}, width: 4}}))));")
+
+        summary = "\n\n".join(" -> ".join([self.getNodeLabel(path[0][0])] +
+                                            [f"({len(txns)} txns) {self.getNodeLabel(receiver)}"
+                                             for _, receiver, txns in path]) for path in paths)
+        self.homeparent.displayMessage(f"[+] {len(paths)} path(s) found:\n\n{summary}")
+        self.homeparent.openTransactionWindow([txn for path in paths for hop in path for txn in hop[2]])
+
+    def timing(self):
+        """
+        Handler Function to display the timing spans aggregated over the session, and to switch timing on / off,
+        reset it or export the spans as a Chrome trace (chrome://tracing, Perfetto)
+        :return: None
+        """
+        msg = QMessageBox(self)
+        msg.setWindowTitle("Timing")
+        msg.setText(f"[TIMING SPANS] {'ON' if is_tracing() else 'OFF'}")
+        msg.setInformativeText(aggregates_report())
+        msg.setFont(QFont("Courier New", 9))
+        toggleBtn = msg.addButton("Stop Timing" if is_tracing() else "Start Timing", QMessageBox.ActionRole)
+        exportBtn = msg.addButton("Export Trace..", QMessageBox.ActionRole)
+        resetBtn = msg.addButton("Reset", QMessageBox.ResetRole)
+        msg.addButton(QMessageBox.Close)
+        msg.exec_()
+
+        if msg.clickedButton() == toggleBtn:
+            set_tracing(not is_tracing())
+        elif msg.clickedButton() == resetBtn:
+            reset()
+        elif msg.clickedButton() == exportBtn:
+            options = QFileDialog.Options()
+            options |= QFileDialog.DontUseNativeDialog
+            fileName, _ = QFileDialog.getSaveFileName(self, "Export Chrome Trace", "trace.json",
+                                                      "Chrome Trace (*.json)", options=options)
+            if fileName:
+                try:
+                    export_chrome_trace(fileName)
+                except OSError as err:
+                    self.homeparent.displayMessage(f"[-] Unable to export trace:\n{err}")
+
     def help(self):
         """
         Handler Function to display help message box
         :return: None
         """
-        self.homeparent.displayMessage("[OPEN ANOTHER CASE]\nCTRL+O\n\n[SAVE CURRENT CASE]\nCTRL+S\n\n[SHOW THIS TOOLTIP]\nCTRL+I\n\n[CLOSE DASHBOARD]\nCTRL+D")
+        self.homeparent.displayMessage("[OPEN ANOTHER CASE]\nCTRL+O\n\n[SAVE CURRENT CASE]\nCTRL+S\n\n[SYNC TRANSACTIONS]\nCTRL+R\n\n[CRAWL RELATIONSHIPS]\nCTRL+G\n\n[FIND PATH]\nCTRL+P\n\n[TIMING SPANS]\nCTRL+T\n\n[SHOW THIS TOOLTIP]\nCTRL+I\n\n[CLOSE DASHBOARD]\nCTRL+D")
 
     def closeDashboard(self):
         """
         Handler Function to close dashboard and go back to Home window
         :return: None
         """
+        self.autosaveTimer.stop()
         self.close()
         self.deleteLater()
 
 
 def main():
+    # The web engine is only imported once a Dashboard opens, it then needs OpenGL contexts shared from the start
+    QCoreApplication.setAttribute(Qt.AA_ShareOpenGLContexts)
+
     # Define the PyQT5 application object
     app = QApplication([])
+    mark("QApplication created")
 
     # Create the main window and show it
     home = HomeWindow()
+    mark("Home window created")
     home.show()
 
+    # Report once the event loop has drawn the Home window
+    QTimer.singleShot(0, lambda: (mark("Home window shown"), print_report()))
+
     # Start the PyQT5 app
     app.exec_()
 
@@ -22,12 +22,19 @@ OUT = 1
 TOTAL_TXNS = "all_txn"
 UNIQ_IN = "incoming_uniq_data"
 UNIQ_OUT = "outgoing_uniq_data"
+LAST_BLOCK = "last_block"
+COUNTERPARTIES = "counterparties"
 FROM = "from"
 TO = "to"
 
 # Case Data Structure template
 TEMPLATE = {"casename": str(), "casedescription": str(), "walletaddresses": list(), "walletrelationships": dict(), "data": {SANITIZED_DATA: dict(), STATS: dict()}, "aliases": dict(), "description": dict(), "filename": dict()}
 CASE_FILE_EXT = ".json"
+CASE_BINARY_EXT = ".dgfx"
+LABEL_STORE_EXT = ".db"
+JOURNAL_EXT = ".journal"
+# Milliseconds between two autosaves of the case edits into the journal (0 to disable)
+AUTOSAVE_MS = 5000
 
 # Node Profile Window Dimensions
 NPW_WIDTH = 500
@@ -112,6 +119,9 @@ TFEDIT_Y_OFFSET = 0.323
 # Dashboard - "Node" List ratios
 TLIST_HEIGHT = 0.58
 
+# Dashboard - Milliseconds without keystrokes before the "Transaction Filter" search runs
+SEARCH_DEBOUNCE_MS = 250
+
 # Dashboard - Relationship PushButton ratios
 RS_BTN_HEIGHT = 0.025
 RS_BTN_WIDTH = 0.08
@@ -121,6 +131,13 @@ RS_BTN_Y_OFFSET = 0.96
 # Relationship data structure
 ADDR = 0
 WEIGHT = 1
+# Counterparty aggregate record data structure (stats[COUNTERPARTIES][counterparty])
+IN_COUNT = 0
+OUT_COUNT = 1
+IN_VALUE = 2
+OUT_VALUE = 3
+FIRST_SEEN = 4
+LAST_SEEN = 5
 # Relationship weight thresholds
 LOWER_BOUND = 5
 MIDDLE_BOUND = 100
@@ -133,4 +150,5 @@ HIGH_WEIGHT = 3
 # PyVis Graph Node Defaults
 DEFAULT_COLORS = ['#3da831', '#9a31a8', '#3155a8', '#eb4034']
 DEFAULT_WEIGHT = 2
+PATH_COLOR = '#ffd700'
 ADDR_DISPLAY_LIMIT = 10
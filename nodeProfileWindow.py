@@ -81,7 +81,7 @@ class NodeProfileWindow(QMainWindow):
             self.homeparent.caseinfo["aliases"][self.focusnode] = new_alias
 
         # Signal to Home that changes have been made to update any necessary UI elements in the dashboard
-        self.homeparent.signalProfileUpdated()
+        self.homeparent.signalProfileUpdated(self.focusnode)
 
         # Close this node profile window
         self.close()
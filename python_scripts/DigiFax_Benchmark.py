@@ -0,0 +1,295 @@
+"""
+Description:
+> Reproducible benchmarks of the data layer (ingest -> summarise -> filter -> case save/load), without the network
+> or the GUI. Synthetic wallets are generated from a seed in the raw Etherscan txlist format, from SIZES txns and
+> with different counterparty distributions (DISTRIBUTIONS), then every stage of the pipeline is timed on them:
+>   get_addr_stats, sanitize_txns, split_txns_based_on_direction, update_statistics (DigiFax_EthScan),
+>   build_txn_table and the Transaction List grouping (TxnTable filter + count by counterparty, as run by
+>   Dashboard.group_transactions), save_case / load_case and reading the entries back, in both case file formats.
+> Results are written as JSON (one record per benchmark, distribution and size, with every run's time in seconds),
+> and compared against a previous results file to flag regressions.
+
+Usage:
+> python -m python_scripts.DigiFax_Benchmark [--sizes 10 1000 100000] [--distributions zipf] [--repeat 5]
+>                                            [-o results.json] [--compare baseline.json --threshold 0.2]
+"""
+import argparse
+import copy
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from constants import TEMPLATE, SANITIZED_DATA, STATS, INBOUND, OUTBOUND, ALL, CASE_FILE_EXT, CASE_BINARY_EXT
+from python_scripts.DigiFax_CaseFile import load_case, save_case
+from python_scripts.DigiFax_EthScan_multiproc import DigiFax_EthScan, console, print_info, print_impt, print_debug
+from python_scripts.DigiFax_HTTP import HTTPTransport
+from python_scripts.DigiFax_TxnTable import TxnTable
+
+# Format version of the results file
+RESULTS_VERSION = 1
+SEED = 2202
+SIZES = (10, 1000, 10000, 100000, 1000000)
+# Counterparty distributions of the synthetic wallets
+UNIFORM = "uniform"     # Counterparties drawn uniformly from a pool of a tenth of the txns
+ZIPF = "zipf"           # Same pool, a few counterparties (e.g. exchanges) take most of the txns
+UNIQUE = "unique"       # Every txn has a new counterparty (e.g. a faucet or an airdrop)
+DISTRIBUTIONS = (UNIFORM, ZIPF, UNIQUE)
+ZIPF_EXPONENT = 1.1
+CONTRACT_CREATION_RATE = 0.005
+REPEAT = 5
+# Relative slowdown of the median time flagged as a regression by --compare
+THRESHOLD = 0.2
+# Slowdowns smaller than this (seconds) are timer noise, never flagged
+MIN_REGRESSION = 0.001
+GENESIS_TIMESTAMP = 1438269973
+GENESIS_BLOCK = 46147
+
+
+def random_address(rng) -> str:
+    """This function returns a random wallet addr"""
+    return f"0x{rng.getrandbits(160):040x}"
+
+
+def counterparty_pool(rng, count, distribution) -> list:
+    """This function draws the counterparty of each of 'count' txns according to a distribution"""
+    if distribution == UNIQUE:
+        return [random_address(rng) for _ in range(count)]
+    pool = [random_address(rng) for _ in range(max(1, count // 10))]
+    if distribution == UNIFORM:
+        return rng.choices(pool, k=count)
+    if distribution == ZIPF:
+        weights = [1 / (rank + 1) ** ZIPF_EXPONENT for rank in range(len(pool))]
+        return rng.choices(pool, weights=weights, k=count)
+    raise ValueError(f"Unknown counterparty distribution '{distribution}'")
+
+
+def generate_txns(owner, count, distribution, seed=SEED) -> list:
+    """This function generates the raw txns of a synthetic wallet addr, as returned by DigiFax_EthScan.fetch_all_txns
+    (Etherscan txlist records in descending block order). The same arguments always generate the same txns"""
+    rng = random.Random(f"{seed}-{distribution}-{count}")
+    counterparties = counterparty_pool(rng, count, distribution)
+    timestamp, block = GENESIS_TIMESTAMP, GENESIS_BLOCK
+    txns = []
+    for index, counterparty in enumerate(counterparties):
+        # Several txns may share a block
+        if rng.random() < 0.7:
+            timestamp += rng.randint(1, 3600)
+            block += rng.randint(1, 240)
+        outgoing = rng.random() < 0.5
+        txn = {"blockNumber": str(block),
+               "timeStamp": str(timestamp),
+               "hash": f"0x{rng.getrandbits(256):064x}",
+               "transactionIndex": str(index % 200),
+               "from": owner if outgoing else counterparty,
+               "to": counterparty if outgoing else owner,
+               "value": str(rng.getrandbits(rng.randint(0, 70))),
+               "contractAddress": "",
+               "isError": "0"}
+        if outgoing and rng.random() < CONTRACT_CREATION_RATE:
+            txn["to"], txn["contractAddress"] = "", counterparty
+        txns.append(txn)
+    txns.reverse()
+    return txns
+
+
+def new_ethscan(transport) -> DigiFax_EthScan:
+    """This function returns a DigiFax_EthScan object without any fetched data, which never hits the network"""
+    return DigiFax_EthScan(transport=transport, workers=1)
+
+
+def new_case(owner, sanitized, stats) -> dict:
+    """This function returns a case holding the data of one wallet addr"""
+    caseinfo = copy.deepcopy(TEMPLATE)
+    caseinfo["casename"] = "benchmark"
+    caseinfo["walletaddresses"] = [owner]
+    caseinfo["data"] = {SANITIZED_DATA: {owner: sanitized}, STATS: {owner: stats}}
+    return caseinfo
+
+
+def measure(func, setup=None, repeat=REPEAT) -> list:
+    """This function times 'repeat' calls of func(state), state being returned by setup() before every call (untimed)
+    :return: List of the times (seconds) of every call"""
+    times = []
+    for _ in range(repeat):
+        state = setup() if setup else None
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            func(state)
+            times.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return times
+
+
+def bench_wallet(count, distribution, workdir, repeat=REPEAT, seed=SEED) -> list:
+    """This function runs every benchmark on one synthetic wallet addr
+    :return: List of (benchmark name, list of times) tuples"""
+    owner = f"0x{'b' * 40}"
+    transport = HTTPTransport()
+    raw = generate_txns(owner, count, distribution, seed)
+    results = []
+
+    def with_stats():
+        ethscan = new_ethscan(transport)
+        ethscan.get_addr_stats(owner, raw)
+        return ethscan
+
+    results.append(("get_addr_stats", measure(lambda ethscan: ethscan.get_addr_stats(owner, raw),
+                                              lambda: new_ethscan(transport), repeat)))
+    results.append(("sanitize_txns", measure(lambda ethscan: ethscan.sanitize_txns(owner, raw), with_stats, repeat)))
+    ethscan = with_stats()
+    txns = {owner: ethscan.sanitize_txns(owner, raw)}
+    stats = ethscan.ADDR_TXNS_STATS[owner]
+    del raw
+
+    def with_txns():
+        ethscan = new_ethscan(transport)
+        ethscan.ADDR_TXNS_STATS[owner] = copy.deepcopy(stats)
+        return ethscan
+
+    def with_split():
+        ethscan = with_txns()
+        ethscan.split_txns_based_on_direction(txns)
+        return ethscan
+
+    results.append(("split_txns_based_on_direction",
+                    measure(lambda ethscan: ethscan.split_txns_based_on_direction(txns), with_txns, repeat)))
+    results.append(("update_statistics", measure(lambda ethscan: ethscan.update_statistics(), with_split, repeat)))
+    ethscan = with_split()
+    ethscan.update_statistics()
+    sanitized, stats = ethscan.ADDR_TXNS_SUMMARISED[owner], ethscan.ADDR_TXNS_STATS[owner]
+
+    # Transaction List grouping, on the table the Dashboard keeps per WOI (its indexes are built by the first run)
+    all_txns = sanitized[INBOUND] + sanitized[OUTBOUND]
+    results.append(("build_txn_table", measure(lambda _: TxnTable.from_txns(owner, all_txns), None, repeat)))
+    table = ethscan.get_txn_table(owner)
+    timestamps = sorted(int(txn["timestamp"]) for txn in all_txns) or [GENESIS_TIMESTAMP]
+    middle = timestamps[len(timestamps) // 4], timestamps[len(timestamps) * 3 // 4]
+    for name, (trans_type, start, end, search_str) in (
+            ("group_transactions/all", (ALL, timestamps[0], timestamps[-1], "")),
+            ("group_transactions/incoming_range", (INBOUND, middle[0], middle[1], "")),
+            ("group_transactions/search", (ALL, timestamps[0], timestamps[-1], "0xa"))):
+        results.append((name, measure(lambda _: table.filter(trans_type, start, end, search_str).count_by_counterparty(),
+                                      None, repeat)))
+
+    # Case files, every save is given a fresh case so that nothing is copied over from the previous file
+    for extension in (CASE_FILE_EXT, CASE_BINARY_EXT):
+        path = os.path.join(workdir, f"benchmark{extension}")
+        fmt = extension.lstrip(".")
+        results.append((f"save_case/{fmt}", measure(lambda caseinfo: save_case(path, caseinfo),
+                                                   lambda: new_case(owner, sanitized, stats), repeat)))
+        results.append((f"load_case/{fmt}", measure(lambda _: load_case(path), None, repeat)))
+        results.append((f"read_case/{fmt}", measure(lambda _: [dict(section) for section in
+                                                               load_case(path)["data"].values()], None, repeat)))
+    transport.close()
+    return results
+
+
+def git_commit():
+    """This function returns the commit the repository is at, None if it is not a git checkout"""
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes=SIZES, distributions=DISTRIBUTIONS, repeat=REPEAT, seed=SEED) -> dict:
+    """This function runs the benchmarks on every size and distribution of synthetic wallet
+    :return: Results dictionary, as written to the results file"""
+    results = {"version": RESULTS_VERSION,
+               "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+               "commit": git_commit(),
+               "python": platform.python_version(),
+               "numpy": np.__version__,
+               "platform": platform.platform(),
+               "seed": seed,
+               "repeat": repeat,
+               "results": list()}
+    with tempfile.TemporaryDirectory(prefix="digifax-bench-") as workdir:
+        for distribution in distributions:
+            for count in sizes:
+                print_info(f"Benchmarking {count} txns, {distribution} counterparties")
+                # The pipeline's own progress messages are not part of what is measured
+                quiet, console.quiet = console.quiet, True
+                try:
+                    timings = bench_wallet(count, distribution, workdir, repeat, seed)
+                finally:
+                    console.quiet = quiet
+                for name, times in timings:
+                    results["results"].append({"benchmark": name, "distribution": distribution, "txns": count,
+                                               "min": min(times), "median": statistics.median(times),
+                                               "mean": statistics.mean(times), "times": times})
+                    print_debug(f"{name:<36}{statistics.median(times) * 1000:12.3f} ms (median)", 1)
+    return results
+
+
+def compare(results, baseline, threshold=THRESHOLD) -> list:
+    """This function lists the benchmarks whose median time grew by more than 'threshold' since a baseline run
+    :return: List of (result record, baseline record) tuples"""
+    previous = {(record["benchmark"], record["distribution"], record["txns"]): record
+                for record in baseline["results"]}
+    regressions = []
+    for record in results["results"]:
+        before = previous.get((record["benchmark"], record["distribution"], record["txns"]))
+        if before and record["median"] > before["median"] * (1 + threshold) and \
+                record["median"] - before["median"] > MIN_REGRESSION:
+            regressions.append((record, before))
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the DigiTrace data layer on synthetic wallets")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="Number of txns of the synthetic wallets")
+    parser.add_argument("--distributions", nargs="+", default=DISTRIBUTIONS, choices=DISTRIBUTIONS,
+                        help="Counterparty distributions of the synthetic wallets")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="Number of timed runs of every benchmark")
+    parser.add_argument("--seed", type=int, default=SEED, help="Seed of the synthetic wallets")
+    parser.add_argument("-o", "--output", default="benchmark.json", help="Results file (JSON, '-' for stdout)")
+    parser.add_argument("--compare", help="Results file of a previous run to check for regressions")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="Relative slowdown of the median time reported as a regression")
+    args = parser.parse_args(argv)
+    if args.repeat < 1 or any(size < 1 for size in args.sizes):
+        parser.error("--repeat and --sizes must be at least 1")
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+
+    # Progress messages would be mixed with the results written to stdout
+    console.quiet = args.output == "-"
+    results = run(args.sizes, args.distributions, args.repeat, args.seed)
+    if args.output == "-":
+        json.dump(results, sys.stdout, indent=1)
+        sys.stdout.write("\n")
+    else:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=1)
+        print_info(f"Results written to {args.output}")
+
+    if baseline is None:
+        return 0
+    regressions = compare(results, baseline, args.threshold)
+    for record, before in regressions:
+        print_impt(f"{record['benchmark']} ({record['txns']} txns, {record['distribution']}): "
+                   f"{before['median'] * 1000:.3f} ms -> {record['median'] * 1000:.3f} ms", 1)
+    if not regressions:
+        print_info(f"No regression against {args.compare} (threshold {args.threshold:.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,435 @@
+"""
+Description:
+> Streaming reader / writer for case files, so that multi-GB cases open without parsing all their transactions.
+> Case files are still plain JSON, laid out one line per section entry:
+>   {"casename": ..., "walletaddresses": [...], "walletrelationships": {...}, ...,
+>   "data": {"sanitized": {
+>   "0x...": {...},
+>   ...
+>   },
+>   "stats": {
+>   "0x...": {...}
+>   }}}
+> The first line (case metadata, wallet addresses and relationships) is parsed on open, the entry lines are only
+> indexed by byte offset and every entry is parsed from disk the first time it is accessed.
+> Case files written on a single line (before this layout) are still opened, by parsing them whole.
+>
+> Cases can also be saved in a versioned binary format (CASE_BINARY_EXT):
+>   header: MAGIC, version, offset / length of the offset table
+>   blocks: compressed metadata (every case key but "data"), one compressed block per address entry,
+>           compressed address dictionary (every address string of the case, referenced by index)
+>   offset table: compressed location of the metadata and address dictionary blocks, and of every entry block
+> Transaction lists are stored column by column (integers delta encoded, hashes as raw bytes, addresses as indexes
+> into the dictionary), entries that do not fit the columnar layout are stored as compressed JSON, so that cases
+> convert to and from the JSON format losslessly.
+"""
+import json
+import os
+import struct
+from operator import itemgetter
+import threading
+import zlib
+from array import array
+from contextlib import ExitStack
+from itertools import repeat
+from collections.abc import MutableMapping
+
+import numpy as np
+
+from constants import SANITIZED_DATA, STATS, CASE_BINARY_EXT
+
+# Sections of the case's "data" dictionary, in file order
+DATA_SECTIONS = (SANITIZED_DATA, STATS)
+
+# Binary case format
+MAGIC = b"DGFX"
+VERSION = 1
+FILE_HEADER = struct.Struct("<4sHHQQ")          # magic, version, reserved, offset table offset, offset table length
+BLOCK = struct.Struct("<QQ")                    # block offset, block length
+TABLE_ENTRY = struct.Struct("<BIQQ")            # data section index, address index, block offset, block length
+LENGTH = struct.Struct("<I")
+COMPRESSION_LEVEL = 1
+
+# Entry block kinds (first byte of every entry block)
+ENTRY_JSON = 0
+ENTRY_TXNS = 1
+
+# Column encodings of a transaction list entry
+COL_NONE = "N"          # Every value is None
+COL_INT_STR = "S"       # Decimal strings of 64 bit integers (e.g. timestamps, block numbers), delta encoded
+COL_INT = "I"           # 64 bit integers
+COL_FLOAT = "D"         # Floats
+COL_HASH = "H"          # '0x' prefixed lowercase 32 byte hashes
+COL_ADDR = "A"          # '0x' prefixed 42 character strings (addresses), as indexes into the address dictionary
+COL_JSON = "J"          # Anything else
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1
+PREFIX = itemgetter(slice(0, 2))
+
+
+class CaseSection(MutableMapping):
+    """
+    Class definition for a section of a case's "data" dictionary ({address: entry}) backed by the case file.
+    Entries still on disk are parsed (and kept) on first access, entries set or parsed are held in memory.
+    Addresses whose entry was set or deleted since the case file was written are kept in 'dirty'
+    """
+    def __init__(self, path, offsets, addresses=None, entries=None):
+        """
+        :param path: Case file holding the section
+        :param offsets: Dictionary of {address: (byte offset, byte length)} of the entries in the file
+        :param addresses: Address dictionary of a binary case file, None for a JSON case file
+        :param entries: Dictionary of the entries already held in memory
+        """
+        self.path = path
+        self.offsets = offsets
+        self.addresses = addresses
+        self.entries = entries if entries is not None else dict()
+        self.dirty = set()
+        # Held while reading the case file, and by save_case() while it replaces the file and rebinds the section,
+        # so that an entry is never read from the new file at its offset in the old one
+        self.lock = threading.RLock()
+
+    def __getitem__(self, addr):
+        if addr in self.entries:
+            return self.entries[addr]
+        with self.lock:
+            if addr not in self.entries:
+                self.entries[addr] = self.decode(addr)
+        return self.entries[addr]
+
+    def __setitem__(self, addr, entry):
+        self.entries[addr] = entry
+        self.dirty.add(addr)
+
+    def __delitem__(self, addr):
+        if addr not in self.entries and addr not in self.offsets:
+            raise KeyError(addr)
+        self.entries.pop(addr, None)
+        self.offsets.pop(addr, None)
+        self.dirty.add(addr)
+
+    def __contains__(self, addr):
+        return addr in self.entries or addr in self.offsets
+
+    def __iter__(self):
+        yield from list(self.offsets)
+        yield from [addr for addr in list(self.entries) if addr not in self.offsets]
+
+    def __len__(self):
+        return len(self.offsets) + len([addr for addr in self.entries if addr not in self.offsets])
+
+    def is_loaded(self, addr) -> bool:
+        """This function checks if the entry of a wallet addr is held in memory (not only on disk)"""
+        return addr in self.entries
+
+    def decode(self, addr):
+        """This function parses the entry of a wallet addr from the case file, without keeping it in memory"""
+        raw = self.read(addr)
+        return json.loads(raw) if self.addresses is None else decode_entry(raw, self.addresses)
+
+    def read(self, addr) -> bytes:
+        """This function reads the JSON text (or binary block) of a wallet addr's entry from the case file, without
+        parsing it"""
+        with self.lock:
+            if addr not in self.offsets:
+                raise KeyError(addr)
+            offset, length = self.offsets[addr]
+            with open(self.path, 'rb') as f:
+                f.seek(offset)
+                return f.read(length)
+
+    def release(self):
+        """This function drops the entries held in memory that are unchanged since the case file was written"""
+        with self.lock:
+            for addr in [addr for addr in self.entries if addr in self.offsets and addr not in self.dirty]:
+                del self.entries[addr]
+
+    def rebind(self, path, offsets, addresses=None):
+        """This function points the section at a newly written case file"""
+        with self.lock:
+            self.path = path
+            self.offsets = offsets
+            self.addresses = addresses
+
+
+def mark_dirty(data, addr):
+    """This function flags the entries of a wallet addr as changed in place (e.g. by a sync)"""
+    for section in data.values():
+        if isinstance(section, CaseSection) and addr in section:
+            section.dirty.add(addr)
+
+
+def replace_case(temp, path, caseinfo, offsets, addresses=None):
+    """This function moves a newly written case file into place and points the case's sections at it, holding every
+    section's lock so that no entry is read in between"""
+    with ExitStack() as stack:
+        for section in DATA_SECTIONS:
+            entries = caseinfo["data"].get(section)
+            if isinstance(entries, CaseSection):
+                stack.enter_context(entries.lock)
+        os.replace(temp, path)
+
+        # Entries still on disk are now read from the new file
+        bind_sections(caseinfo, path, offsets, addresses)
+
+
+def bind_sections(caseinfo, path, offsets, addresses=None):
+    """This function points the "data" sections of a case at the case file they were just written to (or read
+    from), turning plain dictionaries into CaseSection objects holding all their entries"""
+    for index, name in enumerate(DATA_SECTIONS):
+        entries = caseinfo["data"].get(name, dict())
+        if isinstance(entries, CaseSection):
+            entries.rebind(path, offsets[index], addresses)
+        else:
+            caseinfo["data"][name] = CaseSection(path, offsets[index], addresses, entries)
+
+
+def load_case(path) -> dict:
+    """This function opens a case file (JSON or binary), parsing its metadata and indexing (not parsing) its
+    per-address entries
+    :return: Case dictionary, whose "data" sections are CaseSection objects"""
+    with open(path, 'rb') as f:
+        is_binary = f.read(len(MAGIC)) == MAGIC
+    return load_binary_case(path) if is_binary else load_json_case(path)
+
+
+def save_case(path, caseinfo):
+    """This function saves a case, in the binary format if the path has the CASE_BINARY_EXT extension else in JSON"""
+    if path.endswith(CASE_BINARY_EXT):
+        save_binary_case(path, caseinfo)
+    else:
+        save_json_case(path, caseinfo)
+
+
+def convert_case(src, dst):
+    """This function converts a case file to the format of another path (e.g. JSON to binary, or back)"""
+    save_case(dst, load_case(src))
+
+
+def load_json_case(path) -> dict:
+    """This function opens a JSON case file, parsing its first line and indexing its entry lines
+    :return: Case dictionary, whose "data" sections are CaseSection objects"""
+    with open(path, 'rb') as f:
+        first = f.readline()
+        if not first.rstrip().endswith(b','):
+            # Single line case file, parsed whole
+            caseinfo = json.loads(first + f.read())
+            if isinstance(caseinfo, dict) and isinstance(caseinfo.get("data"), dict):
+                bind_sections(caseinfo, path, [dict() for _ in DATA_SECTIONS])
+            return caseinfo
+        caseinfo = json.loads(first.rstrip()[:-1] + b'}')
+
+        caseinfo["data"] = dict()
+        offset = len(first)
+        section = None
+        for line in f:
+            entry = line.rstrip(b',\r\n')
+            if line.startswith(b'"') and entry.endswith(b'{'):
+                # Section opening line, e.g. '"data": {"sanitized": {', named by its last key
+                name_end = entry.rindex(b'"') + 1
+                section = json.loads(entry[entry.rindex(b'"', 0, name_end - 1):name_end])
+                caseinfo["data"][section] = CaseSection(path, dict())
+            elif line.startswith(b'"') and section is not None:
+                # Entry line: '"<address>": <entry JSON>'
+                key_end = entry.index(b'": ') + 1
+                value_start = key_end + 2
+                caseinfo["data"][section].offsets[json.loads(entry[:key_end])] = (offset + value_start,
+                                                                                   len(entry) - value_start)
+            offset += len(line)
+    return caseinfo
+
+
+def save_json_case(path, caseinfo):
+    """This function writes a case to file one entry per line, copying entries that were never loaded straight from
+    the JSON file they were read from. The file is written aside and then replaced, so the case can be saved onto
+    itself"""
+    header = {key: value for key, value in caseinfo.items() if key != "data"}
+    offsets = [dict() for _ in DATA_SECTIONS]
+    temp = path + ".tmp"
+    with open(temp, 'wb') as f:
+        f.write(json.dumps(header)[:-1].encode() + b',\n')
+        f.write(b'"data": {')
+        for index, section in enumerate(DATA_SECTIONS):
+            entries = caseinfo["data"].get(section, dict())
+            f.write(b'' if index == 0 else b',\n')
+            f.write(json.dumps(section).encode() + b': {\n')
+            first = True
+            for addr in list(entries):
+                if isinstance(entries, CaseSection) and not entries.is_loaded(addr):
+                    value = entries.read(addr) if entries.addresses is None else json.dumps(entries.decode(addr)).encode()
+                else:
+                    value = json.dumps(entries[addr]).encode()
+                f.write(b'' if first else b',\n')
+                key = json.dumps(addr).encode() + b': '
+                offsets[index][addr] = (f.tell() + len(key), len(value))
+                f.write(key + value)
+                first = False
+            f.write(b'\n}')
+        f.write(b'}}\n')
+    replace_case(temp, path, caseinfo, offsets)
+
+
+def encode_column(values, addr_index):
+    """This function encodes one column of a transaction list
+    :param values: List of the values of the column
+    :param addr_index: Dictionary of {address: index} of the address dictionary, extended with new addresses
+    :return: Tuple of (column encoding, bytes)"""
+    types = set(map(type, values))
+    if types == {type(None)}:
+        return COL_NONE, b""
+    if types == {str}:
+        lengths = set(map(len, values))
+        if lengths == {42} and set(map(PREFIX, values)) == {"0x"}:
+            for value in dict.fromkeys(values).keys() - addr_index.keys():
+                addr_index[value] = len(addr_index)
+            return COL_ADDR, array("I", map(addr_index.__getitem__, values)).tobytes()
+        if lengths == {66} and set(map(PREFIX, values)) == {"0x"}:
+            # 'x' is not a hex digit, so only the prefixes are removed
+            hexstr = "".join(values).replace("0x", "")
+            if len(hexstr) == 64 * len(values) and hexstr.islower():
+                try:
+                    return COL_HASH, bytes.fromhex(hexstr)
+                except ValueError:
+                    pass
+        # Integers of up to 18 digits, whose deltas fit in 64 bits. Only plain decimal strings (no sign, spaces or
+        # leading zeros) are taken, so that they are decoded back unchanged
+        digits = "".join(values)
+        if 0 < min(lengths) and max(lengths) <= 18 and digits.isascii() and digits.isdigit() and \
+                all(value == "0" for value in values if value[0] == "0"):
+            return COL_INT_STR, np.diff(np.array(values, dtype=np.int64), prepend=0).tobytes()
+    if types == {int} and INT64_MIN <= min(values) and max(values) <= INT64_MAX:
+        return COL_INT, array("q", values).tobytes()
+    if types == {float}:
+        return COL_FLOAT, array("d", values).tobytes()
+    return COL_JSON, json.dumps(values).encode()
+
+
+def decode_column(encoding, raw, count, addresses) -> list:
+    """This function decodes one column of a transaction list, see encode_column()"""
+    if encoding == COL_NONE:
+        return [None] * count
+    if encoding == COL_ADDR:
+        return [addresses[index] for index in array("I", raw)]
+    if encoding == COL_HASH:
+        hexstr = raw.hex()
+        return ["0x" + hexstr[i:i + 64] for i in range(0, len(hexstr), 64)]
+    if encoding == COL_INT_STR:
+        return list(map(str, np.cumsum(np.frombuffer(raw, dtype=np.int64)).tolist()))
+    if encoding == COL_INT:
+        return array("q", raw).tolist()
+    if encoding == COL_FLOAT:
+        return array("d", raw).tolist()
+    return json.loads(raw)
+
+
+def encode_entry(entry, addr_index) -> bytes:
+    """This function encodes the entry of a wallet addr into a binary block. Entries made of lists of transactions
+    all sharing the same fields (sanitized data) are stored column by column, anything else as JSON"""
+    lists = list(entry.items()) if isinstance(entry, dict) else []
+    txns = [txn for _, txns in lists if type(txns) is list for txn in txns]
+    keys = list(txns[0]) if txns and type(txns[0]) is dict else None
+    if keys is None or not all(type(txns) is list for _, txns in lists) or set(map(type, txns)) != {dict} or \
+            set(map(tuple, txns)) != {tuple(keys)}:
+        return bytes([ENTRY_JSON]) + zlib.compress(json.dumps(entry).encode(), COMPRESSION_LEVEL)
+
+    columns = [encode_column(list(map(itemgetter(key), txns)), addr_index) for key in keys]
+    header = json.dumps({"lists": [[name, len(txns)] for name, txns in lists], "keys": keys,
+                         "columns": "".join(encoding for encoding, _ in columns)}).encode()
+    # Every chunk is compressed on its own, but for the hashes which do not compress
+    chunks = [zlib.compress(header, COMPRESSION_LEVEL)]
+    chunks += [raw if encoding == COL_HASH else zlib.compress(raw, COMPRESSION_LEVEL) for encoding, raw in columns]
+    return bytes([ENTRY_TXNS]) + b"".join(LENGTH.pack(len(chunk)) + chunk for chunk in chunks)
+
+
+def decode_entry(block, addresses):
+    """This function decodes the binary block of a wallet addr's entry, see encode_entry()"""
+    if block[0] == ENTRY_JSON:
+        return json.loads(zlib.decompress(block[1:]))
+
+    def chunk(pos):
+        length = LENGTH.unpack_from(block, pos)[0]
+        return block[pos + LENGTH.size:pos + LENGTH.size + length], pos + LENGTH.size + length
+
+    raw, pos = chunk(1)
+    header = json.loads(zlib.decompress(raw))
+    count = sum(length for _, length in header["lists"])
+    columns = []
+    for encoding in header["columns"]:
+        raw, pos = chunk(pos)
+        columns.append(decode_column(encoding, raw if encoding == COL_HASH else zlib.decompress(raw), count,
+                                     addresses))
+    txns = list(map(dict, map(zip, repeat(header["keys"]), zip(*columns))))
+
+    entry, start = dict(), 0
+    for name, length in header["lists"]:
+        entry[name] = txns[start:start + length]
+        start += length
+    return entry
+
+
+def read_block(f, offset, length) -> bytes:
+    """This function reads a block of a binary case file"""
+    f.seek(offset)
+    return f.read(length)
+
+
+def load_binary_case(path) -> dict:
+    """This function opens a binary case file, parsing its metadata and address dictionary and indexing its entries
+    :return: Case dictionary, whose "data" sections are CaseSection objects"""
+    with open(path, 'rb') as f:
+        magic, version, _, table_offset, table_length = FILE_HEADER.unpack(f.read(FILE_HEADER.size))
+        if magic != MAGIC:
+            raise ValueError("Not a binary case file")
+        if version > VERSION:
+            raise ValueError(f"Unsupported case file version {version}")
+        table = zlib.decompress(read_block(f, table_offset, table_length))
+        metadata = BLOCK.unpack_from(table, 0)
+        dictionary = BLOCK.unpack_from(table, BLOCK.size)
+        caseinfo = json.loads(zlib.decompress(read_block(f, *metadata)))
+        addresses = json.loads(zlib.decompress(read_block(f, *dictionary)))
+
+    caseinfo["data"] = {section: CaseSection(path, dict(), addresses) for section in DATA_SECTIONS}
+    for section, index, offset, length in TABLE_ENTRY.iter_unpack(table[2 * BLOCK.size:]):
+        caseinfo["data"][DATA_SECTIONS[section]].offsets[addresses[index]] = (offset, length)
+    return caseinfo
+
+
+def save_binary_case(path, caseinfo):
+    """This function writes a case to file in the binary format. Entries that were never loaded from a binary case
+    file are copied as is, the address dictionary they refer to being kept (and extended) for the new file"""
+    sections = [caseinfo["data"].get(section, dict()) for section in DATA_SECTIONS]
+    addresses = next((entries.addresses for entries in sections
+                      if isinstance(entries, CaseSection) and entries.addresses is not None), list())
+    addr_index = {addr: index for index, addr in enumerate(addresses)}
+    header = {key: value for key, value in caseinfo.items() if key != "data"}
+    offsets = [dict() for _ in DATA_SECTIONS]
+    table = list()
+
+    temp = path + ".tmp"
+    with open(temp, 'wb') as f:
+        f.write(FILE_HEADER.pack(MAGIC, VERSION, 0, 0, 0))
+
+        def write_block(block):
+            offset = f.tell()
+            f.write(block)
+            return offset, len(block)
+
+        metadata = write_block(zlib.compress(json.dumps(header).encode(), COMPRESSION_LEVEL))
+        for index, entries in enumerate(sections):
+            for addr in list(entries):
+                if isinstance(entries, CaseSection) and not entries.is_loaded(addr):
+                    block = entries.read(addr) if entries.addresses is addresses else \
+                        encode_entry(entries.decode(addr), addr_index)
+                else:
+                    block = encode_entry(entries[addr], addr_index)
+                offsets[index][addr] = write_block(block)
+                table.append(TABLE_ENTRY.pack(index, addr_index.setdefault(addr, len(addr_index)),
+                                              *offsets[index][addr]))
+
+        # Addresses added while encoding are appended, so that the indexes of the copied blocks stay valid
+        addresses.extend(list(addr_index)[len(addresses):])
+        dictionary = write_block(zlib.compress(json.dumps(addresses).encode(), COMPRESSION_LEVEL))
+        table_offset, table_length = write_block(zlib.compress(BLOCK.pack(*metadata) + BLOCK.pack(*dictionary) +
+                                                               b"".join(table), COMPRESSION_LEVEL))
+        f.seek(0)
+        f.write(FILE_HEADER.pack(MAGIC, VERSION, 0, table_offset, table_length))
+    replace_case(temp, path, caseinfo, offsets, addresses)
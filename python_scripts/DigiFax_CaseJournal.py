@@ -0,0 +1,187 @@
+"""
+Description:
+> Append-only journal of the edits made to a case since its file (the snapshot) was last written.
+> Saving only appends the changes to the case metadata (aliases, descriptions, wallet addresses, relationships) made
+> since the previous save, as one JSON line of operations, so that saving costs O(change) instead of a full rewrite.
+> Changes to the per-address data and long journals are folded into a new snapshot by a background compaction, and
+> opening a case replays its journal on top of the snapshot (operations are idempotent, a torn last line is cut off).
+"""
+import copy
+import json
+import os
+import threading
+from contextlib import nullcontext
+
+from constants import SANITIZED_DATA, STATS
+from python_scripts.DigiFax_CaseFile import CaseSection, save_case
+
+# Journal size (bytes) past which the next save compacts it into the snapshot
+COMPACT_SIZE = 1024 * 1024
+
+# Journal operations
+OP_SET = "set"          # Set a key of the case (path [key]) or of one of its dictionaries (path [key, subkey])
+OP_DEL = "del"          # Delete a key of one of the case's dictionaries
+OP_ADD = "add"          # Append a value to one of the case's lists if missing
+OP_REMOVE = "remove"    # Remove a value from one of the case's lists if present
+
+
+def case_header(caseinfo) -> dict:
+    """This function returns a deep copy of the case without its per-address data"""
+    return copy.deepcopy({key: value for key, value in caseinfo.items() if key != "data"})
+
+
+def diff_case(old, new) -> list:
+    """This function lists the journal operations turning one case header into another"""
+    ops = []
+    for key, value in new.items():
+        if key == "data":
+            continue
+        before = old.get(key)
+        if isinstance(value, dict) and isinstance(before, dict):
+            ops += [{"op": OP_SET, "path": [key, subkey], "value": subvalue} for subkey, subvalue in value.items()
+                    if subkey not in before or before[subkey] != subvalue]
+            ops += [{"op": OP_DEL, "path": [key, subkey]} for subkey in before if subkey not in value]
+        elif isinstance(value, list) and isinstance(before, list) and \
+                all(isinstance(item, str) for item in value + before):
+            current, previous = set(value), set(before)
+            ops += [{"op": OP_ADD, "path": [key], "value": item} for item in value if item not in previous]
+            ops += [{"op": OP_REMOVE, "path": [key], "value": item} for item in before if item not in current]
+        elif value != before:
+            ops.append({"op": OP_SET, "path": [key], "value": value})
+    return ops
+
+
+def apply_ops(caseinfo, ops):
+    """This function applies journal operations to a case"""
+    for op in ops:
+        path = op["path"]
+        if op["op"] == OP_SET:
+            target = caseinfo if len(path) == 1 else caseinfo.setdefault(path[0], dict())
+            target[path[-1]] = op["value"]
+        elif op["op"] == OP_DEL:
+            caseinfo.get(path[0], dict()).pop(path[1], None)
+        elif op["op"] == OP_ADD:
+            if op["value"] not in caseinfo.setdefault(path[0], list()):
+                caseinfo[path[0]].append(op["value"])
+        elif op["op"] == OP_REMOVE:
+            if op["value"] in caseinfo.get(path[0], list()):
+                caseinfo[path[0]].remove(op["value"])
+
+
+def data_changed(caseinfo) -> bool:
+    """This function checks if per-address data was added or changed since the case's snapshot was written"""
+    return any(not isinstance(section, CaseSection) or section.dirty
+               for name, section in caseinfo["data"].items() if name in (SANITIZED_DATA, STATS))
+
+
+class CaseJournal:
+    """
+    Class definition for the journal of a case file, kept next to it.
+    Appends are serialised by a lock, since compactions run in a background thread
+    """
+    def __init__(self, path):
+        """
+        :param path: Journal file
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.compacting = threading.Lock()
+        # Case header as last written (snapshot + journal), edits are diffed against it
+        self.persisted = dict()
+
+    def size(self) -> int:
+        """This function returns the size (bytes) of the journal file"""
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def replay(self, caseinfo) -> int:
+        """This function applies the journal to a case freshly opened from its snapshot
+        :return: Number of operations replayed"""
+        count = 0
+        if os.path.exists(self.path):
+            with open(self.path, 'r+b') as f:
+                valid = 0
+                for line in f:
+                    try:
+                        # Lines are written with their newline, a line without it is torn even if it parses
+                        ops = json.loads(line)["ops"] if line.endswith(b"\n") else None
+                    except (ValueError, KeyError):
+                        ops = None
+                    if ops is None:
+                        # Torn write, nothing valid can follow it. It is cut off, else the next edits appended after
+                        # it would be lost with it
+                        f.truncate(valid)
+                        break
+                    apply_ops(caseinfo, ops)
+                    count += len(ops)
+                    valid += len(line)
+        self.persisted = case_header(caseinfo)
+        return count
+
+    def record(self, caseinfo) -> int:
+        """This function appends the edits made to a case since the last save to the journal
+        :return: Number of operations appended"""
+        with self.lock:
+            header = case_header(caseinfo)
+            ops = diff_case(self.persisted, header)
+            if ops:
+                with open(self.path, 'ab') as f:
+                    f.write(json.dumps({"ops": ops}).encode() + b"\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                self.persisted = header
+        return len(ops)
+
+    def reset(self, caseinfo):
+        """This function empties the journal, once a full snapshot of the case has been written"""
+        with self.lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self.persisted = case_header(caseinfo)
+            for section in caseinfo["data"].values():
+                if isinstance(section, CaseSection):
+                    section.dirty = set()
+
+    def needs_compaction(self, caseinfo) -> bool:
+        """This function checks if the per-address data changed or the journal grew past COMPACT_SIZE"""
+        return data_changed(caseinfo) or self.size() > COMPACT_SIZE
+
+    def take_snapshot(self, caseinfo):
+        """This function takes what the next compaction writes, on the thread editing the case: a copy of the case
+        header, the journal size it covers and the dirty sets of the per-address data (entries changed from now on stay
+        dirty for the compaction after). Returns None while another compaction is running, else pass it on to compact()"""
+        if not self.compacting.acquire(blocking=False):
+            return None
+        with self.lock:
+            header = case_header(caseinfo)
+            journaled = self.size()
+            dirty = dict()
+            for name, section in caseinfo["data"].items():
+                if isinstance(section, CaseSection):
+                    dirty[name], section.dirty = section.dirty, set()
+        return header, journaled, dirty
+
+    def compact(self, casefile, caseinfo, snapshot, data_lock=None):
+        """This function rewrites the snapshot of a case and drops the journal lines it now holds (e.g. in a background
+        thread). Edits journaled since the snapshot was taken are kept
+        :param snapshot: Snapshot returned by take_snapshot()
+        :param data_lock: Lock held by whoever changes the case's per-address data in place, held while it is written"""
+        header, journaled, dirty = snapshot
+        try:
+            header["data"] = caseinfo["data"]
+            with data_lock if data_lock is not None else nullcontext():
+                save_case(casefile, header)
+            with self.lock:
+                if os.path.exists(self.path):
+                    with open(self.path, 'rb') as f:
+                        f.seek(journaled)
+                        tail = f.read()
+                    with open(self.path + ".tmp", 'wb') as f:
+                        f.write(tail)
+                    os.replace(self.path + ".tmp", self.path)
+        except BaseException:
+            # The snapshot may not hold the changed entries, they stay dirty for the next compaction
+            for name, addrs in dirty.items():
+                caseinfo["data"][name].dirty |= addrs
+            raise
+        finally:
+            self.compacting.release()
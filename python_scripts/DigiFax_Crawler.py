@@ -0,0 +1,133 @@
+"""
+Description:
+> Multi-hop breadth-first crawler expanding a case N hops out from its seed wallet addresses.
+> Every hop fetches its whole frontier as one batch on the DigiFax_EthScan fetch engine (bounded, rate limited
+> concurrency), then follows the per-counterparty aggregate records of the fetched addresses to build the next
+> frontier, so the crawl never rescans transactions.
+> Only the aggregate records of a hop are kept while it is expanded: the crawled addresses are added to the case as
+> wallet addresses and relationships, their transactions are fetched again once they are displayed.
+"""
+import time
+
+from constants import SANITIZED_DATA, STATS, INBOUND, OUTBOUND, COUNTERPARTIES, IN_COUNT, OUT_COUNT, IN_VALUE, \
+    OUT_VALUE, LOWER_BOUND, MIDDLE_BOUND, LOW_WEIGHT, MEDIUM_WEIGHT, HIGH_WEIGHT
+from python_scripts.DigiFax_EthScan_multiproc import print_info, print_debug
+from python_scripts.DigiFax_TxnTable import TxnTable
+
+# Number of hops expanded out from the seed addresses
+DEFAULT_HOPS = 2
+# Maximum number of new addresses added to the frontier at every hop (the most active counterparties are kept)
+FRONTIER_LIMIT = 100
+# Minimum number of transactions with a counterparty for it to be followed
+MIN_TXNS = 2
+# Minimum total value (in ether, both directions) exchanged with a counterparty for it to be followed
+MIN_VALUE = 0
+# Addresses with more counterparties than this are treated as hubs (e.g. exchanges) and are not expanded
+MAX_COUNTERPARTIES = 5000
+
+# Keys of the crawl result, mirroring the case file
+WALLETS = "walletaddresses"
+RELATIONSHIPS = "walletrelationships"
+
+
+def relationship_weight(txn_count) -> int:
+    """This function maps the number of txns between two wallet addrs to the weight of their relationship"""
+    if txn_count < LOWER_BOUND:
+        return LOW_WEIGHT
+    elif txn_count <= MIDDLE_BOUND:
+        return MEDIUM_WEIGHT
+    else:
+        return HIGH_WEIGHT
+
+
+def get_counterparties(addr, computed, data):
+    """This function returns the per-counterparty aggregate records of a wallet addr, taken from the 'computed'
+    dictionary ({addr: aggregate records}, e.g. of the fetched addrs) or else from the case data (None if neither
+    holds the addr). Records computed for case files saved before the aggregates were kept go into 'computed', never
+    into the case data, which other threads read and write"""
+    if addr in computed:
+        return computed[addr]
+    stats = data[STATS].get(addr)
+    if stats is None:
+        return None
+    if COUNTERPARTIES not in stats:
+        sanitized = data[SANITIZED_DATA][addr]
+        computed[addr] = TxnTable.from_txns(addr, sanitized[INBOUND] + sanitized[OUTBOUND],
+                                            index=False).aggregate_by_counterparty()
+        return computed[addr]
+    return stats[COUNTERPARTIES]
+
+
+class DigiFax_Crawler:
+    """
+    Class definition for the breadth-first crawler, fetching through a DigiFax_EthScan object (best a throwaway one,
+    see DigiFax_EthScan.get_counterparty_aggregates)
+    """
+    def __init__(self, ethscan, hops=DEFAULT_HOPS, frontier_limit=FRONTIER_LIMIT, min_txns=MIN_TXNS,
+                 min_value=MIN_VALUE, max_counterparties=MAX_COUNTERPARTIES):
+        self.ethscan = ethscan
+        self.hops = hops
+        self.frontier_limit = frontier_limit
+        self.min_txns = min_txns
+        self.min_value = min_value
+        self.max_counterparties = max_counterparties
+
+    def follows(self, record) -> bool:
+        """This function checks if a counterparty aggregate record passes the crawl filters"""
+        return (record[IN_COUNT] + record[OUT_COUNT] >= self.min_txns and
+                record[IN_VALUE] + record[OUT_VALUE] >= self.min_value)
+
+    def crawl(self, seeds, data=None, progress=None) -> dict:
+        """This function crawls self.hops hops out from the seed wallet addrs
+        :param seeds: List of seed wallet addresses
+        :param data: Case data dictionary (SANITIZED_DATA and STATS), addresses it already holds are not fetched again
+                     (read only)
+        :param progress: Optional ProgressChannel receiving the progress of every hop's batch
+        :return: Dictionary with the list of every addr reached (WALLETS) and the relationships found
+                 ({addr: [[counterparty, weight], ...]}, RELATIONSHIPS)"""
+        start = time.time()
+        data = data if data is not None else {SANITIZED_DATA: dict(), STATS: dict()}
+        result = {WALLETS: list(), RELATIONSHIPS: dict()}
+
+        frontier = list(dict.fromkeys(seed.lower() for seed in seeds))
+        visited = set(frontier)
+        result[WALLETS].extend(frontier)
+
+        for hop in range(self.hops):
+            if not frontier:
+                break
+            print_info(f"Crawling hop {hop + 1}/{self.hops}: {len(frontier)} addresses")
+
+            # Aggregate the frontier addresses not held by the case yet, as a single concurrent batch. The next
+            # frontier only holds addresses not visited yet, so the records are dropped once the hop is expanded
+            pending = [addr for addr in frontier if addr not in data[STATS]]
+            computed = self.ethscan.get_counterparty_aggregates(pending, progress=progress)
+
+            # Collect the counterparties passing the filters, and how active each new one is
+            followed = dict()
+            candidates = dict()
+            for addr in frontier:
+                counterparties = get_counterparties(addr, computed, data)
+                if counterparties is None or len(counterparties) > self.max_counterparties:
+                    continue
+                followed[addr] = [(counterparty, record) for counterparty, record in counterparties.items()
+                                  if counterparty and counterparty != addr and self.follows(record)]
+                for counterparty, record in followed[addr]:
+                    if counterparty not in visited:
+                        candidates[counterparty] = candidates.get(counterparty, 0) + record[IN_COUNT] + record[OUT_COUNT]
+
+            # Keep the most active new counterparties as the next frontier
+            frontier = sorted(candidates, key=candidates.get, reverse=True)[:self.frontier_limit]
+            visited.update(frontier)
+            result[WALLETS].extend(frontier)
+
+            # Only relationships between addresses kept in the crawl are recorded
+            for addr, pairs in followed.items():
+                relatives = [[counterparty, relationship_weight(record[IN_COUNT] + record[OUT_COUNT])]
+                             for counterparty, record in pairs if counterparty in visited]
+                if relatives:
+                    result[RELATIONSHIPS][addr] = relatives
+
+        print_debug(f"{time.time() - start}s taken to crawl [underline]{len(result[WALLETS])}[/] addresses")
+
+        return result
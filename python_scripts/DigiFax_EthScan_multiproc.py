@@ -3,14 +3,21 @@ References:
 https://github.com/pcko1/etherscan-python
 https://etherscan.io/txs?a=0xddbd2b932c763ba5b1b7ae3b362eac3e8d40121a
 """
+import asyncio
 import json
+import os
+from contextlib import nullcontext
 
-from etherscan import Etherscan
 # from secrets import API_KEY
 from bs4 import BeautifulSoup
-from urllib.request import Request, urlopen  # Python 3
-import socket
-from multiprocessing import Process, Manager
+import requests
+
+from constants import SANITIZED_DATA, STATS, INBOUND, OUTBOUND, UNIQ_IN, UNIQ_OUT, LAST_BLOCK, COUNTERPARTIES, \
+    IN_COUNT, OUT_COUNT, IN_VALUE, OUT_VALUE, FIRST_SEEN, LAST_SEEN
+from python_scripts.DigiFax_FetchEngine import FetchEngine, DEFAULT_WORKERS, DEFAULT_RATE
+from python_scripts.DigiFax_Replay import new_transport
+from python_scripts.DigiFax_Timing import span, traced
+from python_scripts.DigiFax_TxnTable import AddressBook, TxnTable
 
 import sys
 import time
@@ -52,7 +59,26 @@ def print_debug(message, tabs=0):
     console.print(message, style="bold yellow")
 
 
-ETHERSCAN_SITE = "https://etherscan.io/address/"
+# Base urls, can be pointed at a local stand-in (see DigiFax_Replay)
+ETHERSCAN_SITE = os.environ.get("DIGIFAX_ETHERSCAN_SITE", "https://etherscan.io/address/")
+ETHERSCAN_API = os.environ.get("DIGIFAX_ETHERSCAN_API", "https://api.etherscan.io/api")
+API_TIMEOUT = 10
+API_RETRIES = 5
+RATE_LIMIT_MSG = "Max rate limit reached"
+NO_TXNS_MSG = "No transactions found"
+MAX_RESULTS = 10000         # Etherscan returns at most 10,000 records for any single block range
+WINDOW_SPLIT = 4            # Number of concurrently fetched block windows a capped block range is split into
+LATEST_BLOCK = 9999999999
+LABEL_TTL = 7 * 24 * 60 * 60     # Seconds before a cached label is looked up again
+LABEL_WORKERS = 8                # Maximum number of concurrent label lookups
+LABEL_RATE = 10                  # Maximum number of label lookups started per second
+LABEL_TIMEOUT = 2
+LABEL_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.11 (KHTML, like Gecko) Chrome/23.0.1271.64 Safari/537.11',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Charset': 'ISO-8859-1,utf-8;q=0.7,*;q=0.3',
+    'Accept-Language': 'en-US,en;q=0.8',
+    'Connection': 'keep-alive'}
 WEI = 0.000000000000000001  # 10e-19
 SPACERS = "=" * 50
 INCOMING_FLAG = 0
@@ -61,12 +87,25 @@ BOTH_FLAG = 69
 EXPORT_DATA_KEYWORD = "ADDR"
 
 
+def parse_api_response(response):
+    """Returns the 'result' field of an Etherscan API response, asserting on a failed status (like etherscan-python)"""
+    content = response.json()
+    result = content["result"]
+    if "status" in content.keys():
+        assert bool(int(content["status"])), f"{result} -- {content['message']}"
+    return result
+
+
 class DigiFax_EthScan:
-    def __init__(self):
+    def __init__(self, label_cache=None, transport=None, workers=DEFAULT_WORKERS, rate=DEFAULT_RATE,
+                 api_url=ETHERSCAN_API, site_url=ETHERSCAN_SITE, limiter=None):
 
         # Consist of all labels for addresses
         self.ADDR_LABELS = {}
 
+        # Optional persistent label cache (e.g. a LabelStore) that outlives this object
+        self.label_cache = label_cache
+
         # Consist of all transactions for all input addresses
         self.ADDR_TXNS = {}
 
@@ -76,11 +115,28 @@ class DigiFax_EthScan:
         # Consist of all input address transaction statistics
         self.ADDR_TXNS_STATS = {}
 
-        self.EtherScanObj = Etherscan(API_KEY)  # key in quotation marks
+        # Consist of columnar transaction tables for all input addresses, sharing one address interning table
+        self.ADDRESS_BOOK = AddressBook()
+        self.ADDR_TXNS_TABLES = {}
+
+        # Etherscan API endpoint and address page base url
+        self.api_url = api_url
+        self.site_url = site_url
+
+        # Pooled keep-alive HTTP transport shared by the API calls and the label scraping (recording if DIGIFAX_RECORD
+        # is set)
+        self.transport = transport if transport else new_transport()
+
+        # Asyncio fetch engine (bounded worker pool + one shared HTTP session) used by get_ext_txns, its API rate limit
+        # can be shared with another DigiFax_EthScan object through 'limiter'
+        self.engine = FetchEngine(workers=workers, rate=rate, session=self.transport, limiter=limiter)
+
+        # Separate engine for scraping labels off etherscan's site, which is not bound by the API quota
+        self.label_engine = FetchEngine(workers=LABEL_WORKERS, rate=LABEL_RATE, session=self.transport)
 
     def get_addr_balance(self, target_addr) -> int:
         """Returns the balance of a particular address in Ether"""
-        return int(self.EtherScanObj.get_eth_balance(target_addr)) * WEI
+        return int(self.query_api(module="account", action="balance", address=target_addr, tag="latest")) * WEI
 
     def export_data(self) -> dict:
         print_impt("Exporting data..")
@@ -96,31 +152,23 @@ class DigiFax_EthScan:
 
         return all_data
 
-    def get_addr_labels(self, target_addr):
-        """This function returns the labels of a particular eth address based on etherscans page, returns a list"""
-
-        if target_addr in self.ADDR_LABELS:
-            return self.ADDR_LABELS[target_addr]
-
-        req = Request(ETHERSCAN_SITE + target_addr)
-
-        req.add_header('User-Agent',
-                       'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.11 (KHTML, like Gecko) Chrome/23.0.1271.64 Safari/537.11')
-        req.add_header('Accept', 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8')
-        req.add_header('Accept-Charset', 'ISO-8859-1,utf-8;q=0.7,*;q=0.3')
-        req.add_header('Accept-Encoding', 'none')
-        req.add_header('Accept-Language', 'en-US,en;q=0.8')
-        req.add_header('Connection', 'keep-alive')
-
+    def fetch_addr_labels(self, target_addr):
+        """This function scrapes the labels of a particular eth address off etherscans page
+        Returns a tuple of (success, labels), labels is a list or None"""
         try:
-            content = urlopen(url=req, timeout=2).read()
-        except socket.timeout:
-            content = ""
-            print_debug(f"Timeout for {target_addr}")
-
-        soup = BeautifulSoup(content, "html.parser")
-        res = soup.find_all('a', {'class': 'mb-1'})
-        filtered_res = [elem.get_text() for elem in res]
+            with span("labels.request", "network"):
+                response = self.transport.get(self.site_url + target_addr, headers=LABEL_HEADERS,
+                                              timeout=LABEL_TIMEOUT)
+                response.raise_for_status()
+                content = response.content
+        except requests.RequestException as err:
+            print_debug(f"Unable to retrieve labels for {target_addr}: {err}")
+            return False, None
+
+        with span("labels.parse", "decode", size=len(content)):
+            soup = BeautifulSoup(content, "html.parser")
+            res = soup.find_all('a', {'class': 'mb-1'})
+            filtered_res = [elem.get_text() for elem in res]
 
         if not filtered_res:
             filtered_res = None
@@ -130,17 +178,73 @@ class DigiFax_EthScan:
             except ValueError:
                 pass
 
-        self.ADDR_LABELS[target_addr] = filtered_res
+        return True, filtered_res
+
+    def get_cached_labels(self, target_addr):
+        """This function looks up the labels of an address in memory, then in the persistent label cache
+        Returns a tuple of (found, labels)"""
+        if target_addr in self.ADDR_LABELS:
+            return True, self.ADDR_LABELS[target_addr]
+
+        if self.label_cache is not None:
+            found, labels = self.label_cache.get_labels(target_addr, max_age=LABEL_TTL)
+            if found:
+                self.ADDR_LABELS[target_addr] = labels
+                return True, labels
 
-        return filtered_res
+        return False, None
 
+    def get_addr_labels(self, target_addr):
+        """This function returns the labels of a particular eth address based on etherscans page, returns a list"""
+        found, labels = self.get_cached_labels(target_addr)
+        if found:
+            return labels
+
+        success, labels = self.fetch_addr_labels(target_addr)
+
+        # Lookups that failed (e.g. timed out) are not cached so that they are retried next time
+        if success:
+            self.ADDR_LABELS[target_addr] = labels
+            if self.label_cache is not None:
+                self.label_cache.set_labels_many({target_addr: labels})
+
+        return labels
+
+    def get_addrs_labels(self, list_of_addr) -> dict:
+        """This function returns the labels of a batch of eth addresses as a dictionary of {addr: labels}
+        Duplicate addresses are looked up once, uncached addresses are scraped concurrently"""
+        res = {}
+        pending = []
+
+        for addr in dict.fromkeys(list_of_addr):
+            found, labels = self.get_cached_labels(addr)
+            if found:
+                res[addr] = labels
+            else:
+                pending.append(addr)
+
+        async def job(engine, addr):
+            return await engine.call(self.fetch_addr_labels, addr)
+
+        fetched = {}
+        for addr, (success, labels) in self.label_engine.run(pending, job).items():
+            res[addr] = labels
+            if success:
+                self.ADDR_LABELS[addr] = labels
+                fetched[addr] = labels
+
+        if self.label_cache is not None and fetched:
+            self.label_cache.set_labels_many(fetched)
 
+        return res
+
+    @traced("get_addr_stats", "compute")
     def get_addr_stats(self, target_addr, list_full_txns):
         """This function allows you to get the statistics of txns of a wallet addr"""
 
         if target_addr in self.ADDR_TXNS_STATS:
-            # * is used to unpack the values so it becomes a list
-            return [*self.ADDR_TXNS_STATS[target_addr].values()]
+            stats = self.ADDR_TXNS_STATS[target_addr]
+            return [stats["all_txn"], stats["incoming_txn"], stats["outgoing_txn"], stats["contract_txn"]]
 
         if not list_full_txns:
             len_all_txn = 0
@@ -169,30 +273,118 @@ class DigiFax_EthScan:
 
         return [len_all_txn, len_incoming_txn, len_outgoing_txn, len_contract_creation_txn]
 
-    def get_addr_txns(self, target_addr, progress_txn, progress_all_txn, return_txn, return_stat, direction=BOTH_FLAG) -> None:
-        EtherScanObj = Etherscan(API_KEY)
+    def query_api(self, **params):
+        """This function sends one request to the Etherscan API over the shared transport, retrying when rate limited"""
+        params["apikey"] = API_KEY
 
-        dict_indiv_txn = {}
+        for attempt in range(API_RETRIES):
+            with span("api.request", "network", action=params.get("action")):
+                response = self.transport.get(self.api_url, params=params, timeout=API_TIMEOUT)
+                response.raise_for_status()
+            try:
+                with span("api.decode", "decode", size=len(response.content)):
+                    return parse_api_response(response)
+            except AssertionError as err:
+                if RATE_LIMIT_MSG not in str(err) or attempt == API_RETRIES - 1:
+                    raise
+                print_debug(f"Rate limited, retrying {params.get('address', '')}")
+                time.sleep(attempt + 1)
+
+    def get_latest_block(self) -> int:
+        """This function returns the current block number of the chain"""
+        return int(self.query_api(module="proxy", action="eth_blockNumber"), 16)
+
+    def fetch_txns_window(self, target_addr, startblock, endblock) -> list:
+        """This function returns up to MAX_RESULTS raw txns of a wallet addr within a block window, in ascending order
+        (blocking, runs on the engine's worker pool)"""
+        try:
+            return self.query_api(module="account", action="txlist", address=target_addr, startblock=startblock,
+                                  endblock=endblock, page=1, offset=MAX_RESULTS, sort="asc")
+        except AssertionError as err:
+            if NO_TXNS_MSG in str(err):
+                return []
+            raise
+
+    async def fetch_txns_windows(self, engine, target_addr, startblock, endblock, progress=None, fetched=None) -> list:
+        """This function fetches a block window, splitting whatever the MAX_RESULTS cap left out into smaller windows
+        that are fetched concurrently. Pages may overlap on their boundary block.
+        Every page is reported to 'progress' as the running number of rows in 'fetched' (a one element list)"""
+        rows = await engine.call(self.fetch_txns_window, target_addr, startblock, endblock)
+
+        if progress:
+            fetched[0] += len(rows)
+            progress.publish(target_addr, fetched[0])
+
+        if len(rows) < MAX_RESULTS:
+            return rows
+
+        # Every block before the last returned block is complete, the last block itself may have been cut off
+        last_block = int(rows[-1]['blockNumber'])
+        if last_block <= startblock:
+            print_impt(f"Block {startblock} of {target_addr} holds more than {MAX_RESULTS} transactions, results are truncated")
+            return rows
+
+        if endblock == LATEST_BLOCK:
+            # Clamp to the chain head so that the capped range is split into evenly filled windows. The head is only
+            # asked for here, so that the requests of uncapped ranges do not change with it (see DigiFax_Replay)
+            endblock = await engine.call(self.get_latest_block)
+
+        step = -(-(endblock - last_block + 1) // WINDOW_SPLIT)
+        windows = [(lo, min(lo + step - 1, endblock)) for lo in range(last_block, endblock + 1, step)]
+        pages = await asyncio.gather(*[self.fetch_txns_windows(engine, target_addr, lo, hi, progress, fetched)
+                                       for lo, hi in windows])
+
+        for page in pages:
+            rows.extend(page)
+
+        return rows
+
+    async def fetch_all_txns(self, engine, target_addr, startblock=0, endblock=LATEST_BLOCK, progress=None) -> list:
+        """This function returns every raw normal txn of a wallet addr in descending order, paginating past the
+        MAX_RESULTS cap by block windows and removing duplicates by hash"""
+        pages = await self.fetch_txns_windows(engine, target_addr, startblock, endblock, progress, [0])
+
+        list_full_txns = []
+        seen_hashes = set()
+        for txn in pages:
+            if txn['hash'] not in seen_hashes:
+                seen_hashes.add(txn['hash'])
+                list_full_txns.append(txn)
+
+        list_full_txns.sort(key=lambda txn: (int(txn['blockNumber']), int(txn.get('transactionIndex', 0))), reverse=True)
+
+        return list_full_txns
+
+    def sanitize_txn(self, target_addr, txn) -> dict:
+        """This function converts one raw txn of a wallet addr into the sanitized format"""
+        dict_indiv_txn = {
+            'timestamp': txn['timeStamp'],
+            'blockNumber': txn['blockNumber'],
+            'hash': txn['hash'],
+            'from': txn['from'],
+            'from_labels': None,
+            'to': txn['to'],
+            'to_labels': None,
+            'value': int(txn['value']) * WEI,
+            'value_wei': txn['value']}
+
+        if txn['from'] == target_addr:
+            dict_indiv_txn.update({"direction": OUTGOING_FLAG})
+        if txn['to'] == target_addr:
+            dict_indiv_txn.update({"direction": INCOMING_FLAG})
+
+        return dict_indiv_txn
+
+    def sanitize_txns(self, target_addr, list_full_txns, direction=BOTH_FLAG) -> list:
+        """This function converts raw txns of a wallet addr into the sanitized format and records its statistics"""
         res = []
         expected_txn = 0
-        progress_txn[target_addr] = 0
-        list_full_txns = None
-
-        try:
-            list_full_txns = EtherScanObj.get_normal_txs_by_address(target_addr, 0, 9999999999, 'desc')
-            # only when there are no errors, and transactions are successfully obtained, will the program proceed
-        except AssertionError:
-            print_info(f"{target_addr} does not have any transaction!")
-            progress_all_txn[target_addr] = 0
 
         print_debug(f"Compiling expected transactions for address {target_addr.strip()}")
 
         len_all_txn, len_incoming_txn, len_outgoing_txn, len_contract_creation_txn = self.get_addr_stats(target_addr,
                                                                                                          list_full_txns)
 
-        return_stat[target_addr] = {"all_txn": len_all_txn, "incoming_txn": len_incoming_txn,
-                                    "outgoing_txn": len_outgoing_txn, "contract_txn": len_contract_creation_txn}
-
         if direction == BOTH_FLAG:
             expected_txn = len_all_txn - len_contract_creation_txn
         elif direction == OUTGOING_FLAG:
@@ -200,138 +392,257 @@ class DigiFax_EthScan:
         elif direction == INCOMING_FLAG:
             expected_txn = len_incoming_txn
 
-        progress_all_txn[target_addr] = expected_txn
-
-
         print_debug(f"Compiling transactions for address {target_addr.strip()}, expecting {expected_txn} transactions. {len_incoming_txn} incoming, {len_outgoing_txn} outgoing")
 
+        # Record the high-water-mark block so that later syncs only ask for newer blocks
+        self.ADDR_TXNS_STATS[target_addr][LAST_BLOCK] = int(list_full_txns[0]['blockNumber']) if list_full_txns else 0
+
         if list_full_txns:
-            for i, txn in enumerate(list_full_txns):
-                if len(txn['to']) > 1:
-                    progress_txn[target_addr] = progress_txn[target_addr] + 1
-
-                    dict_indiv_txn = {
-                        'timestamp': txn['timeStamp'],
-                        'blockNumber': txn['blockNumber'],
-                        'hash': txn['hash'],
-                        'from': txn['from'],
-                        'from_labels': None,
-                        'to': txn['to'],
-                        'to_labels': None,
-                        'value': int(txn['value']) * WEI}
+            with span("sanitize_txns", "compute", txns=len(list_full_txns)):
+                for i, txn in enumerate(list_full_txns):
+                    if len(txn['to']) > 1:
+                        res.append(self.sanitize_txn(target_addr, txn))
 
-                    if txn['from'] == target_addr:
-                        dict_indiv_txn.update({"direction": OUTGOING_FLAG})
-                    if txn['to'] == target_addr:
-                        dict_indiv_txn.update({"direction": INCOMING_FLAG})
+                    if len(res) == expected_txn:
+                        break
+
+        return res
 
-                    res.append(dict_indiv_txn.copy())
+    async def get_addr_txns(self, engine, target_addr, direction=BOTH_FLAG, progress=None):
+        """This function is the fetch engine job for one wallet addr, returns its sanitized txns (None on network failure)"""
+        try:
+            list_full_txns = await self.fetch_all_txns(engine, target_addr, progress=progress)
+            # only when there are no errors, and transactions are successfully obtained, will the program proceed
+        except (AssertionError, requests.RequestException) as err:
+            print_impt(f"Unable to retrieve transactions for {target_addr}: {err}")
+            return None
 
-                if len(res) == expected_txn:
-                    break
+        if not list_full_txns:
+            print_info(f"{target_addr} does not have any transaction!")
 
-        return_txn[target_addr] = res
+        return self.sanitize_txns(target_addr, list_full_txns, direction)
 
-    def get_ext_txns(self, list_of_addr, direction=BOTH_FLAG) -> dict:
-        """This function allow you to list all the incoming or outgoing txns of a wallet address
-        Information extracted: timeStamp, blockNumber, hash, labels, from, to, value"""
+    @traced("get_ext_txns", "fetch")
+    def get_ext_txns(self, list_of_addr, direction=BOTH_FLAG, callback=None, progress=None) -> dict:
+        """This function allow you to list all the incoming or outgoing txns of a batch of wallet addresses
+        Information extracted: timeStamp, blockNumber, hash, labels, from, to, value
+        Results are streamed back through callback(addr, txns) as soon as each address completes, and progress
+        (rows fetched per address, addresses completed per batch) is pushed to the optional ProgressChannel"""
 
         start = time.time()
 
-        process_list = []
-        addr_flag = {}
-
-        # Initialise manager dictionary objects as a way of sharing data between processes
-        manager = Manager()
-        return_txn = manager.dict()
-        return_stat = manager.dict()
-        progress_txn = manager.dict()
-        progress_all_txn = manager.dict()
+        return_txn = {}
+        pending = []
 
         for addr in list_of_addr:
-
-            addr_flag[addr] = 0
+            addr = addr.lower()
 
             if addr in self.ADDR_TXNS:
                 print_info("Address already queried!")
-                return_txn.update({addr : self.ADDR_TXNS[addr]})
+                return_txn[addr] = self.ADDR_TXNS[addr]
                 continue
 
-            p = Process(target=self.get_addr_txns,
-                        args=(addr.lower(), progress_txn, progress_all_txn, return_txn, return_stat, direction))
-            p.start()
-            process_list.append(p)
-
-        while 1:
-            time.sleep(1)
-            for addr in list_of_addr:
-                try:
-                    print_info(f"{addr}: {progress_txn[addr]}/{progress_all_txn[addr]}")
-                    if progress_txn[addr] == progress_all_txn[addr]:
-                        addr_flag[addr] = 1
-                except KeyError:
-                    continue
-            if all(addr_flag.values()):
-                break
-
-        for proc in process_list:
-            proc.join()
-
-        self.ADDR_TXNS.update(return_txn)
-        self.ADDR_TXNS_STATS.update(return_stat)
+            if addr not in pending:
+                pending.append(addr)
+
+        def on_result(addr, txns):
+            # Addresses that failed to be retrieved are not cached, so that they can be queried again later
+            if txns is None:
+                return
+            print_info(f"{addr}: {len(txns)} transactions")
+            self.ADDR_TXNS[addr] = txns
+            return_txn[addr] = txns
+            if callback:
+                callback(addr, txns)
+
+        self.engine.run(pending, lambda engine, addr: self.get_addr_txns(engine, addr, direction, progress), on_result,
+                        progress)
 
         print_debug(f"{time.time() - start}s taken for [underline]{len(list_of_addr)}[/] addresses")
 
         return return_txn
 
+    async def get_addr_aggregates(self, engine, target_addr, progress=None):
+        """This function is the fetch engine job for one wallet addr that is explored but not displayed (e.g. by a
+        crawl), returns its per-counterparty aggregate records (None on network failure) without keeping its txns"""
+        txns = await self.get_addr_txns(engine, target_addr, progress=progress)
+        # The statistics recorded while sanitizing are not kept either
+        self.ADDR_TXNS_STATS.pop(target_addr, None)
+        if txns is None:
+            return None
+        return TxnTable.from_txns(target_addr, txns, index=False).aggregate_by_counterparty()
+
+    @traced("get_counterparty_aggregates", "fetch")
+    def get_counterparty_aggregates(self, list_of_addr, progress=None) -> dict:
+        """This function fetches a batch of wallet addresses only for their per-counterparty aggregate records (see
+        TxnTable.aggregate_by_counterparty), each address' txns are dropped as soon as they are aggregated
+        :return: Dictionary of {addr: aggregate records}, addresses that failed to be retrieved are left out"""
+        start = time.time()
+
+        pending = list(dict.fromkeys(addr.lower() for addr in list_of_addr))
+
+        def job(engine, addr):
+            return self.get_addr_aggregates(engine, addr, progress)
+
+        def on_result(addr, aggregates):
+            if aggregates is not None:
+                print_info(f"{addr}: {len(aggregates)} counterparties")
+
+        return_aggregates = self.engine.run(pending, job, on_result, progress)
+
+        print_debug(f"{time.time() - start}s taken to aggregate [underline]{len(pending)}[/] addresses")
+
+        return {addr: aggregates for addr, aggregates in return_aggregates.items() if aggregates is not None}
+
+    @traced("merge_txns", "compute")
+    def merge_txns(self, target_addr, list_new_txns, sanitized, stats) -> list:
+        """This function merges raw txns newer than the cached ones into a wallet addr's sanitized data and stats,
+        returns the newly added sanitized txns"""
+        new_incoming = []
+        new_outgoing = []
+
+        for txn in list_new_txns:
+            if len(txn['to']) <= 1:
+                stats["contract_txn"] += 1
+                continue
+
+            dict_indiv_txn = self.sanitize_txn(target_addr, txn)
+            if dict_indiv_txn["direction"] == INCOMING_FLAG:
+                new_incoming.append(dict_indiv_txn)
+                stats["incoming_txn"] += 1
+                counterparty, uniq_key = dict_indiv_txn['from'], UNIQ_IN
+            else:
+                new_outgoing.append(dict_indiv_txn)
+                stats["outgoing_txn"] += 1
+                counterparty, uniq_key = dict_indiv_txn['to'], UNIQ_OUT
+
+            # Unique counterparty counts and aggregates only exist once update_statistics() has run for the address
+            if uniq_key in stats:
+                stats[uniq_key][counterparty] = stats[uniq_key].get(counterparty, 0) + 1
+            if COUNTERPARTIES in stats:
+                timestamp = int(dict_indiv_txn['timestamp'])
+                record = stats[COUNTERPARTIES].setdefault(counterparty, [0, 0, 0, 0, timestamp, timestamp])
+                incoming = dict_indiv_txn["direction"] == INCOMING_FLAG
+                record[IN_COUNT if incoming else OUT_COUNT] += 1
+                record[IN_VALUE if incoming else OUT_VALUE] += dict_indiv_txn['value']
+                record[FIRST_SEEN] = min(record[FIRST_SEEN], timestamp)
+                record[LAST_SEEN] = max(record[LAST_SEEN], timestamp)
+
+        stats["all_txn"] += len(list_new_txns)
+        if UNIQ_IN in stats:
+            stats['incoming_uniq'] = len(stats[UNIQ_IN])
+        if UNIQ_OUT in stats:
+            stats['outgoing_uniq'] = len(stats[UNIQ_OUT])
+        if list_new_txns:
+            stats[LAST_BLOCK] = max(stats.get(LAST_BLOCK, 0), int(list_new_txns[0]['blockNumber']))
+
+        # Cached lists are in descending order, so newer txns go in front
+        sanitized[INBOUND] = new_incoming + sanitized[INBOUND]
+        sanitized[OUTBOUND] = new_outgoing + sanitized[OUTBOUND]
+
+        return new_incoming + new_outgoing
+
+    async def sync_addr_txns(self, engine, target_addr, sanitized, stats, progress=None, lock=None):
+        """This function is the fetch engine job for re-syncing one cached wallet addr from its last seen block,
+        returns the newly added sanitized txns (None on network failure). The cached txns and stats are changed while
+        holding 'lock', if given"""
+        lock = lock if lock is not None else nullcontext()
+        last_block = stats.get(LAST_BLOCK)
+        if last_block is None:
+            # Case files saved before high-water-marks were recorded: derive it from the cached txns
+            last_block = max([int(txn['blockNumber']) for txn in sanitized[INBOUND] + sanitized[OUTBOUND]], default=0)
+            with lock:
+                stats[LAST_BLOCK] = last_block
+
+        try:
+            list_new_txns = await self.fetch_all_txns(engine, target_addr, startblock=last_block + 1, progress=progress)
+        except (AssertionError, requests.RequestException) as err:
+            print_impt(f"Unable to sync transactions for {target_addr}: {err}")
+            return None
+
+        with lock:
+            return self.merge_txns(target_addr, list_new_txns, sanitized, stats)
+
+    @traced("sync_ext_txns", "fetch")
+    def sync_ext_txns(self, data, list_of_addr=None, callback=None, progress=None, lock=None) -> dict:
+        """This function re-syncs cached wallet addresses, only querying blocks after each address' last seen block
+        :param data: Case data dictionary holding the SANITIZED_DATA and STATS sections (updated in place)
+        :param list_of_addr: Addresses to sync, defaults to every cached address
+        :param callback: Optional function called as callback(addr, new_txns) as soon as each address completes
+        :param progress: Optional ProgressChannel receiving the progress of the sync
+        :param lock: Optional lock held while the case data is changed in place (e.g. against a background save)
+        :return: Dictionary of {addr: newly added sanitized txns}"""
+        start = time.time()
+
+        if list_of_addr is None:
+            list_of_addr = list(data[SANITIZED_DATA].keys())
+
+        # Only addresses that have been fully retrieved before can be synced
+        pending = [addr.lower() for addr in list_of_addr
+                   if data[SANITIZED_DATA].get(addr.lower()) and addr.lower() in data[STATS]]
+
+        def job(engine, addr):
+            return self.sync_addr_txns(engine, addr, data[SANITIZED_DATA][addr], data[STATS][addr], progress, lock)
+
+        def on_result(addr, new_txns):
+            if new_txns is None:
+                return
+            print_info(f"{addr}: {len(new_txns)} new transactions")
+            # Keep this object's caches consistent with the synced case data
+            if addr in self.ADDR_TXNS:
+                self.ADDR_TXNS[addr][:0] = new_txns
+            # The columnar table of the address is rebuilt from the merged data when next needed
+            self.ADDR_TXNS_TABLES.pop(addr, None)
+            self.ADDR_TXNS_SUMMARISED[addr] = data[SANITIZED_DATA][addr]
+            self.ADDR_TXNS_STATS[addr] = data[STATS][addr]
+            if callback:
+                callback(addr, new_txns)
+
+        return_txn = self.engine.run(pending, job, on_result, progress)
+
+        print_debug(f"{time.time() - start}s taken to sync [underline]{len(pending)}[/] addresses")
+
+        return {addr: new_txns for addr, new_txns in return_txn.items() if new_txns is not None}
+
+    def get_txn_table(self, target_addr) -> TxnTable:
+        """This function returns the columnar txn table of a wallet addr, building it from its sanitized txns if needed"""
+        if target_addr not in self.ADDR_TXNS_TABLES:
+            summarised = self.ADDR_TXNS_SUMMARISED[target_addr]
+            self.ADDR_TXNS_TABLES[target_addr] = TxnTable.from_txns(target_addr,
+                                                                    summarised['incoming'] + summarised['outgoing'],
+                                                                    self.ADDRESS_BOOK)
+        return self.ADDR_TXNS_TABLES[target_addr]
+
+    @traced("split_txns_based_on_direction", "compute")
     def split_txns_based_on_direction(self, dict_all_txn):
         """This function will split the txns into unique incoming or outgoing txns"""
         for k, v in dict_all_txn.items():
+            # Build the columnar table once, its rows are re-sorted by time so the lists are split in fetched order
+            self.ADDR_TXNS_TABLES[k] = TxnTable.from_txns(k, v, self.ADDRESS_BOOK)
 
-            if k not in self.ADDR_TXNS_SUMMARISED:
-                self.ADDR_TXNS_SUMMARISED[k] = {'outgoing': [], 'incoming': []}
-
-            for indiv_txn in v:
-                if indiv_txn['direction'] == OUTGOING_FLAG:
-                    self.ADDR_TXNS_SUMMARISED[k]['outgoing'].append(indiv_txn)
-                if indiv_txn['direction'] == INCOMING_FLAG:
-                    self.ADDR_TXNS_SUMMARISED[k]['incoming'].append(indiv_txn)
-
-        # print(f'{SPACERS}')
+            self.ADDR_TXNS_SUMMARISED[k] = {
+                'outgoing': [txn for txn in v if txn['direction'] == OUTGOING_FLAG],
+                'incoming': [txn for txn in v if txn['direction'] == INCOMING_FLAG]}
 
+    @traced("update_statistics", "compute")
     def update_statistics(self):
-        """This function will update self.ADDR_TXNS_STATS with unique incoming and outgoing txns for each addr"""
-        # add uniq_incoming and uniq_outgoing to self.ADDR_TXNS_STATS[target_addr] using self.ADDR_TXNS_SUMMARISED
-        # print(SPACERS)
-
-        for k, v in self.ADDR_TXNS_SUMMARISED.items():
-            self.ADDR_TXNS_STATS[k]['incoming_uniq'] = []
-            self.ADDR_TXNS_STATS[k]['outgoing_uniq'] = []
-            self.ADDR_TXNS_STATS[k]['incoming_uniq_data'] = {}
-            self.ADDR_TXNS_STATS[k]['outgoing_uniq_data'] = {}
-            # print(self.ADDR_TXNS_SUMMARISED[k].get('outgoing')[0].get('to'))
-
-            for dict_elem in self.ADDR_TXNS_SUMMARISED[k]['incoming']:
-                self.ADDR_TXNS_STATS[k]['incoming_uniq'].append(dict_elem.get('from'))
-            for dict_elem in self.ADDR_TXNS_SUMMARISED[k].get('outgoing'):
-                self.ADDR_TXNS_STATS[k]['outgoing_uniq'].append(dict_elem.get('to'))
-
-            for addr in self.ADDR_TXNS_STATS[k].get('incoming_uniq'):
-                if addr not in self.ADDR_TXNS_STATS[k]['incoming_uniq_data']:
-                    self.ADDR_TXNS_STATS[k]['incoming_uniq_data'][addr] = 1
-                else:
-                    self.ADDR_TXNS_STATS[k]['incoming_uniq_data'][addr] += 1
-            self.ADDR_TXNS_STATS[k]['incoming_uniq'] = len(list(set(self.ADDR_TXNS_STATS[k].get('incoming_uniq'))))
+        """This function will update self.ADDR_TXNS_STATS with the per-counterparty aggregates and the unique incoming
+        and outgoing txns for each addr"""
+        for k in self.ADDR_TXNS_SUMMARISED:
+            # Aggregates are kept up to date by merge_txns() once computed, fresh fetches start without them
+            if COUNTERPARTIES in self.ADDR_TXNS_STATS[k]:
+                continue
 
-            for addr in self.ADDR_TXNS_STATS[k].get('outgoing_uniq'):
-                if addr not in self.ADDR_TXNS_STATS[k]['outgoing_uniq_data']:
-                    self.ADDR_TXNS_STATS[k]['outgoing_uniq_data'][addr] = 1
-                else:
-                    self.ADDR_TXNS_STATS[k]['outgoing_uniq_data'][addr] += 1
-            self.ADDR_TXNS_STATS[k]['outgoing_uniq'] = len(list(set(self.ADDR_TXNS_STATS[k].get('outgoing_uniq'))))
+            # One grouping pass over the columnar txn table, the unique counts are derived from its records
+            counterparties = self.get_txn_table(k).aggregate_by_counterparty()
+            incoming_uniq_data = {addr: record[IN_COUNT] for addr, record in counterparties.items() if record[IN_COUNT]}
+            outgoing_uniq_data = {addr: record[OUT_COUNT] for addr, record in counterparties.items() if record[OUT_COUNT]}
 
-            # print(self.ADDR_TXNS_STATS[k])
-            # print(SPACERS)
+            self.ADDR_TXNS_STATS[k][COUNTERPARTIES] = counterparties
+            self.ADDR_TXNS_STATS[k]['incoming_uniq'] = len(incoming_uniq_data)
+            self.ADDR_TXNS_STATS[k]['outgoing_uniq'] = len(outgoing_uniq_data)
+            self.ADDR_TXNS_STATS[k]['incoming_uniq_data'] = incoming_uniq_data
+            self.ADDR_TXNS_STATS[k]['outgoing_uniq_data'] = outgoing_uniq_data
 
     def export_as_json(self, save_path):
         """
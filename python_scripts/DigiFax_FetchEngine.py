@@ -0,0 +1,138 @@
+"""
+Description:
+> Asyncio based fetch engine used by DigiFax_EthScan to query a batch of wallet addresses concurrently.
+> All jobs share one HTTP session and a bounded worker pool, and every API call goes through a rate limiter
+> so that throughput is limited by the Etherscan API quota instead of by process spawning.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from python_scripts.DigiFax_HTTP import HTTPTransport
+
+# Maximum number of blocking HTTP calls in flight at any one time
+DEFAULT_WORKERS = 8
+# Maximum number of API calls per second (Etherscan free tier allows 5 calls/sec)
+DEFAULT_RATE = 5
+
+
+class RateLimiter:
+    """
+    Class definition for a simple call spacer: every acquire() reserves the next free time slot
+    so that no more than 'rate' calls are started per second, even across batches running in different threads
+    """
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self.next_slot = 0
+        self.lock = threading.Lock()
+
+    async def acquire(self):
+        """
+        Function to wait until the next free time slot
+        :return: None
+        """
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class ProgressChannel:
+    """
+    Class definition for push-based progress reporting.
+    Listeners are called as listener(item, done, total) the moment an item makes progress, 'total' being 0 while
+    the item's total is not known yet. Progress of the whole batch is published with item None, as
+    (None, items completed, items in batch), so the last event arrives as soon as the last job finishes.
+    Events are published from the engine's threads, GUI listeners must hand them over to the GUI thread
+    """
+    def __init__(self):
+        self.listeners = list()
+
+    def subscribe(self, listener):
+        """
+        Function to register a listener called as listener(item, done, total)
+        :return: None
+        """
+        self.listeners.append(listener)
+
+    def publish(self, item, done, total=0):
+        """
+        Function to push a progress event to every listener
+        :param item: Item that made progress (None for the progress of the whole batch)
+        :param done: Amount of work done
+        :param total: Total amount of work (0 if unknown)
+        :return: None
+        """
+        for listener in self.listeners:
+            listener(item, done, total)
+
+
+class FetchEngine:
+    """
+    Class definition for the fetch engine.
+    Jobs are coroutines of the form 'async def job(engine, item)', which use engine.call() for every blocking
+    HTTP request, so a single job can also fan out into several concurrent requests
+    """
+    def __init__(self, workers=DEFAULT_WORKERS, rate=DEFAULT_RATE, session=None, limiter=None):
+        self.workers = workers
+        self.rate = rate
+        # One HTTP session (and connection pool) shared by every job
+        self.session = session if session else HTTPTransport()
+        # Bounded pool of threads running the blocking HTTP calls
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="digifax-fetch")
+        # Rate limiter, can be shared with other engines calling the same API (e.g. of a throwaway DigiFax_EthScan)
+        self.limiter = limiter if limiter else RateLimiter(rate)
+
+    async def call(self, func, *args, **kwargs):
+        """
+        Function to run a blocking function on the worker pool once the rate limiter allows it
+        :param func: Blocking function to call (e.g. a single API query)
+        :return: Whatever 'func' returns
+        """
+        await self.limiter.acquire()
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor, lambda: func(*args, **kwargs))
+
+    async def stream(self, items, job):
+        """
+        Async generator that runs 'job' for every item and yields (item, result) as soon as each job completes
+        :param items: List of items (e.g. wallet addresses) to process
+        :param job: Coroutine function called as job(engine, item)
+        :return: None
+        """
+        # Bound the number of jobs in progress so that large batches do not hold every result in flight
+        semaphore = asyncio.Semaphore(self.workers)
+
+        async def run(item):
+            async with semaphore:
+                return item, await job(self, item)
+
+        tasks = [asyncio.ensure_future(run(item)) for item in items]
+        for task in asyncio.as_completed(tasks):
+            yield await task
+
+    def run(self, items, job, callback=None, progress=None) -> dict:
+        """
+        Function to process a batch of items from synchronous code (e.g. a GUI worker thread)
+        :param items: List of items (e.g. wallet addresses) to process
+        :param job: Coroutine function called as job(engine, item)
+        :param callback: Optional function called as callback(item, result) as soon as each item completes
+        :param progress: Optional ProgressChannel receiving the progress of the batch
+        :return: Dictionary of {item: result}
+        """
+        async def collect():
+            results = {}
+            if progress:
+                progress.publish(None, 0, len(items))
+            async for item, result in self.stream(items, job):
+                results[item] = result
+                if callback:
+                    callback(item, result)
+                if progress:
+                    progress.publish(None, len(results), len(items))
+            return results
+
+        return asyncio.run(collect())
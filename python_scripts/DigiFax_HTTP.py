@@ -0,0 +1,70 @@
+"""
+Description:
+> Shared HTTP transport used for both the Etherscan API calls and the label scraping.
+> A single requests.Session keeps TCP/TLS connections alive in a tunable connection pool, and a per-host limit
+> bounds how many requests may be in flight to the same host at once.
+"""
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Number of per-host connection pools kept alive
+POOL_CONNECTIONS = 4
+# Maximum number of kept-alive connections in each per-host pool
+POOL_MAXSIZE = 16
+# Default maximum number of concurrent requests to a single host
+PER_HOST_LIMIT = 8
+
+
+class HTTPTransport:
+    """
+    Class definition for the pooled keep-alive HTTP transport, safe to share between worker threads
+    """
+    def __init__(self, pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, per_host_limit=PER_HOST_LIMIT,
+                 host_limits=None):
+        """
+        :param pool_connections: Number of per-host connection pools kept alive
+        :param pool_maxsize: Maximum number of kept-alive connections per host
+        :param per_host_limit: Default maximum number of concurrent requests to a single host
+        :param host_limits: Optional dictionary of {hostname: limit} overriding 'per_host_limit' for specific hosts
+        """
+        self.session = requests.Session()
+        # Block instead of opening throw-away connections once a host's pool is exhausted
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=True)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.per_host_limit = per_host_limit
+        self.host_limits = dict(host_limits) if host_limits else dict()
+        self.host_semaphores = dict()
+        self.lock = threading.Lock()
+
+    def host_semaphore(self, url):
+        """
+        Function to get the semaphore bounding concurrent requests to the host of a given url
+        :param url: Target url
+        :return: threading.BoundedSemaphore of the url's host
+        """
+        host = urlsplit(url).hostname
+        with self.lock:
+            if host not in self.host_semaphores:
+                self.host_semaphores[host] = threading.BoundedSemaphore(self.host_limits.get(host, self.per_host_limit))
+            return self.host_semaphores[host]
+
+    def get(self, url, **kwargs):
+        """
+        Function to send a GET request over the pooled session
+        :param url: Target url
+        :return: requests.Response object
+        """
+        with self.host_semaphore(url):
+            return self.session.get(url, **kwargs)
+
+    def close(self):
+        """
+        Function to close every pooled connection
+        :return: None
+        """
+        self.session.close()
@@ -0,0 +1,148 @@
+"""
+Description:
+> Headless batch ingestion of wallet addresses into a case file, to pre-load large cases without the GUI.
+> Reads the addresses from text files (one or more per line, '#' comments, '-' for stdin), fetches and summarises
+> them in batches on the DigiFax_EthScan fetch engine, and writes a case file (plus its label store) that the
+> Dashboard opens directly. The case file is written after every batch, so an interrupted run resumes where it
+> stopped: addresses already held by the case are skipped.
+> Never imports PyQt or pyvis.
+
+Usage:
+> python -m python_scripts.DigiFax_Ingest addresses.txt [more.txt ...] -o case.dgfx [--workers 8] [--rate 5]
+"""
+import argparse
+import copy
+import os
+import re
+import sys
+import time
+from contextlib import nullcontext
+
+from constants import TEMPLATE, SANITIZED_DATA, STATS, CASE_FILE_EXT, CASE_BINARY_EXT, LABEL_STORE_EXT, JOURNAL_EXT
+from python_scripts.DigiFax_CaseFile import CaseSection, load_case, save_case
+from python_scripts.DigiFax_CaseJournal import CaseJournal
+from python_scripts.DigiFax_EthScan_multiproc import DigiFax_EthScan, print_info, print_impt, print_debug
+from python_scripts.DigiFax_FetchEngine import DEFAULT_WORKERS, DEFAULT_RATE
+from python_scripts.DigiFax_Replay import new_transport
+from python_scripts.DigiFax_LabelStore import LabelStore
+
+# Number of addresses fetched before the case file is written
+BATCH_SIZE = 100
+ADDRESS_PATTERN = re.compile(r"^0x[0-9a-fA-F]{40}$")
+
+
+def read_addresses(paths) -> list:
+    """This function reads the wallet addrs listed in text files, lower cased and without duplicates, in file order"""
+    addresses = dict()
+    for path in paths:
+        # stdin is left open, for the next '-' or the caller
+        with (nullcontext(sys.stdin) if path == "-" else open(path, 'r')) as f:
+            for number, line in enumerate(f, 1):
+                for token in re.split(r"[\s,;]+", line.split("#", 1)[0].strip()):
+                    if not token:
+                        continue
+                    if ADDRESS_PATTERN.match(token):
+                        addresses[token.lower()] = None
+                    else:
+                        print_impt(f"{path}:{number}: skipping invalid wallet address '{token}'")
+    return list(addresses)
+
+
+def new_case(path, name, description="") -> dict:
+    """This function creates an empty case from the case template"""
+    caseinfo = copy.deepcopy(TEMPLATE)
+    caseinfo["casename"] = name
+    caseinfo["casedescription"] = description
+    caseinfo["filename"] = path
+    return caseinfo
+
+
+def ingest(addresses, output, name=None, description="", batch_size=BATCH_SIZE, workers=DEFAULT_WORKERS,
+           rate=DEFAULT_RATE, store=True, transport=None) -> dict:
+    """This function fetches and summarises wallet addrs in batches into a case file, written after every batch
+    :param transport: HTTP transport of the fetchers, defaults to new_transport()
+    :return: Dictionary with the lists of 'fetched', 'failed' and 'skipped' (already in the case) addrs"""
+    start = time.time()
+    output = os.path.abspath(output)
+    journal = CaseJournal(os.path.splitext(output)[0] + JOURNAL_EXT)
+    if os.path.exists(output):
+        caseinfo = load_case(output)
+        journal.replay(caseinfo)
+        print_info(f"Resuming case '{caseinfo['casename']}' ({len(caseinfo['data'][STATS])} addresses held)")
+    else:
+        caseinfo = new_case(output, name or os.path.splitext(os.path.basename(output))[0], description)
+    caseinfo["filename"] = output
+    data = caseinfo["data"]
+
+    # Every listed address becomes a WOI of the case, even those failing to be fetched (the Dashboard retries them)
+    caseinfo["walletaddresses"] += [addr for addr in addresses if addr not in caseinfo["walletaddresses"]]
+    result = {"fetched": list(), "failed": list(), "skipped": [addr for addr in addresses if addr in data[STATS]]}
+    pending = [addr for addr in addresses if addr not in data[STATS]]
+
+    label_store = LabelStore(os.path.splitext(output)[0] + LABEL_STORE_EXT) if store else None
+    transport = transport if transport else new_transport()
+    # Without any address left to fetch, the case is still written once (e.g. with its new WOIs)
+    batches = [pending[index:index + batch_size] for index in range(0, len(pending), batch_size)] or [[]]
+    for number, batch in enumerate(batches, 1):
+        print_info(f"Batch {number}/{len(batches)}: {len(batch)} addresses")
+
+        # A fresh fetcher per batch, so that the fetched transactions do not pile up in memory
+        ethscan = DigiFax_EthScan(label_cache=label_store, transport=transport, workers=workers, rate=rate)
+        txns = ethscan.get_ext_txns(batch)
+        ethscan.split_txns_based_on_direction(txns)
+        ethscan.update_statistics()
+        for addr in txns:
+            data[SANITIZED_DATA][addr] = ethscan.ADDR_TXNS_SUMMARISED[addr]
+            data[STATS][addr] = ethscan.ADDR_TXNS_STATS[addr]
+        result["fetched"] += [addr for addr in batch if addr in txns]
+        result["failed"] += [addr for addr in batch if addr not in txns]
+
+        # Checkpoint, the entries just written are then only kept on disk
+        save_case(output, caseinfo)
+        journal.reset(caseinfo)
+        for section in data.values():
+            if isinstance(section, CaseSection):
+                section.release()
+
+    if label_store:
+        label_store.close()
+    print_debug(f"{time.time() - start}s taken to ingest [underline]{len(addresses)}[/] addresses into {output}")
+    return result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Fetch and summarise wallet addresses into a DigiTrace case file, "
+                                                 "without the GUI")
+    parser.add_argument("files", nargs="+", help="Text files listing wallet addresses ('-' for stdin)")
+    parser.add_argument("-o", "--output", required=True,
+                        help=f"Case file to create or resume ({CASE_BINARY_EXT} for the binary format, "
+                             f"{CASE_FILE_EXT} for JSON)")
+    parser.add_argument("--name", help="Case name (defaults to the case file's name)")
+    parser.add_argument("--description", default="", help="Case description")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help="Addresses fetched between two writes of the case file")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Maximum number of concurrent API calls")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="Maximum number of API calls per second")
+    parser.add_argument("--no-store", action="store_true",
+                        help=f"Do not keep the looked up labels in the case's label store ({LABEL_STORE_EXT}), the "
+                             f"Dashboard then looks them up again")
+    args = parser.parse_args(argv)
+    if args.batch_size < 1 or args.workers < 1 or args.rate <= 0:
+        parser.error("--batch-size and --workers must be at least 1, --rate must be positive")
+
+    addresses = read_addresses(args.files)
+    if not addresses:
+        print_impt("No valid wallet address given")
+        return 2
+
+    result = ingest(addresses, args.output, args.name, args.description, args.batch_size, args.workers, args.rate,
+                    not args.no_store)
+    print_info(f"{len(result['fetched'])} fetched, {len(result['skipped'])} already in the case, "
+               f"{len(result['failed'])} failed")
+    for addr in result["failed"]:
+        print_impt(f"Failed to fetch {addr}", 1)
+    return 1 if result["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""
+Description:
+> SQLite-backed store for the Etherscan labels of the addresses of a case, kept next to the case file so that labels
+> looked up once are not fetched again when the case is reopened (or ingested in several runs).
+> The transactions themselves are only held by the case file, the Dashboard filters and groups them in memory with
+> the columnar TxnTable.
+"""
+import json
+import sqlite3
+import threading
+import time
+
+# Stores written by earlier versions also held every txn and the statistics of each address, dropped when opened
+SCHEMA = """
+DROP TABLE IF EXISTS txns;
+DROP TABLE IF EXISTS stats;
+CREATE TABLE IF NOT EXISTS labels (
+    address    TEXT PRIMARY KEY,
+    labels     TEXT,
+    fetched_at REAL NOT NULL
+);
+"""
+
+
+class LabelStore:
+    """
+    Class definition for a case's label store.
+    The connection is shared between the GUI thread and the fetching threads, so every access is serialised by a lock
+    """
+    def __init__(self, path=":memory:"):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self.lock, self.conn:
+            self.conn.executescript(SCHEMA)
+
+    def close(self):
+        """
+        Function to close the underlying database connection
+        :return: None
+        """
+        with self.lock:
+            self.conn.close()
+
+    def get_labels(self, addr, max_age=None):
+        """
+        Function to get the stored labels of an address
+        :param addr: Wallet address
+        :param max_age: Labels stored more than this many seconds ago are treated as expired
+        :return: Tuple of (found, labels), labels can be None for addresses known to have no labels
+        """
+        with self.lock:
+            row = self.conn.execute("SELECT labels, fetched_at FROM labels WHERE address = ?", (addr,)).fetchone()
+        if row is None or (max_age is not None and time.time() - row["fetched_at"] > max_age):
+            return False, None
+        return True, json.loads(row["labels"]) if row["labels"] else None
+
+    def set_labels_many(self, labels_by_addr):
+        """
+        Function to store the labels of several addresses at once
+        :param labels_by_addr: Dictionary of {address: list of labels (or None)}
+        :return: None
+        """
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO labels (address, labels, fetched_at) VALUES (?, ?, ?)",
+                                  [(addr, json.dumps(labels) if labels else None, now)
+                                   for addr, labels in labels_by_addr.items()])
@@ -0,0 +1,194 @@
+"""
+Description:
+> Path finding between two wallet addresses over the transaction graph of a case ("how did funds get from A to B").
+> Edges follow the flow of funds (sender -> receiver) and are read from the per-counterparty aggregate records.
+> A bidirectional BFS explores forward from the source and backward from the target, fetching the neighbourhoods
+> missing from the case on demand (one concurrent batch per BFS layer) until the two searches meet or the fetch
+> budget runs out. The top-k shortest paths (in hops) over the explored graph are then found with Yen's algorithm.
+> Only the aggregate records of the explored addresses are kept, the transactions are only fetched (again) for the
+> addresses on the paths found, which are the ones displayed.
+"""
+from collections import deque
+
+from constants import SANITIZED_DATA, STATS, INBOUND, OUTBOUND, IN_COUNT, OUT_COUNT
+from python_scripts.DigiFax_Crawler import get_counterparties, MAX_COUNTERPARTIES
+from python_scripts.DigiFax_EthScan_multiproc import print_info
+
+# Maximum number of addresses fetched on demand for a single path query
+FETCH_BUDGET = 200
+# Number of paths returned
+TOP_K = 3
+# Maximum number of hops of a path
+MAX_HOPS = 6
+
+
+class DigiFax_PathFinder:
+    """
+    Class definition for the path finder of a case, fetching missing addresses through a DigiFax_EthScan object (best
+    a throwaway one, see DigiFax_EthScan.get_counterparty_aggregates)
+    """
+    def __init__(self, ethscan, data, budget=FETCH_BUDGET, max_counterparties=MAX_COUNTERPARTIES, progress=None):
+        """
+        :param ethscan: DigiFax_EthScan object used to fetch missing addresses
+        :param data: Case data dictionary (SANITIZED_DATA and STATS), read only
+        :param budget: Maximum number of addresses fetched on demand while exploring
+        :param max_counterparties: Addresses with more counterparties are not expanded (e.g. exchanges)
+        :param progress: Optional ProgressChannel receiving the progress of every fetch
+        """
+        self.ethscan = ethscan
+        self.data = data
+        self.budget = budget
+        self.max_counterparties = max_counterparties
+        self.progress = progress
+
+        # Addresses on the paths found that the case does not hold, in the case data format
+        self.fetched = {SANITIZED_DATA: dict(), STATS: dict()}
+        # Explored graph, {sender: {receiver: number of txns}} and its reverse
+        self.out_edges = dict()
+        self.in_edges = dict()
+        # Addresses whose edges have been loaded (or that could not be loaded)
+        self.loaded = set()
+        # Aggregate records of the explored addresses, and of the addresses held by the case without them
+        self.computed = dict()
+
+    def add_edge(self, sender, receiver, count):
+        """This function records that a wallet addr sent 'count' txns to another in the explored graph"""
+        self.out_edges.setdefault(sender, dict())[receiver] = count
+        self.in_edges.setdefault(receiver, dict())[sender] = count
+
+    def load(self, list_of_addr):
+        """This function loads the edges of wallet addrs into the explored graph, fetching the addrs missing from the
+        case within the remaining budget"""
+        pending = [addr for addr in list_of_addr if addr not in self.loaded]
+        missing = [addr for addr in pending if addr not in self.data[STATS] and addr not in self.computed]
+        missing = missing[:max(self.budget, 0)]
+        if missing:
+            self.budget -= len(missing)
+            self.computed.update(self.ethscan.get_counterparty_aggregates(missing, progress=self.progress))
+
+        for addr in pending:
+            counterparties = get_counterparties(addr, self.computed, self.data)
+            if counterparties is None:
+                # Not fetched (over budget or failed), it may still be loaded by a later layer
+                continue
+            self.loaded.add(addr)
+            for counterparty, record in counterparties.items():
+                if not counterparty or counterparty == addr:
+                    continue
+                if record[OUT_COUNT]:
+                    self.add_edge(addr, counterparty, record[OUT_COUNT])
+                if record[IN_COUNT]:
+                    self.add_edge(counterparty, addr, record[IN_COUNT])
+
+    def explore(self, source, target, k=TOP_K):
+        """This function runs the bidirectional BFS between two wallet addrs, loading every layer before expanding it,
+        until the forward and backward searches have met on k paths, the budget runs out or MAX_HOPS is reached"""
+        forward, backward = {source}, {target}
+        forward_frontier, backward_frontier = [source], [target]
+
+        for _ in range(MAX_HOPS):
+            if not forward_frontier or not backward_frontier:
+                break
+            if forward & backward and len(self.top_paths(source, target, k)) >= k:
+                break
+            # Expand the smaller side, its layer is the cheaper one to fetch
+            if len(forward_frontier) <= len(backward_frontier):
+                forward_frontier = self.expand(forward_frontier, forward, self.out_edges, source)
+            else:
+                backward_frontier = self.expand(backward_frontier, backward, self.in_edges, target)
+            print_info(f"Path search: {len(forward)} forward, {len(backward)} backward, budget left {self.budget}")
+
+    def expand(self, frontier, seen, edges, endpoint) -> list:
+        """This function expands one BFS layer along the given edges, returns the next layer"""
+        self.load(frontier)
+        layer = []
+        for addr in frontier:
+            neighbours = edges.get(addr, dict())
+            # Hubs are still reachable, but not expanded through (besides the endpoints themselves)
+            if addr != endpoint and len(neighbours) > self.max_counterparties:
+                continue
+            for neighbour in neighbours:
+                if neighbour not in seen:
+                    seen.add(neighbour)
+                    layer.append(neighbour)
+        return layer
+
+    def shortest_path(self, source, target, banned_nodes=(), banned_edges=()):
+        """This function returns the shortest path (in hops) over the explored graph, None if there is none"""
+        if source in banned_nodes:
+            return None
+        parents = {source: None}
+        queue = deque([source])
+        while queue:
+            addr = queue.popleft()
+            if addr == target:
+                path = []
+                while addr is not None:
+                    path.append(addr)
+                    addr = parents[addr]
+                return path[::-1]
+            for neighbour in self.out_edges.get(addr, dict()):
+                if neighbour not in parents and neighbour not in banned_nodes and (addr, neighbour) not in banned_edges:
+                    parents[neighbour] = addr
+                    queue.append(neighbour)
+        return None
+
+    def top_paths(self, source, target, k=TOP_K) -> list:
+        """This function returns the k shortest loopless paths over the explored graph (Yen's algorithm)"""
+        first = self.shortest_path(source, target)
+        if first is None:
+            return []
+        paths = [first]
+        candidates = []
+        while len(paths) < k:
+            last = paths[-1]
+            for i in range(len(last) - 1):
+                root = last[:i + 1]
+                banned_edges = {(path[i], path[i + 1]) for path in paths if path[:i + 1] == root}
+                spur = self.shortest_path(last[i], target, set(root[:-1]), banned_edges)
+                if spur is not None:
+                    candidate = root[:-1] + spur
+                    if candidate not in paths and candidate not in candidates:
+                        candidates.append(candidate)
+            if not candidates:
+                break
+            candidates.sort(key=len)
+            paths.append(candidates.pop(0))
+        return [path for path in paths if len(path) - 1 <= MAX_HOPS]
+
+    def fetch_path_addrs(self, paths):
+        """This function fetches the txns of the wallet addrs on the given paths that the case does not hold (their
+        aggregate records alone were fetched while exploring) into self.fetched"""
+        missing = list(dict.fromkeys(addr for path in paths for addr in path if addr not in self.data[STATS]))
+        if missing:
+            txns = self.ethscan.get_ext_txns(missing, progress=self.progress)
+            self.ethscan.split_txns_based_on_direction(txns)
+            self.ethscan.update_statistics()
+            for addr in txns:
+                self.fetched[SANITIZED_DATA][addr] = self.ethscan.ADDR_TXNS_SUMMARISED[addr]
+                self.fetched[STATS][addr] = self.ethscan.ADDR_TXNS_STATS[addr]
+
+    def hop_txns(self, sender, receiver) -> list:
+        """This function returns the sanitized txns sending funds from one wallet addr to another, as held by either
+        of the two addrs"""
+        txns = dict()
+        for source in (self.data, self.fetched):
+            if source[STATS].get(sender) is not None:
+                txns.update((txn['hash'], txn) for txn in source[SANITIZED_DATA][sender][OUTBOUND]
+                            if txn['to'] == receiver)
+            if source[STATS].get(receiver) is not None:
+                txns.update((txn['hash'], txn) for txn in source[SANITIZED_DATA][receiver][INBOUND]
+                            if txn['from'] == sender)
+        return sorted(txns.values(), key=lambda txn: int(txn['timestamp']))
+
+    def find_paths(self, source, target, k=TOP_K) -> list:
+        """This function finds the top-k paths of funds from one wallet addr to another
+        :return: List of paths, each a list of (sender, receiver, list of sanitized txns) hops"""
+        source, target = source.lower(), target.lower()
+        if source == target:
+            return []
+        self.explore(source, target, k)
+        paths = self.top_paths(source, target, k)
+        self.fetch_path_addrs(paths)
+        return [[(sender, receiver, self.hop_txns(sender, receiver)) for sender, receiver in zip(path, path[1:])]
+                for path in paths]
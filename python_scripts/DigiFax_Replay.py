@@ -0,0 +1,249 @@
+"""
+Description:
+> Record / replay of the Etherscan traffic (API calls and address pages scraped for labels), for offline work,
+> repeatable load tests and warm-cache demos.
+> Recording: with the DIGIFAX_RECORD environment variable set to a file, every DigiFax_EthScan (GUI or
+> DigiFax_Ingest) sends its requests through a RecordingTransport, which appends each response to that file as one
+> JSON line, keyed by the request's path and query (without the API key, so that recordings are shareable).
+> Replay: a local HTTP stand-in serves the recorded responses (the last one recorded for each request), with
+> configurable latency and Etherscan-like rate limiting errors. Transaction lists are requested up to the
+> LATEST_BLOCK sentinel, so their keys hold across recordings made at different chain heads; only the windows of a
+> split range (over 10,000 txns) depend on the head, and replay from the run that served the last eth_blockNumber. DigiFax_EthScan targets it through the
+> DIGIFAX_ETHERSCAN_API / DIGIFAX_ETHERSCAN_SITE environment variables (or its api_url / site_url arguments).
+
+Usage:
+> DIGIFAX_RECORD=etherscan.jsonl python -m python_scripts.DigiFax_Ingest addresses.txt -o case.dgfx
+> python -m python_scripts.DigiFax_Replay etherscan.jsonl [--port 8585] [--latency 100] [--rate-limit 5]
+> DIGIFAX_ETHERSCAN_API=http://127.0.0.1:8585/api DIGIFAX_ETHERSCAN_SITE=http://127.0.0.1:8585/address/ python ...
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+import requests
+
+from python_scripts.DigiFax_HTTP import HTTPTransport
+
+RECORD_ENV = "DIGIFAX_RECORD"
+# Query parameters left out of the recording keys
+SECRET_PARAMS = ("apikey",)
+HOST = "127.0.0.1"
+PORT = 8585
+# Error messages of the stand-in, as sent by Etherscan (DigiFax_EthScan retries on RATE_LIMIT_MSG)
+RATE_LIMIT_MSG = "Max rate limit reached"
+NOT_RECORDED_MSG = "No recorded response"
+
+
+def request_key(url) -> str:
+    """This function returns the recording key of a request url: its path and sorted query, without the host nor
+    the SECRET_PARAMS, so that a request to etherscan.io and the same request to the stand-in share a key"""
+    parts = urlsplit(url)
+    query = sorted((name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if name not in SECRET_PARAMS)
+    return f"{parts.path}?{urlencode(query)}" if query else parts.path
+
+
+def load_recordings(paths) -> dict:
+    """This function reads recording files, the last response recorded for a request wins (e.g. over the rate
+    limiting error that preceded a retry)
+    :return: Dictionary of {request key: recorded response}"""
+    recordings = dict()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Torn last line of an interrupted recording
+                    break
+                recordings[record["key"]] = record
+    return recordings
+
+
+class RecordingTransport(HTTPTransport):
+    """
+    Class definition for an HTTPTransport that appends every response it receives to a recording file
+    """
+    def __init__(self, path, **kwargs):
+        """
+        :param path: Recording file (JSON lines), appended to
+        """
+        super(RecordingTransport, self).__init__(**kwargs)
+        self.path = path
+        self.record_lock = threading.Lock()
+
+    def get(self, url, **kwargs):
+        """
+        Function to send a GET request over the pooled session and record its response
+        :param url: Target url
+        :return: requests.Response object
+        """
+        response = super(RecordingTransport, self).get(url, **kwargs)
+        key = request_key(requests.Request("GET", url, params=kwargs.get("params")).prepare().url)
+        record = {"key": key,
+                  "status": response.status_code,
+                  "content_type": response.headers.get("Content-Type", "text/plain").split(";")[0],
+                  "body": response.content.decode(response.encoding or "utf-8", "replace")}
+        with self.record_lock:
+            with open(self.path, 'a', encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        return response
+
+
+def new_transport(**kwargs) -> HTTPTransport:
+    """This function returns the transport of a DigiFax_EthScan: a RecordingTransport when DIGIFAX_RECORD is set,
+    a plain HTTPTransport otherwise"""
+    path = os.environ.get(RECORD_ENV)
+    return RecordingTransport(path, **kwargs) if path else HTTPTransport(**kwargs)
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    """
+    Class definition for the request handler of the stand-in, answering from the server's recordings
+    """
+    # Keep-alive, so that the pooled transport reuses its connections as it does with etherscan.io
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        server.delay()
+        api_call = "module" in dict(parse_qsl(urlsplit(self.path).query))
+
+        if server.rate_limited():
+            if api_call:
+                self.send_body(200, "application/json",
+                               json.dumps({"status": "0", "message": "NOTOK", "result": RATE_LIMIT_MSG}))
+            else:
+                self.send_body(429, "text/plain", RATE_LIMIT_MSG)
+            return
+
+        record = server.recordings.get(request_key(self.path))
+        if record:
+            self.send_body(record["status"], record["content_type"], record["body"])
+        elif api_call:
+            self.send_body(200, "application/json",
+                           json.dumps({"status": "0", "message": "NOTOK", "result": NOT_RECORDED_MSG}))
+        else:
+            self.send_body(404, "text/plain", NOT_RECORDED_MSG)
+
+    def send_body(self, status, content_type, body):
+        """
+        Function to send a complete response
+        :return: None
+        """
+        content = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super(ReplayHandler, self).log_message(format, *args)
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """
+    Class definition for the local Etherscan stand-in, replaying recorded responses
+    """
+    daemon_threads = True
+
+    def __init__(self, recordings, host=HOST, port=PORT, latency=0.0, jitter=0.0, rate_limit=0.0, error_rate=0.0,
+                 seed=None, verbose=False):
+        """
+        :param recordings: Dictionary of {request key: recorded response} (see load_recordings)
+        :param latency: Seconds every response is delayed by
+        :param jitter: Maximum number of seconds randomly added to the latency
+        :param rate_limit: Requests per second (over the last second) past which rate limiting errors are sent, 0 for
+                           no limit
+        :param error_rate: Probability of any request getting a rate limiting error
+        :param seed: Seed of the jitter and the random errors
+        """
+        super(ReplayServer, self).__init__((host, port), ReplayHandler)
+        self.recordings = recordings
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.verbose = verbose
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        # Times of the requests served over the last second
+        self.recent = deque()
+
+    def delay(self):
+        """
+        Function to wait for the configured latency
+        :return: None
+        """
+        with self.lock:
+            delay = self.latency + self.random.uniform(0, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def rate_limited(self) -> bool:
+        """
+        Function to decide if a request gets a rate limiting error, over the rate limit or at random
+        :return: True if it does
+        """
+        now = time.monotonic()
+        with self.lock:
+            if self.error_rate and self.random.random() < self.error_rate:
+                return True
+            if not self.rate_limit:
+                return False
+            while self.recent and now - self.recent[0] >= 1:
+                self.recent.popleft()
+            if len(self.recent) >= self.rate_limit:
+                return True
+            self.recent.append(now)
+            return False
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Serve recorded Etherscan responses as a local stand-in")
+    parser.add_argument("recordings", nargs="+", help=f"Recording files (written with {RECORD_ENV} set)")
+    parser.add_argument("--host", default=HOST, help="Address to listen on")
+    parser.add_argument("--port", type=int, default=PORT, help="Port to listen on (0 for any free port)")
+    parser.add_argument("--latency", type=float, default=0, help="Milliseconds every response is delayed by")
+    parser.add_argument("--jitter", type=float, default=0,
+                        help="Maximum number of milliseconds randomly added to the latency")
+    parser.add_argument("--rate-limit", type=float, default=0,
+                        help="Requests per second past which rate limiting errors are sent (0 for no limit)")
+    parser.add_argument("--error-rate", type=float, default=0,
+                        help="Probability of any request getting a rate limiting error")
+    parser.add_argument("--seed", type=int, help="Seed of the jitter and the random errors")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args(argv)
+    if args.latency < 0 or args.jitter < 0 or args.rate_limit < 0 or not 0 <= args.error_rate <= 1:
+        parser.error("--latency, --jitter and --rate-limit must be positive, --error-rate between 0 and 1")
+
+    recordings = load_recordings(args.recordings)
+    server = ReplayServer(recordings, args.host, args.port, args.latency / 1000, args.jitter / 1000, args.rate_limit,
+                          args.error_rate, args.seed, args.verbose)
+    print(f"[*] Replaying {len(recordings)} recorded responses on {server.base_url}, point DigiTrace at it with:\n"
+          f"\tDIGIFAX_ETHERSCAN_API={server.base_url}/api DIGIFAX_ETHERSCAN_SITE={server.base_url}/address/",
+          flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""
+Description:
+> Startup timing marks for the GUI entry point, to track the time until the Home window (and the Dashboard) appears.
+> Marks are always recorded (one perf_counter() call each), the report is only printed when the application is
+> started with --startup-report or with the DIGIFAX_STARTUP_REPORT environment variable set.
+>
+> Timing spans around the hot paths (network wait, JSON / HTML decoding, sanitising, statistics, list and graph
+> rebuilds), switched on and off at runtime with set_tracing(). While off, span() returns a shared no-op context.
+> Every finished span is added to per-name aggregates (count, total, max) for the session, and kept as an event for
+> export in the Chrome trace format (chrome://tracing, Perfetto). With the DIGIFAX_TRACE environment variable set
+> to a file, spans are on from the start and the trace is written to that file at exit.
+"""
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import nullcontext
+
+# Time this module was first imported, the entry point imports it before anything else
+START = time.perf_counter()
+
+REPORT_FLAG = "--startup-report"
+REPORT_ENV = "DIGIFAX_STARTUP_REPORT"
+
+# List of (label, perf_counter() time) marks, in the order they were recorded
+marks = []
+
+TRACE_ENV = "DIGIFAX_TRACE"
+# Maximum number of span events kept for export, later spans are only added to the aggregates
+MAX_EVENTS = 1000000
+
+# True while spans are recorded
+tracing = bool(os.environ.get(TRACE_ENV))
+# List of (name, category, start, duration, thread id, args) finished spans, times in perf_counter() seconds
+events = []
+# Dictionary of {span name: [count, total seconds, max seconds]}
+totals = dict()
+# Dictionary of {thread id: thread name} of the threads that recorded spans
+thread_names = dict()
+dropped = 0
+lock = threading.Lock()
+NO_SPAN = nullcontext()
+
+
+def mark(label):
+    """This function records that a startup step just completed"""
+    marks.append((label, time.perf_counter()))
+
+
+def report_enabled() -> bool:
+    """This function checks if the startup timing report was asked for"""
+    return REPORT_FLAG in sys.argv or bool(os.environ.get(REPORT_ENV))
+
+
+def report(title="Startup timing") -> str:
+    """This function formats the marks recorded so far, with the time since START and since the previous mark"""
+    lines = [f"[*] {title} (ms since the entry point started loading)"]
+    previous = START
+    for label, at in marks:
+        lines.append(f"\t{(at - START) * 1000:9.1f}  (+{(at - previous) * 1000:8.1f})  {label}")
+        previous = at
+    return "\n".join(lines)
+
+
+def print_report(title="Startup timing"):
+    """This function prints the startup timing report, if it was asked for"""
+    if report_enabled():
+        print(report(title), flush=True)
+
+
+class Span:
+    """
+    Class definition for a timing span, used as a context manager or started / stopped explicitly (e.g. across
+    Qt signals). Only created through span() and begin(), while tracing
+    """
+    __slots__ = ("name", "category", "args", "start")
+
+    def __init__(self, name, category, args):
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = None
+
+    def begin(self):
+        self.start = time.perf_counter()
+        return self
+
+    def end(self):
+        """This function records the span as finished now"""
+        global dropped
+        duration = time.perf_counter() - self.start
+        tid = threading.get_native_id()
+        with lock:
+            if tid not in thread_names:
+                thread_names[tid] = threading.current_thread().name
+            if len(events) < MAX_EVENTS:
+                events.append((self.name, self.category, self.start, duration, tid, self.args))
+            else:
+                dropped += 1
+            total = totals.setdefault(self.name, [0, 0.0, 0.0])
+            total[0] += 1
+            total[1] += duration
+            total[2] = max(total[2], duration)
+
+    def __enter__(self):
+        return self.begin()
+
+    def __exit__(self, *exc):
+        self.end()
+        return False
+
+
+def span(name, category="app", **args):
+    """This function returns a context manager timing the block it wraps, a no-op while tracing is off
+    :param args: Optional values shown with the span in the trace (e.g. the number of txns processed)"""
+    return Span(name, category, args) if tracing else NO_SPAN
+
+
+def traced(name, category="app"):
+    """This function returns a decorator timing every call of the function it wraps as a span. Qt slots wrapped with
+    it receive every argument of their signal, so connect them through a lambda if they take fewer"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracing:
+                return func(*args, **kwargs)
+            with Span(name, category, dict()):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def begin(name, category="app", **args):
+    """This function starts a span ended elsewhere with end(), returns None while tracing is off"""
+    return Span(name, category, args).begin() if tracing else None
+
+
+def end(started):
+    """This function ends a span returned by begin()"""
+    if started is not None:
+        started.end()
+
+
+def is_tracing() -> bool:
+    """This function checks if spans are being recorded"""
+    return tracing
+
+
+def set_tracing(enabled):
+    """This function switches the recording of spans on or off"""
+    global tracing
+    tracing = bool(enabled)
+
+
+def reset():
+    """This function drops every span recorded so far"""
+    global dropped
+    with lock:
+        events.clear()
+        totals.clear()
+        dropped = 0
+
+
+def aggregates() -> list:
+    """This function returns the per-name aggregates of the spans of the session, by decreasing total time
+    :return: List of (name, count, total seconds, mean seconds, max seconds) tuples"""
+    with lock:
+        rows = [(name, count, total, total / count, longest) for name, (count, total, longest) in totals.items()]
+    return sorted(rows, key=lambda row: row[2], reverse=True)
+
+
+def aggregates_report() -> str:
+    """This function formats the per-name aggregates of the session as a table"""
+    rows = aggregates()
+    if not rows:
+        return "No span recorded" + ("" if tracing else " (timing is off)")
+    lines = [f"{'span':<32}{'count':>8}{'total ms':>12}{'mean ms':>10}{'max ms':>10}"]
+    for name, count, total, mean, longest in rows:
+        lines.append(f"{name:<32}{count:>8}{total * 1000:>12.1f}{mean * 1000:>10.2f}{longest * 1000:>10.2f}")
+    if dropped:
+        lines.append(f"({dropped} spans past the first {MAX_EVENTS} are only counted in the aggregates)")
+    return "\n".join(lines)
+
+
+def chrome_trace() -> dict:
+    """This function returns the spans (and the startup marks) recorded so far in the Chrome trace event format,
+    times in microseconds since START"""
+    pid = os.getpid()
+    with lock:
+        trace = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                 for tid, name in thread_names.items()]
+        trace += [{"name": name, "cat": category, "ph": "X", "ts": (start - START) * 1e6, "dur": duration * 1e6,
+                   "pid": pid, "tid": tid, "args": args}
+                  for name, category, start, duration, tid, args in events]
+    trace += [{"name": label, "cat": "startup", "ph": "i", "s": "g", "ts": (at - START) * 1e6, "pid": pid, "tid": 0}
+              for label, at in marks]
+    return {"traceEvents": trace, "displayTimeUnit": "ms"}
+
+
+def export_chrome_trace(path):
+    """This function writes the spans recorded so far to a Chrome trace file (chrome://tracing, Perfetto)"""
+    with open(path, 'w') as f:
+        json.dump(chrome_trace(), f)
+
+
+if tracing:
+    atexit.register(lambda: export_chrome_trace(os.environ[TRACE_ENV]))
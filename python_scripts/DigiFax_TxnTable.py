@@ -0,0 +1,376 @@
+"""
+Description:
+> Columnar, NumPy-backed container for the sanitized transactions of one wallet address.
+> Timestamps and block numbers are kept as int64, values as exact integer wei (split into gwei and a wei remainder
+> so that they fit int64), directions as a flag and counterparties as interned address ids, so that the Dashboard
+> filters and aggregates run as vectorized operations instead of re-parsing strings row by row.
+> Rows are kept sorted by timestamp, so a time range query is two binary searches plus a slice.
+> Counterparty addresses are indexed by trigram when the table is built, so a (partial hex) search only verifies the
+> counterparties holding every trigram of the search string instead of scanning every address.
+"""
+import numpy as np
+
+from constants import INBOUND, OUTBOUND, IN, OUT, IN_COUNT, OUT_COUNT, IN_VALUE, OUT_VALUE, FIRST_SEEN, LAST_SEEN
+
+WEI = 0.000000000000000001  # 10e-19
+WEI_PER_GWEI = 10 ** 9
+SEARCH_CHUNK = 4096         # Number of counterparties matched between two cancellation checks
+NGRAM = 3                   # Length of the substrings indexed by CounterpartyIndex
+CHAR_BITS = 21              # Bits needed for one unicode code point, NGRAM of them are packed into an int64 key
+
+
+class AddressBook:
+    """
+    Class definition for an address interning table, mapping every address to a small integer id
+    """
+    def __init__(self):
+        self.ids = dict()
+        self.addresses = list()
+
+    def intern(self, addr) -> int:
+        """
+        Function to get the id of an address, assigning a new one if it has not been seen before
+        :param addr: Wallet address
+        :return: Integer id of the address
+        """
+        addr_id = self.ids.get(addr)
+        if addr_id is None:
+            addr_id = self.ids[addr] = len(self.addresses)
+            self.addresses.append(addr)
+        return addr_id
+
+    def lookup(self, addr_id) -> str:
+        """
+        Function to get the address of a given id
+        :param addr_id: Integer id of the address
+        :return: Wallet address
+        """
+        return self.addresses[addr_id]
+
+
+def ngram_keys(chars):
+    """
+    Function to pack every run of NGRAM consecutive code points into a single integer key
+    :param chars: int64 array of code points, one row per string (2D) or a single string (1D)
+    :return: int64 array of keys, with NGRAM - 1 fewer columns than 'chars'
+    """
+    width = chars.shape[-1] - NGRAM + 1
+    keys = np.zeros(chars.shape[:-1] + (max(width, 0),), dtype=np.int64)
+    for i in range(NGRAM):
+        keys = (keys << CHAR_BITS) | chars[..., i:i + width]
+    return keys
+
+
+def encode(strings, width):
+    """
+    Function to convert strings into a matrix of code points, right padded with zeros
+    :param strings: List of strings
+    :param width: Number of columns of the matrix (at least the length of the longest string)
+    :return: int64 array of shape (number of strings, width)
+    """
+    padded = "".join(string.ljust(width, "\0") for string in strings)
+    return np.frombuffer(padded.encode("utf-32-le"), dtype=np.uint32).astype(np.int64).reshape(len(strings), width)
+
+
+class CounterpartyIndex:
+    """
+    Class definition for a trigram index over the counterparty addresses of a table.
+    Every trigram of every address maps to the ascending ids of the addresses containing it (its posting list), so a
+    search string of NGRAM or more characters only has to intersect the posting lists of its own trigrams
+    """
+    def __init__(self, book, ids):
+        """
+        :param book: AddressBook the ids were interned with
+        :param ids: Array of counterparty ids to index (duplicates allowed)
+        """
+        self.book = book
+        self.ids = np.unique(ids).astype(np.int32)
+
+        addrs = [book.lookup(addr_id) for addr_id in self.ids]
+        lengths = np.array([len(addr) for addr in addrs], dtype=np.int64)
+        width = max(int(lengths.max()) if len(addrs) else 0, NGRAM)
+        keys = ngram_keys(encode(addrs, width))
+
+        # Drop the trigrams running into the padding, and the repeats of a trigram within the same address
+        valid = np.arange(keys.shape[1]) < (lengths - NGRAM + 1)[:, None]
+        owners = np.broadcast_to(self.ids[:, None], keys.shape)[valid]
+        keys = keys[valid]
+        order = np.lexsort((owners, keys))
+        keys, owners = keys[order], owners[order]
+        first = np.ones(len(keys), dtype=bool)
+        first[1:] = (keys[1:] != keys[:-1]) | (owners[1:] != owners[:-1])
+        keys, owners = keys[first], owners[first]
+
+        # Posting lists are stored back to back, self.offsets[i]:self.offsets[i + 1] being the list of self.keys[i]
+        self.keys, starts = np.unique(keys, return_index=True)
+        self.offsets = np.append(starts, len(keys))
+        self.postings = owners
+
+    def __len__(self):
+        return len(self.ids)
+
+    def posting_list(self, key):
+        """
+        Function to get the ids of the addresses containing a trigram
+        :param key: Integer key of the trigram
+        :return: Ascending int32 array of ids (empty if no address contains the trigram)
+        """
+        i = np.searchsorted(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            return self.postings[:0]
+        return self.postings[self.offsets[i]:self.offsets[i + 1]]
+
+    def scan(self, search_str, candidates, cancelled=None):
+        """
+        Function to check the addresses of the candidate ids for the search string one by one
+        :param search_str: Substring to look for
+        :param candidates: Array of ids to check
+        :param cancelled: Optional function returning True once the result is no longer needed
+        :return: int32 array of the matching ids, None if cancelled
+        """
+        matches = []
+        for i in range(0, len(candidates), SEARCH_CHUNK):
+            if cancelled and cancelled():
+                return None
+            matches.extend(addr_id for addr_id in candidates[i:i + SEARCH_CHUNK]
+                           if search_str in self.book.lookup(addr_id))
+        return np.array(matches, dtype=np.int32)
+
+    def lookup(self, search_str, cancelled=None):
+        """
+        Function to get the ids of the indexed addresses containing the given string
+        :param search_str: Substring to look for
+        :param cancelled: Optional function returning True once the result is no longer needed
+        :return: Ascending int32 array of ids, None if cancelled
+        """
+        # Too short to be covered by a trigram, such searches match most addresses anyway
+        if len(search_str) < NGRAM:
+            return self.scan(search_str, self.ids, cancelled)
+
+        keys = np.unique(ngram_keys(encode([search_str], len(search_str))[0]))
+        postings = sorted((self.posting_list(key) for key in keys), key=len)
+        candidates = postings[0]
+        for posting in postings[1:]:
+            if not len(candidates):
+                break
+            if cancelled and cancelled():
+                return None
+            candidates = np.intersect1d(candidates, posting, assume_unique=True)
+
+        # A single trigram is an exact match, longer strings may have their trigrams in another order
+        if len(search_str) == NGRAM:
+            return candidates
+        return self.scan(search_str, candidates, cancelled)
+
+
+class TxnTable:
+    """
+    Class definition for the columnar transaction table of one wallet address (the owner).
+    Rows are always sorted by timestamp (every selection keeps the order of the rows it selects)
+    """
+    def __init__(self, owner, book, timestamp, block, value_gwei, value_rem, direction, counterparty, hashes):
+        self.owner = owner
+        self.book = book
+        self.timestamp = timestamp          # int64 seconds since epoch
+        self.block = block                  # int64 block numbers
+        self.value_gwei = value_gwei        # int64 whole gwei of the value
+        self.value_rem = value_rem          # int64 remaining wei of the value (0 <= rem < 1 gwei)
+        self.direction = direction          # int8 IN / OUT flag
+        self.counterparty = counterparty    # int32 interned counterparty address ids
+        self.hashes = hashes                # object array of transaction hashes
+        # Per-direction time index {direction flag: (row positions, their timestamps)}, built on first use
+        self.direction_index = None
+        # Trigram index of the counterparties, shared with every table selected from this one
+        self.search_index = None
+
+    @classmethod
+    def from_txns(cls, owner, txns, book=None, index=True):
+        """
+        Function to build a table from a list of sanitized transaction dictionaries
+        :param owner: Wallet address the transactions belong to
+        :param txns: List of sanitized transactions
+        :param book: AddressBook to intern the counterparties with (a new one is made if not given)
+        :param index: Build the trigram index of the counterparties now, else on the first search (e.g. for tables
+                      only aggregated, never searched)
+        :return: TxnTable object
+        """
+        book = book if book is not None else AddressBook()
+        # Exact wei is kept by newer fetches, older case files only have the (rounded) value in ether
+        values = [int(txn["value_wei"]) if "value_wei" in txn else int(round(txn["value"] / WEI)) for txn in txns]
+        timestamp = np.array([int(txn["timestamp"]) for txn in txns], dtype=np.int64)
+
+        table = cls(owner, book,
+                    timestamp,
+                    np.array([int(txn["blockNumber"]) for txn in txns], dtype=np.int64),
+                    np.array([value // WEI_PER_GWEI for value in values], dtype=np.int64),
+                    np.array([value % WEI_PER_GWEI for value in values], dtype=np.int64),
+                    np.array([txn["direction"] for txn in txns], dtype=np.int8),
+                    np.array([book.intern(txn["from"] if txn["direction"] == IN else txn["to"]) for txn in txns],
+                             dtype=np.int32),
+                    np.array([txn["hash"] for txn in txns], dtype=object))
+
+        # Sort the rows by timestamp once, so that every time range query can binary search them
+        table = table.take(np.argsort(timestamp, kind="stable"))
+        if index:
+            table.search_index = CounterpartyIndex(book, table.counterparty)
+        return table
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    def take(self, index):
+        """
+        Function to select rows of the table
+        :param index: Boolean mask, ascending integer indices or slice of the rows to keep
+        :return: New TxnTable with the selected rows
+        """
+        table = TxnTable(self.owner, self.book, self.timestamp[index], self.block[index], self.value_gwei[index],
+                         self.value_rem[index], self.direction[index], self.counterparty[index], self.hashes[index])
+        # Counterparties of the selected rows are a subset of this table's, so its index still covers them
+        table.search_index = self.search_index
+        return table
+
+    def values_wei(self) -> list:
+        """
+        Function to get the exact values of every row in wei
+        :return: List of Python integers
+        """
+        return [int(gwei) * WEI_PER_GWEI + int(rem) for gwei, rem in zip(self.value_gwei, self.value_rem)]
+
+    def values_eth(self):
+        """
+        Function to get the values of every row in ether
+        :return: float64 array
+        """
+        return self.value_gwei * (WEI * WEI_PER_GWEI) + self.value_rem * WEI
+
+    def search_counterparties(self, search_str, cancelled=None):
+        """
+        Function to get the ids of the counterparties whose address contains the given string, using the trigram index.
+        Tables selected from a larger one share its index, so the ids may include counterparties of the larger table
+        :param search_str: Substring to look for
+        :param cancelled: Optional function returning True once the result is no longer needed
+        :return: int32 array of counterparty ids, None if cancelled
+        """
+        if self.search_index is None:
+            self.search_index = CounterpartyIndex(self.book, self.counterparty)
+        return self.search_index.lookup(search_str, cancelled)
+
+    def search(self, search_str, cancelled=None):
+        """
+        Function to get the rows whose counterparty address contains the given string
+        :param search_str: Substring to look for
+        :param cancelled: Optional function returning True once the result is no longer needed
+        :return: New TxnTable with the matching rows, None if cancelled
+        """
+        if not search_str:
+            return self
+        ids = self.search_counterparties(search_str, cancelled)
+        if ids is None:
+            return None
+        return self.take(np.isin(self.counterparty, ids))
+
+    def time_range(self, trans_type, start, end):
+        """
+        Function to locate the rows of a transaction type within a time range with binary searches
+        :param trans_type: Transaction type (INBOUND / OUTBOUND / ALL)
+        :param start: Start of the time range (inclusive, seconds since epoch)
+        :param end: End of the time range (inclusive, seconds since epoch)
+        :return: Slice (ALL) or ascending integer indices (INBOUND / OUTBOUND) of the matching rows
+        """
+        if trans_type not in (INBOUND, OUTBOUND):
+            return slice(np.searchsorted(self.timestamp, start, side="left"),
+                         np.searchsorted(self.timestamp, end, side="right"))
+
+        if self.direction_index is None:
+            self.direction_index = dict()
+            for flag in (IN, OUT):
+                positions = np.flatnonzero(self.direction == flag)
+                self.direction_index[flag] = (positions, self.timestamp[positions])
+
+        positions, timestamps = self.direction_index[IN if trans_type == INBOUND else OUT]
+        return positions[np.searchsorted(timestamps, start, side="left"):np.searchsorted(timestamps, end, side="right")]
+
+    def filter(self, trans_type, start, end, search_str="", cancelled=None):
+        """
+        Function to get the rows matching the Dashboard filters
+        :param trans_type: Transaction type (INBOUND / OUTBOUND / ALL)
+        :param start: Start of the time range (inclusive, seconds since epoch)
+        :param end: End of the time range (inclusive, seconds since epoch)
+        :param search_str: Only keep rows whose counterparty contains this string
+        :param cancelled: Optional function returning True once the result is no longer needed
+        :return: New TxnTable with the matching rows, None if cancelled
+        """
+        return self.take(self.time_range(trans_type, start, end)).search(search_str, cancelled)
+
+    def select_counterparty(self, counterparty):
+        """
+        Function to get the rows with a given counterparty address
+        :param counterparty: Counterparty address
+        :return: New TxnTable with the matching rows
+        """
+        return self.take(self.counterparty == self.book.ids.get(counterparty, -1))
+
+    def count_by_counterparty(self, direction=None) -> dict:
+        """
+        Function to count the rows of the table by counterparty address
+        :param direction: Only count rows of this direction flag (IN / OUT) if given
+        :return: Dictionary of {counterparty address: number of transactions}
+        """
+        ids = self.counterparty if direction is None else self.counterparty[self.direction == direction]
+        uniq, counts = np.unique(ids, return_counts=True)
+        return {self.book.lookup(addr_id): int(count) for addr_id, count in zip(uniq, counts)}
+
+    def aggregate_by_counterparty(self) -> dict:
+        """
+        Function to aggregate the rows of the table by counterparty address in one grouping pass
+        :return: Dictionary of {counterparty address: [in count, out count, total in value, total out value,
+                 first seen, last seen]}, values in ether and times in seconds since epoch (see IN_COUNT etc.)
+        """
+        uniq, inverse = np.unique(self.counterparty, return_inverse=True)
+        direction = self.direction.astype(np.intp)
+
+        counts = np.zeros((2, len(uniq)), dtype=np.int64)
+        np.add.at(counts, (direction, inverse), 1)
+        # Sums are kept as exact integers, the gwei part could lose precision in float64
+        gwei = np.zeros((2, len(uniq)), dtype=np.int64)
+        np.add.at(gwei, (direction, inverse), self.value_gwei)
+        rem = np.zeros((2, len(uniq)), dtype=np.int64)
+        np.add.at(rem, (direction, inverse), self.value_rem)
+        first_seen = np.full(len(uniq), np.iinfo(np.int64).max, dtype=np.int64)
+        np.minimum.at(first_seen, inverse, self.timestamp)
+        last_seen = np.full(len(uniq), np.iinfo(np.int64).min, dtype=np.int64)
+        np.maximum.at(last_seen, inverse, self.timestamp)
+
+        aggregates = dict()
+        for i, addr_id in enumerate(uniq):
+            record = [0] * 6
+            record[IN_COUNT] = int(counts[IN, i])
+            record[OUT_COUNT] = int(counts[OUT, i])
+            record[IN_VALUE] = (int(gwei[IN, i]) * WEI_PER_GWEI + int(rem[IN, i])) * WEI
+            record[OUT_VALUE] = (int(gwei[OUT, i]) * WEI_PER_GWEI + int(rem[OUT, i])) * WEI
+            record[FIRST_SEEN] = int(first_seen[i])
+            record[LAST_SEEN] = int(last_seen[i])
+            aggregates[self.book.lookup(addr_id)] = record
+        return aggregates
+
+    def to_txns(self) -> list:
+        """
+        Function to convert the rows back into sanitized transaction dictionaries
+        :return: List of sanitized transactions
+        """
+        txns = []
+        for i, value_wei in enumerate(self.values_wei()):
+            counterparty = self.book.lookup(self.counterparty[i])
+            incoming = self.direction[i] == IN
+            txns.append({"timestamp": str(self.timestamp[i]),
+                         "blockNumber": str(self.block[i]),
+                         "hash": self.hashes[i],
+                         "from": counterparty if incoming else self.owner,
+                         "from_labels": None,
+                         "to": self.owner if incoming else counterparty,
+                         "to_labels": None,
+                         "value": value_wei * WEI,
+                         "value_wei": str(value_wei),
+                         "direction": int(self.direction[i])})
+        return txns
@@ -0,0 +1,109 @@
+"""
+Description:
+> In-memory stand-in for the Etherscan API, plugged into DigiFax_EthScan as its HTTP transport.
+> Serves the txlist (with the MAX_RESULTS cap and block windows) and eth_blockNumber calls of the wallets it holds.
+"""
+import json
+import threading
+
+MAX_RESULTS = 10000
+CHAIN_HEAD = 10 ** 6
+
+
+def make_address(number) -> str:
+    """This function returns a lower cased wallet address made from a number"""
+    return "0x%040x" % number
+
+
+def make_txns(owner, counterparties, count, first_block=1000, per_block=1, start=0) -> list:
+    """This function generates the raw txns of a wallet addr as sent by Etherscan, in ascending order, alternating
+    incoming and outgoing txns with the given counterparties, 'per_block' txns per block"""
+    txns = []
+    for i in range(start, start + count):
+        counterparty = counterparties[i % len(counterparties)]
+        incoming = i % 2 == 0
+        txns.append({"timeStamp": str(1500000000 + i * 60),
+                     "blockNumber": str(first_block + i // per_block),
+                     "hash": "0x%064x" % (int(owner, 16) * 10 ** 9 + i),
+                     "from": counterparty if incoming else owner,
+                     "to": owner if incoming else counterparty,
+                     "value": str((i + 1) * 10 ** 15),
+                     "transactionIndex": str(i % per_block)})
+    return txns
+
+
+def make_wallets(links, first_block=1000) -> dict:
+    """This function generates the raw txns of every wallet of a transaction graph, given as a list of
+    (sender, receiver, number of txns) links. Every txn is listed by both of its wallets
+    :return: Dictionary of {addr: raw txns in ascending order}"""
+    wallets = dict()
+    block = first_block
+    for sender, receiver, count in links:
+        for _ in range(count):
+            txn = {"timeStamp": str(1500000000 + block * 15),
+                   "blockNumber": str(block),
+                   "hash": "0x%064x" % block,
+                   "from": sender,
+                   "to": receiver,
+                   "value": str(10 ** 18),
+                   "transactionIndex": "0"}
+            for addr in (sender, receiver):
+                wallets.setdefault(addr, list()).append(txn)
+            block += 1
+    return wallets
+
+
+class FakeResponse:
+    """
+    Class definition for the requests.Response of a stand-in API call
+    """
+    def __init__(self, payload):
+        self.payload = payload
+        self.content = json.dumps(payload).encode()
+        self.status_code = 200
+        self.headers = {"Content-Type": "application/json"}
+        self.encoding = "utf-8"
+
+    def json(self):
+        return self.payload
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeEtherscan:
+    """
+    Class definition for the stand-in transport, holding the raw txns of every wallet in {addr: [txns]}
+    """
+    def __init__(self, wallets=None, head=CHAIN_HEAD):
+        self.wallets = wallets if wallets is not None else dict()
+        self.head = head
+        # Parameters of every request served, in order
+        self.requests = list()
+        # Addresses whose requests fail (as a network error would)
+        self.failing = set()
+        self.lock = threading.Lock()
+
+    def get(self, url, params=None, **kwargs):
+        with self.lock:
+            self.requests.append(dict(params))
+        if params.get("action") == "eth_blockNumber":
+            return FakeResponse({"jsonrpc": "2.0", "id": 83, "result": hex(self.head)})
+
+        address = params.get("address")
+        if address in self.failing:
+            return FakeResponse({"status": "0", "message": "NOTOK", "result": "Unavailable"})
+        startblock, endblock = int(params.get("startblock", 0)), int(params.get("endblock", 99999999))
+        txns = [txn for txn in self.wallets.get(address, []) if startblock <= int(txn["blockNumber"]) <= endblock]
+        txns.sort(key=lambda txn: int(txn["blockNumber"]), reverse=params.get("sort") == "desc")
+        txns = txns[:min(int(params.get("offset") or MAX_RESULTS), MAX_RESULTS)]
+        if not txns:
+            return FakeResponse({"status": "0", "message": "No transactions found", "result": []})
+        return FakeResponse({"status": "1", "message": "OK", "result": txns})
+
+    def calls(self, action) -> list:
+        """This function returns the parameters of the requests served for an API action"""
+        return [params for params in self.requests if params.get("action") == action]
+
+    def close(self):
+        pass
@@ -0,0 +1,83 @@
+import json
+import os
+import tempfile
+import unittest
+
+from python_scripts import DigiFax_Benchmark as bench
+
+OWNER = "0x" + "b" * 40
+
+
+def record(name, median, distribution=bench.UNIFORM, txns=10) -> dict:
+    return {"benchmark": name, "distribution": distribution, "txns": txns, "median": median}
+
+
+class GenerateTxnsTest(unittest.TestCase):
+    def test_same_arguments_same_txns(self):
+        for distribution in bench.DISTRIBUTIONS:
+            txns = bench.generate_txns(OWNER, 500, distribution)
+            self.assertEqual(txns, bench.generate_txns(OWNER, 500, distribution))
+            self.assertNotEqual(txns, bench.generate_txns(OWNER, 500, distribution, seed=bench.SEED + 1))
+
+    def test_txns_shape(self):
+        txns = bench.generate_txns(OWNER, 2000, bench.ZIPF)
+        self.assertEqual(len(txns), 2000)
+        blocks = [int(txn["blockNumber"]) for txn in txns]
+        self.assertEqual(blocks, sorted(blocks, reverse=True))
+        self.assertEqual(len({txn["hash"] for txn in txns}), len(txns))
+        self.assertTrue(all(OWNER in (txn["from"], txn["to"]) or txn["to"] == "" for txn in txns))
+
+    def test_distributions(self):
+        def counterparties(distribution):
+            return [txn["to"] or txn["contractAddress"] if txn["from"] == OWNER else txn["from"]
+                    for txn in bench.generate_txns(OWNER, 5000, distribution)]
+
+        self.assertEqual(len(set(counterparties(bench.UNIQUE))), 5000)
+        self.assertLessEqual(len(set(counterparties(bench.UNIFORM))), 500)
+        zipf = counterparties(bench.ZIPF)
+        top = max(zipf.count(addr) for addr in set(zipf))
+        self.assertGreater(top, 5000 // 50)
+        with self.assertRaises(ValueError):
+            bench.generate_txns(OWNER, 10, "normal")
+
+
+class CompareTest(unittest.TestCase):
+    def test_regressions(self):
+        baseline = {"results": [record("a", 0.010), record("b", 0.010), record("c", 0.0001), record("d", 0.010)]}
+        results = {"results": [record("a", 0.0119), record("b", 0.013), record("c", 0.0009),
+                               record("d", 0.020, txns=1000), record("e", 1.0)]}
+        regressions = bench.compare(results, baseline)
+        # Only 'b': 'a' is within the threshold, 'c' below the minimum slowdown, 'd' and 'e' have no baseline
+        self.assertEqual([(now["benchmark"], before["median"]) for now, before in regressions], [("b", 0.010)])
+        self.assertEqual(len(bench.compare(results, baseline, threshold=0.1)), 2)
+
+
+class MainTest(unittest.TestCase):
+    def test_run_and_compare(self):
+        with tempfile.TemporaryDirectory() as workdir:
+            output = os.path.join(workdir, "bench.json")
+            args = ["--sizes", "10", "200", "--distributions", bench.UNIFORM, "--repeat", "1", "-o", output]
+            self.assertEqual(bench.main(args), 0)
+            with open(output, 'r') as f:
+                results = json.load(f)
+            self.assertEqual(results["version"], bench.RESULTS_VERSION)
+            names = {entry["benchmark"] for entry in results["results"]}
+            self.assertIn("sanitize_txns", names)
+            self.assertIn("load_case/dgfx", names)
+            self.assertEqual({entry["txns"] for entry in results["results"]}, {10, 200})
+            self.assertTrue(all(len(entry["times"]) == 1 for entry in results["results"]))
+
+            # A baseline where everything took no time makes every benchmark above the minimum a regression
+            for entry in results["results"]:
+                entry["median"] = 0
+            baseline = os.path.join(workdir, "baseline.json")
+            with open(baseline, 'w') as f:
+                json.dump(results, f)
+            status = bench.main(args + ["--compare", baseline, "--threshold", "0"])
+            with open(output, 'r') as f:
+                slow = [entry for entry in json.load(f)["results"] if entry["median"] > bench.MIN_REGRESSION]
+            self.assertEqual(status, 1 if slow else 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
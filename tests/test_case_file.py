@@ -0,0 +1,192 @@
+import copy
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from constants import SANITIZED_DATA, STATS, CASE_FILE_EXT, CASE_BINARY_EXT
+from python_scripts.DigiFax_Benchmark import generate_txns, new_case, ZIPF
+from python_scripts.DigiFax_CaseFile import CaseSection, load_case, save_case, convert_case, encode_entry, \
+    decode_entry, ENTRY_JSON, ENTRY_TXNS, FILE_HEADER, MAGIC, VERSION
+from python_scripts.DigiFax_EthScan_multiproc import DigiFax_EthScan
+from fake_etherscan import FakeEtherscan, make_address
+
+
+def make_case(counts=(300, 0, 40), first=1) -> dict:
+    """This function returns a case holding summarised synthetic wallets (numbered from 'first'), as plain
+    dictionaries"""
+    ethscan = DigiFax_EthScan(transport=FakeEtherscan(), rate=0)
+    owners = [make_address(n) for n in range(first, first + len(counts))]
+    for owner, count in zip(owners, counts):
+        raw = generate_txns(owner, count, ZIPF)
+        ethscan.split_txns_based_on_direction({owner: ethscan.sanitize_txns(owner, raw)})
+    ethscan.update_statistics()
+
+    caseinfo = new_case(owners[0], None, None)
+    caseinfo["casename"] = 'name with "quotes",\nand a new line'
+    caseinfo["walletaddresses"] = owners
+    caseinfo["walletrelationships"] = {owners[0]: [[owners[-1], 2]]}
+    caseinfo["aliases"] = {owners[0]: "échange"}
+    caseinfo["data"] = {SANITIZED_DATA: dict(ethscan.ADDR_TXNS_SUMMARISED), STATS: dict(ethscan.ADDR_TXNS_STATS)}
+    # JSON round trips turn tuples into lists, the case is compared in its saved form
+    return json.loads(json.dumps(caseinfo))
+
+
+def as_dict(caseinfo) -> dict:
+    """This function returns a case with its "data" sections read into plain dictionaries"""
+    return {**caseinfo, "data": {name: dict(section) for name, section in caseinfo["data"].items()}}
+
+
+class CaseFileTestCase(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.caseinfo = make_case()
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir)
+
+    def path(self, name) -> str:
+        return os.path.join(self.workdir, name)
+
+
+class JsonCaseFileTest(CaseFileTestCase):
+    def test_round_trip(self):
+        path = self.path("case" + CASE_FILE_EXT)
+        save_case(path, copy.deepcopy(self.caseinfo))
+        loaded = load_case(path)
+
+        # Entries are only parsed once accessed
+        self.assertIsInstance(loaded["data"][SANITIZED_DATA], CaseSection)
+        self.assertFalse(any(loaded["data"][SANITIZED_DATA].is_loaded(addr) for addr in self.caseinfo["walletaddresses"]))
+        self.assertEqual(as_dict(loaded), self.caseinfo)
+
+    def test_single_line_case_file(self):
+        # Case files written before the one entry per line layout
+        path = self.path("old" + CASE_FILE_EXT)
+        with open(path, 'w') as f:
+            json.dump(self.caseinfo, f)
+
+        loaded = load_case(path)
+        self.assertEqual(as_dict(loaded), self.caseinfo)
+
+        # Saved back in the new layout
+        save_case(path, loaded)
+        with open(path, 'rb') as f:
+            self.assertGreater(len(f.readlines()), len(self.caseinfo["walletaddresses"]))
+        self.assertEqual(as_dict(load_case(path)), self.caseinfo)
+        with open(path) as f:
+            self.assertEqual(json.load(f), self.caseinfo)
+
+    def test_save_onto_itself(self):
+        path = self.path("case" + CASE_FILE_EXT)
+        save_case(path, copy.deepcopy(self.caseinfo))
+        loaded = load_case(path)
+
+        # One entry changed, the others are copied from the file being replaced
+        owner = self.caseinfo["walletaddresses"][1]
+        loaded["data"][STATS][owner] = self.caseinfo["data"][STATS][owner] = {"all_txn": 1}
+        del loaded["data"][SANITIZED_DATA][owner]
+        del self.caseinfo["data"][SANITIZED_DATA][owner]
+        save_case(path, loaded)
+
+        self.assertEqual(as_dict(loaded), self.caseinfo)
+        self.assertEqual(as_dict(load_case(path)), self.caseinfo)
+
+    def test_empty_case(self):
+        path = self.path("empty" + CASE_FILE_EXT)
+        caseinfo = new_case(make_address(1), None, None)
+        caseinfo["data"] = {SANITIZED_DATA: dict(), STATS: dict()}
+        save_case(path, copy.deepcopy(caseinfo))
+        self.assertEqual(as_dict(load_case(path)), caseinfo)
+
+
+class BinaryCaseFileTest(CaseFileTestCase):
+    def test_round_trip(self):
+        path = self.path("case" + CASE_BINARY_EXT)
+        save_case(path, copy.deepcopy(self.caseinfo))
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(len(MAGIC)), MAGIC)
+
+        loaded = load_case(path)
+        self.assertFalse(any(loaded["data"][SANITIZED_DATA].is_loaded(addr) for addr in self.caseinfo["walletaddresses"]))
+        self.assertEqual(as_dict(loaded), self.caseinfo)
+
+    def test_conversion_to_and_from_json_is_lossless(self):
+        json_path, binary_path, back_path = (self.path("case" + CASE_FILE_EXT), self.path("case" + CASE_BINARY_EXT),
+                                             self.path("back" + CASE_FILE_EXT))
+        save_case(json_path, copy.deepcopy(self.caseinfo))
+        convert_case(json_path, binary_path)
+        convert_case(binary_path, back_path)
+
+        with open(json_path, 'rb') as original, open(back_path, 'rb') as converted:
+            self.assertEqual(converted.read(), original.read())
+        self.assertLess(os.path.getsize(binary_path), os.path.getsize(json_path))
+
+    def test_single_line_case_file_to_binary(self):
+        json_path, binary_path = self.path("old" + CASE_FILE_EXT), self.path("case" + CASE_BINARY_EXT)
+        with open(json_path, 'w') as f:
+            json.dump(self.caseinfo, f)
+        convert_case(json_path, binary_path)
+        self.assertEqual(as_dict(load_case(binary_path)), self.caseinfo)
+
+    def test_save_onto_itself(self):
+        path = self.path("case" + CASE_BINARY_EXT)
+        save_case(path, copy.deepcopy(self.caseinfo))
+        loaded = load_case(path)
+
+        # A new wallet brings new addresses, the copied blocks must still refer to the right ones
+        extra = make_case((25,), first=9)
+        owner = extra["walletaddresses"][0]
+        for name in (SANITIZED_DATA, STATS):
+            loaded["data"][name][owner] = self.caseinfo["data"][name][owner] = extra["data"][name][owner]
+        save_case(path, loaded)
+
+        self.assertEqual(as_dict(loaded), self.caseinfo)
+        self.assertEqual(as_dict(load_case(path)), self.caseinfo)
+
+    def test_entries_round_trip(self):
+        hashes = ["0x" + "%064x" % n for n in range(3)]
+        entries = [
+            # Columns that must not be stored as integers or hashes, as they would not decode back unchanged
+            {"txns": [{"a": value} for value in ("007", "1", "2")]},
+            {"txns": [{"a": value} for value in ("-1", "+5", " 3")]},
+            {"txns": [{"a": value} for value in ("", "1")]},
+            {"txns": [{"a": value} for value in ("1" * 19, "2")]},
+            {"txns": [{"a": value} for value in ["0X" + hashes[0][2:]] + hashes[1:]]},
+            {"txns": [{"a": value} for value in [hashes[0].upper().replace("0X", "0x")] + hashes[1:]]},
+            {"txns": [{"a": value} for value in (2 ** 63, 1)]},
+            {"txns": [{"a": value} for value in (True, 1)]},
+            {"txns": [{"a": value} for value in (None, "0", 1.5)]},
+            {"txns": [{"a": value} for value in ("\u00e9", "0x" + "ab" * 20)]},
+            # Columnar entries
+            {"in": [{"n": "0", "h": hashes[0], "v": 1.5, "i": -3, "x": None}],
+             "out": [{"n": "999999999999999999", "h": hashes[1], "v": 0.1, "i": 2 ** 62, "x": None}]},
+            {"in": [], "out": [{"n": "1"}]},
+        ]
+        for entry in entries:
+            addr_index = dict()
+            block = encode_entry(entry, addr_index)
+            self.assertEqual(block[0], ENTRY_TXNS)
+            self.assertEqual(decode_entry(block, list(addr_index)), entry)
+
+        # Entries that do not fit the columnar layout
+        for entry in ({"all_txn": 3, "counterparties": {"0x": [1, 2]}}, {"txns": [{"a": 1}, {"b": 1}]}, [1, 2], {},
+                      {"txns": [1, 2]}, {"txns": [{"a": 1}], "n": 1}, {"in": [], "out": []}):
+            block = encode_entry(entry, dict())
+            self.assertEqual(block[0], ENTRY_JSON)
+            self.assertEqual(decode_entry(block, []), entry)
+
+    def test_newer_version_is_refused(self):
+        path = self.path("case" + CASE_BINARY_EXT)
+        save_case(path, copy.deepcopy(self.caseinfo))
+        with open(path, 'r+b') as f:
+            header = list(FILE_HEADER.unpack(f.read(FILE_HEADER.size)))
+            header[1] = VERSION + 1
+            f.seek(0)
+            f.write(FILE_HEADER.pack(*header))
+        self.assertRaises(ValueError, load_case, path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import copy
+import os
+import shutil
+import tempfile
+import unittest
+
+from constants import TEMPLATE, SANITIZED_DATA, STATS, CASE_FILE_EXT, CASE_BINARY_EXT, JOURNAL_EXT
+from python_scripts.DigiFax_CaseFile import load_case, save_case
+from python_scripts.DigiFax_CaseJournal import CaseJournal, case_header
+from fake_etherscan import make_address
+
+WALLETS = [make_address(n) for n in range(1, 6)]
+
+
+def new_case() -> dict:
+    caseinfo = copy.deepcopy(TEMPLATE)
+    caseinfo["casename"] = "journal"
+    caseinfo["walletaddresses"] = WALLETS[:3]
+    caseinfo["aliases"] = {WALLETS[0]: "first", WALLETS[1]: "second"}
+    for addr in WALLETS[:3]:
+        caseinfo["data"][SANITIZED_DATA][addr] = {"incoming": [], "outgoing": []}
+        caseinfo["data"][STATS][addr] = {"all_txn": 0}
+    return caseinfo
+
+
+def edit(caseinfo, step):
+    """This function makes one round of header edits to a case"""
+    caseinfo["casename"] = f"journal {step}"
+    caseinfo["aliases"][WALLETS[step % 5]] = f"alias {step}"
+    caseinfo["aliases"].pop(WALLETS[(step + 2) % 5], None)
+    if WALLETS[step % 5] in caseinfo["walletaddresses"]:
+        caseinfo["walletaddresses"].remove(WALLETS[step % 5])
+    else:
+        caseinfo["walletaddresses"].append(WALLETS[step % 5])
+    caseinfo["walletrelationships"][WALLETS[0]] = [[WALLETS[step % 5], step]]
+
+
+class CaseJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.casefile = os.path.join(self.workdir, "case" + CASE_FILE_EXT)
+        self.journal_path = os.path.join(self.workdir, "case" + JOURNAL_EXT)
+        save_case(self.casefile, new_case())
+        self.caseinfo = self.open()
+        self.journal = CaseJournal(self.journal_path)
+        self.journal.replay(self.caseinfo)
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir)
+
+    def open(self) -> dict:
+        """This function opens the case as the Home window does: its snapshot, then its journal"""
+        caseinfo = load_case(self.casefile)
+        CaseJournal(self.journal_path).replay(caseinfo)
+        return caseinfo
+
+    def test_replay_of_recorded_edits(self):
+        for step in range(8):
+            edit(self.caseinfo, step)
+            self.assertGreater(self.journal.record(self.caseinfo), 0)
+            self.assertEqual(case_header(self.open()), case_header(self.caseinfo))
+
+    def test_record_without_edits(self):
+        self.assertEqual(self.journal.record(self.caseinfo), 0)
+        self.assertEqual(self.journal.size(), 0)
+
+    def test_torn_last_line_is_ignored(self):
+        edit(self.caseinfo, 1)
+        self.journal.record(self.caseinfo)
+        expected = case_header(self.caseinfo)
+        edit(self.caseinfo, 2)
+        self.journal.record(self.caseinfo)
+
+        # Interrupted while appending the last line
+        with open(self.journal_path, 'rb') as f:
+            lines = f.readlines()
+        with open(self.journal_path, 'wb') as f:
+            f.writelines(lines[:-1])
+            f.write(lines[-1][:len(lines[-1]) // 2])
+
+        self.assertEqual(case_header(self.open()), expected)
+
+        # Later saves diff against the replayed case, their lines are not lost behind the torn one
+        caseinfo = self.open()
+        journal = CaseJournal(self.journal_path)
+        journal.replay(caseinfo)
+        edit(caseinfo, 3)
+        journal.record(caseinfo)
+        self.assertEqual(case_header(self.open()), case_header(caseinfo))
+
+    def test_last_line_without_newline_is_torn(self):
+        expected = case_header(self.caseinfo)
+        edit(self.caseinfo, 1)
+        self.journal.record(self.caseinfo)
+        with open(self.journal_path, 'rb+') as f:
+            f.truncate(self.journal.size() - 1)
+
+        self.assertEqual(case_header(self.open()), expected)
+        self.assertEqual(self.journal.size(), 0)
+
+    def test_compaction_keeps_edits_journaled_meanwhile(self):
+        edit(self.caseinfo, 1)
+        self.caseinfo["data"][STATS][WALLETS[0]] = {"all_txn": 5}
+        self.journal.record(self.caseinfo)
+        self.assertTrue(self.journal.needs_compaction(self.caseinfo))
+
+        snapshot = self.journal.take_snapshot(self.caseinfo)
+        self.assertIsNone(self.journal.take_snapshot(self.caseinfo))
+        # Edited and journaled while the compaction runs
+        edit(self.caseinfo, 2)
+        self.journal.record(self.caseinfo)
+        self.journal.compact(self.casefile, self.caseinfo, snapshot)
+
+        self.assertFalse(self.journal.needs_compaction(self.caseinfo))
+        with open(self.journal_path, 'rb') as f:
+            self.assertEqual(len(f.readlines()), 1)
+        reopened = self.open()
+        self.assertEqual(case_header(reopened), case_header(self.caseinfo))
+        self.assertEqual(reopened["data"][STATS][WALLETS[0]], {"all_txn": 5})
+        self.assertIsNotNone(self.journal.take_snapshot(self.caseinfo))
+
+    def test_failed_compaction_keeps_data_dirty(self):
+        self.caseinfo["data"][STATS][WALLETS[0]] = {"all_txn": 5}
+        snapshot = self.journal.take_snapshot(self.caseinfo)
+        self.assertFalse(self.journal.needs_compaction(self.caseinfo))
+
+        missing = os.path.join(self.workdir, "missing", "case" + CASE_BINARY_EXT)
+        self.assertRaises(OSError, self.journal.compact, missing, self.caseinfo, snapshot)
+
+        self.assertTrue(self.journal.needs_compaction(self.caseinfo))
+        self.assertIsNotNone(self.journal.take_snapshot(self.caseinfo))
+
+
+if __name__ == "__main__":
+    unittest.main()
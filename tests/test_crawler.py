@@ -0,0 +1,76 @@
+import copy
+import unittest
+
+from constants import SANITIZED_DATA, STATS, COUNTERPARTIES
+from python_scripts.DigiFax_Crawler import DigiFax_Crawler, WALLETS, RELATIONSHIPS, relationship_weight
+from python_scripts.DigiFax_EthScan_multiproc import DigiFax_EthScan
+from fake_etherscan import FakeEtherscan, make_address, make_wallets
+
+SEED, A, B, C, D, HUB = (make_address(n) for n in range(1, 7))
+SPOKES = [make_address(n) for n in range(100, 105)]
+
+# SEED -5- A -3- C -2- D, SEED -1- B (below MIN_TXNS), SEED -2- HUB -2- every spoke
+LINKS = [(SEED, A, 5), (A, C, 3), (C, D, 2), (SEED, B, 1), (HUB, SEED, 2)] + [(HUB, spoke, 2) for spoke in SPOKES]
+
+
+def relatives(result, addr) -> set:
+    return {counterparty for counterparty, _ in result[RELATIONSHIPS].get(addr, [])}
+
+
+class CrawlerTest(unittest.TestCase):
+    def setUp(self):
+        self.api = FakeEtherscan(make_wallets(LINKS))
+        self.ethscan = DigiFax_EthScan(transport=self.api, rate=0)
+
+    def crawl(self, data=None, **kwargs):
+        kwargs.setdefault("max_counterparties", 4)
+        return DigiFax_Crawler(self.ethscan, **kwargs).crawl([SEED.upper().replace("0X", "0x")], data)
+
+    def fetched(self) -> list:
+        return [params["address"] for params in self.api.calls("txlist")]
+
+    def test_one_hop(self):
+        result = self.crawl(hops=1)
+        # Most active counterparty first, B has too few txns
+        self.assertEqual(result[WALLETS], [SEED, A, HUB])
+        self.assertEqual(relatives(result, SEED), {A, HUB})
+        self.assertEqual(dict(result[RELATIONSHIPS][SEED])[A], relationship_weight(5))
+
+    def test_hubs_are_not_expanded(self):
+        result = self.crawl(hops=3)
+        self.assertEqual(result[WALLETS], [SEED, A, HUB, C, D])
+        self.assertEqual(relatives(result, A), {SEED, C})
+        self.assertEqual(relatives(result, C), {A, D})
+        self.assertNotIn(HUB, result[RELATIONSHIPS])
+        # The last frontier is reached, but not expanded
+        self.assertEqual(sorted(self.fetched()), sorted([SEED, A, HUB, C]))
+
+    def test_frontier_limit(self):
+        result = self.crawl(hops=2, frontier_limit=1)
+        self.assertEqual(result[WALLETS], [SEED, A, C])
+
+    def test_addresses_held_by_the_case_are_not_fetched(self):
+        # Aggregates of the case's seed, as saved before they were kept in its stats
+        api = FakeEtherscan(make_wallets(LINKS))
+        ethscan = DigiFax_EthScan(transport=api, rate=0)
+        ethscan.split_txns_based_on_direction(ethscan.get_ext_txns([SEED]))
+        data = {SANITIZED_DATA: {SEED: ethscan.ADDR_TXNS_SUMMARISED[SEED]}, STATS: {SEED: ethscan.ADDR_TXNS_STATS[SEED]}}
+        self.assertNotIn(COUNTERPARTIES, data[STATS][SEED])
+        before = copy.deepcopy(data)
+
+        result = self.crawl(data, hops=2)
+
+        self.assertNotIn(SEED, self.fetched())
+        self.assertEqual(result, self.crawl(hops=2))
+        # The case data is read only
+        self.assertEqual(data, before)
+
+    def test_crawled_txns_are_not_kept(self):
+        self.crawl(hops=3)
+        self.assertEqual(self.ethscan.ADDR_TXNS, {})
+        self.assertEqual(self.ethscan.ADDR_TXNS_STATS, {})
+        self.assertEqual(self.ethscan.ADDR_TXNS_TABLES, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+
+from constants import TOTAL_TXNS
+from python_scripts.DigiFax_EthScan_multiproc import DigiFax_EthScan, MAX_RESULTS
+from fake_etherscan import FakeEtherscan, make_address, make_txns
+
+
+class FetchWindowsTest(unittest.TestCase):
+    def setUp(self):
+        self.owner = make_address(1)
+        self.counterparties = [make_address(n) for n in range(2, 12)]
+        self.api = FakeEtherscan()
+        self.ethscan = DigiFax_EthScan(transport=self.api, rate=0)
+
+    def fetch(self, txns):
+        self.api.wallets[self.owner] = txns
+        return self.ethscan.get_ext_txns([self.owner])[self.owner]
+
+    def test_small_wallet_is_one_request(self):
+        txns = self.fetch(make_txns(self.owner, self.counterparties, 250))
+        self.assertEqual(len(txns), 250)
+        self.assertEqual(len(self.api.calls("txlist")), 1)
+        # The chain head is only needed to split a capped range
+        self.assertEqual(self.api.calls("eth_blockNumber"), [])
+
+    def test_paginates_past_the_cap(self):
+        # Three txns per block, so that the capped pages stop in the middle of a block
+        raw = make_txns(self.owner, self.counterparties, 2 * MAX_RESULTS + 5000, per_block=3)
+        txns = self.fetch(raw)
+
+        self.assertGreater(len(self.api.calls("txlist")), 2)
+        self.assertEqual(len(self.api.calls("eth_blockNumber")), 1)
+        self.assertEqual(sorted(txn["hash"] for txn in txns), sorted(txn["hash"] for txn in raw))
+        self.assertEqual(self.ethscan.ADDR_TXNS_STATS[self.owner][TOTAL_TXNS], len(raw))
+
+    def test_pages_are_deduplicated_by_hash_in_descending_order(self):
+        raw = make_txns(self.owner, self.counterparties, MAX_RESULTS + 10, per_block=4)
+        txns = self.fetch(raw)
+
+        hashes = [txn["hash"] for txn in txns]
+        self.assertEqual(len(hashes), len(set(hashes)))
+        self.assertEqual(len(hashes), len(raw))
+        blocks = [int(txn["blockNumber"]) for txn in txns]
+        self.assertEqual(blocks, sorted(blocks, reverse=True))
+
+    def test_block_fuller_than_the_cap_is_truncated(self):
+        raw = make_txns(self.owner, self.counterparties, MAX_RESULTS + 10, per_block=MAX_RESULTS + 10)
+        self.assertEqual(len(self.fetch(raw)), MAX_RESULTS)
+
+
+if __name__ == "__main__":
+    unittest.main()
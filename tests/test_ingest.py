@@ -0,0 +1,92 @@
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from constants import SANITIZED_DATA, STATS, TOTAL_TXNS, CASE_FILE_EXT, CASE_BINARY_EXT, LABEL_STORE_EXT
+from python_scripts.DigiFax_CaseFile import load_case
+from python_scripts.DigiFax_Ingest import read_addresses, ingest
+from fake_etherscan import FakeEtherscan, make_address, make_txns
+
+ADDRESSES = [make_address(n) for n in range(1, 6)]
+
+
+class ReadAddressesTest(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir)
+
+    def write(self, name, text) -> str:
+        path = os.path.join(self.workdir, name)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def test_files(self):
+        first = self.write("first.txt", f"# wallets\n{ADDRESSES[0].upper().replace('0X', '0x')}\n\n"
+                                        f"{ADDRESSES[1]}, {ADDRESSES[2]};{ADDRESSES[0]}  # seen\n0x1234 not-an-address\n")
+        second = self.write("second.txt", f"{ADDRESSES[3]}\t{ADDRESSES[1]}\n")
+        self.assertEqual(read_addresses([first, second]), ADDRESSES[:4])
+
+    def test_stdin_is_left_open(self):
+        stdin = io.StringIO(f"{ADDRESSES[0]}\n{ADDRESSES[1]}\n")
+        with mock.patch.object(sys, "stdin", stdin):
+            self.assertEqual(read_addresses(["-", "-"]), ADDRESSES[:2])
+        self.assertFalse(stdin.closed)
+
+
+class IngestTest(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        counterparties = [make_address(n) for n in range(100, 110)]
+        self.api = FakeEtherscan({addr: make_txns(addr, counterparties, 20 * number)
+                                  for number, addr in enumerate(ADDRESSES, 1)})
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir)
+
+    def ingest(self, addresses, output, **kwargs):
+        return ingest(addresses, output, batch_size=2, rate=0, transport=self.api, **kwargs)
+
+    def test_ingest_and_resume(self):
+        for extension in (CASE_FILE_EXT, CASE_BINARY_EXT):
+            output = os.path.join(self.workdir, "case" + extension)
+            self.api.failing = {ADDRESSES[2]}
+            result = self.ingest(ADDRESSES[:4], output)
+            self.assertEqual(result, {"fetched": [ADDRESSES[0], ADDRESSES[1], ADDRESSES[3]], "failed": [ADDRESSES[2]],
+                                      "skipped": []})
+
+            caseinfo = load_case(output)
+            self.assertEqual(caseinfo["casename"], "case")
+            # Failed addresses are still WOIs, for the Dashboard to retry
+            self.assertEqual(caseinfo["walletaddresses"], ADDRESSES[:4])
+            self.assertEqual(set(caseinfo["data"][STATS]), set(result["fetched"]))
+            self.assertEqual(caseinfo["data"][STATS][ADDRESSES[3]][TOTAL_TXNS], 80)
+            self.assertTrue(os.path.exists(os.path.join(self.workdir, "case" + LABEL_STORE_EXT)))
+
+            # Resuming only fetches what the case is missing
+            self.api.failing = set()
+            self.api.requests.clear()
+            result = self.ingest(ADDRESSES, output)
+            self.assertEqual(result["skipped"], [ADDRESSES[0], ADDRESSES[1], ADDRESSES[3]])
+            self.assertEqual(result["fetched"], [ADDRESSES[2], ADDRESSES[4]])
+            self.assertEqual(sorted(params["address"] for params in self.api.calls("txlist")), result["fetched"])
+
+            caseinfo = load_case(output)
+            self.assertEqual(caseinfo["walletaddresses"], ADDRESSES)
+            self.assertEqual(set(caseinfo["data"][SANITIZED_DATA]), set(ADDRESSES))
+
+    def test_without_label_store(self):
+        output = os.path.join(self.workdir, "case" + CASE_BINARY_EXT)
+        self.ingest(ADDRESSES[:1], output, name="named", store=False)
+        self.assertEqual(load_case(output)["casename"], "named")
+        self.assertFalse(os.path.exists(os.path.join(self.workdir, "case" + LABEL_STORE_EXT)))
+
+
+if __name__ == "__main__":
+    unittest.main()
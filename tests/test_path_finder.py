@@ -0,0 +1,103 @@
+import unittest
+
+from constants import SANITIZED_DATA, STATS
+from python_scripts.DigiFax_EthScan_multiproc import DigiFax_EthScan
+from python_scripts.DigiFax_PathFinder import DigiFax_PathFinder
+from fake_etherscan import FakeEtherscan, make_address, make_wallets
+
+S, A, B, C, D, T = "S", "A", "B", "C", "D", "T"
+# Fixed graph with paths of 1 to 4 hops from S to T, and a cycle through A and B
+EDGES = [(S, A), (S, B), (S, T), (A, T), (A, B), (B, A), (B, C), (C, T), (S, C), (C, D), (D, T), (T, S)]
+
+
+def simple_paths(edges, source, target) -> list:
+    """This function lists every loopless path between two nodes by brute force"""
+    paths = []
+
+    def walk(path):
+        if path[-1] == target:
+            paths.append(path)
+            return
+        for sender, receiver in edges:
+            if sender == path[-1] and receiver not in path:
+                walk(path + [receiver])
+
+    walk([source])
+    return paths
+
+
+class TopPathsTest(unittest.TestCase):
+    def setUp(self):
+        self.finder = DigiFax_PathFinder(None, {SANITIZED_DATA: dict(), STATS: dict()})
+        for sender, receiver in EDGES:
+            self.finder.add_edge(sender, receiver, 1)
+        self.all_paths = simple_paths(EDGES, S, T)
+
+    def test_shortest_path(self):
+        self.assertEqual(self.finder.shortest_path(S, T), [S, T])
+        self.assertEqual(self.finder.shortest_path(S, T, banned_edges={(S, T)}), [S, A, T])
+        self.assertIsNone(self.finder.shortest_path(S, T, banned_nodes={S}))
+        self.assertIsNone(self.finder.shortest_path(S, "X"))
+
+    def test_top_paths_against_brute_force(self):
+        lengths = sorted(len(path) for path in self.all_paths)
+        for k in range(1, len(self.all_paths) + 2):
+            paths = self.finder.top_paths(S, T, k)
+            self.assertEqual(len(paths), min(k, len(self.all_paths)))
+            # The k shortest, in order, without repeats, and every one of them a loopless path of the graph
+            self.assertEqual([len(path) for path in paths], lengths[:k])
+            self.assertEqual(len(set(map(tuple, paths))), len(paths))
+            for path in paths:
+                self.assertIn(path, self.all_paths)
+
+    def test_no_path(self):
+        self.assertEqual(self.finder.top_paths(S, "X"), [])
+
+    def test_fewer_paths_than_asked(self):
+        self.assertEqual(self.finder.top_paths(T, A, 3), [[T, S, A], [T, S, B, A]])
+
+
+class FindPathsTest(unittest.TestCase):
+    def setUp(self):
+        self.source, self.middle, self.target, self.other = (make_address(n) for n in range(1, 5))
+        self.api = FakeEtherscan(make_wallets([(self.source, self.middle, 3), (self.middle, self.target, 2),
+                                               (self.other, self.target, 1), (self.target, self.source, 1)]))
+
+        # The case only holds the source
+        ethscan = DigiFax_EthScan(transport=self.api, rate=0)
+        ethscan.split_txns_based_on_direction(ethscan.get_ext_txns([self.source]))
+        ethscan.update_statistics()
+        self.data = {SANITIZED_DATA: {self.source: ethscan.ADDR_TXNS_SUMMARISED[self.source]},
+                     STATS: {self.source: ethscan.ADDR_TXNS_STATS[self.source]}}
+        self.api.requests.clear()
+
+    def find_paths(self, budget=10):
+        finder = DigiFax_PathFinder(DigiFax_EthScan(transport=self.api, rate=0), self.data, budget=budget)
+        return finder, finder.find_paths(self.source.upper().replace("0X", "0x"), self.target)
+
+    def test_path_through_fetched_addresses(self):
+        finder, paths = self.find_paths()
+        self.assertEqual(len(paths), 1)
+        self.assertEqual([(sender, receiver) for sender, receiver, _ in paths[0]],
+                         [(self.source, self.middle), (self.middle, self.target)])
+        self.assertEqual([len(txns) for _, _, txns in paths[0]], [3, 2])
+        for sender, receiver, txns in paths[0]:
+            self.assertTrue(all(txn["from"] == sender and txn["to"] == receiver for txn in txns))
+
+        # Only the path addresses missing from the case are kept, with their txns
+        self.assertEqual(set(finder.fetched[STATS]), {self.middle, self.target})
+        self.assertNotIn(self.source, [params["address"] for params in self.api.calls("txlist")])
+        self.assertEqual(finder.ethscan.ADDR_TXNS.keys(), {self.middle, self.target})
+
+    def test_budget(self):
+        _, paths = self.find_paths(budget=0)
+        self.assertEqual(paths, [])
+        self.assertEqual(self.api.calls("txlist"), [])
+
+    def test_same_source_and_target(self):
+        finder = DigiFax_PathFinder(DigiFax_EthScan(transport=self.api, rate=0), self.data)
+        self.assertEqual(finder.find_paths(self.source, self.source), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+
+import requests
+
+from python_scripts.DigiFax_EthScan_multiproc import DigiFax_EthScan, MAX_RESULTS
+from python_scripts.DigiFax_HTTP import HTTPTransport
+from python_scripts.DigiFax_Replay import RecordingTransport, ReplayServer, request_key, load_recordings
+from fake_etherscan import FakeEtherscan, make_address, make_txns
+
+
+class OriginHandler(BaseHTTPRequestHandler):
+    """
+    Class definition for the request handler of a local 'etherscan.io', answering from the server's FakeEtherscan
+    """
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        content = json.dumps(self.server.api.get(parts.path, params=dict(parse_qsl(parts.query))).payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(server) -> str:
+    """This function serves an HTTP server from a daemon thread, returns its base url"""
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://{server.server_address[0]}:{server.server_address[1]}"
+
+
+class RequestKeyTest(unittest.TestCase):
+    def test_key_ignores_host_api_key_and_parameter_order(self):
+        key = request_key("https://api.etherscan.io/api?module=account&apikey=SECRET&address=0xab&page=1")
+        self.assertEqual(key, "/api?address=0xab&module=account&page=1")
+        self.assertEqual(request_key("http://127.0.0.1:8585/api?page=1&address=0xab&module=account&apikey=x"), key)
+        self.assertEqual(request_key("https://etherscan.io/address/0xab"), "/address/0xab")
+
+    def test_last_recording_wins_and_torn_line_is_ignored(self):
+        workdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(workdir, "recording.jsonl")
+            with open(path, 'w') as f:
+                for body in ("first", "second"):
+                    f.write(json.dumps({"key": "/a", "status": 200, "content_type": "text/plain", "body": body}) + "\n")
+                f.write('{"key": "/b", "sta')
+            recordings = load_recordings([path])
+            self.assertEqual(list(recordings), ["/a"])
+            self.assertEqual(recordings["/a"]["body"], "second")
+        finally:
+            shutil.rmtree(workdir)
+
+
+class RecordReplayTest(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.recording = os.path.join(self.workdir, "etherscan.jsonl")
+        counterparties = [make_address(n) for n in range(100, 120)]
+        self.small = [make_address(1), make_address(2)]
+        self.big = make_address(3)
+        wallets = {addr: make_txns(addr, counterparties, 150) for addr in self.small}
+        wallets[self.big] = make_txns(self.big, counterparties, MAX_RESULTS + 2000, per_block=2)
+        self.api = FakeEtherscan(wallets)
+        self.origin = ThreadingHTTPServer(("127.0.0.1", 0), OriginHandler)
+        self.origin.api = self.api
+        self.origin_url = serve(self.origin)
+        self.servers = [self.origin]
+
+    def tearDown(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+        shutil.rmtree(self.workdir)
+
+    def fetch(self, base_url, addresses, transport) -> dict:
+        ethscan = DigiFax_EthScan(transport=transport, rate=0, api_url=base_url + "/api",
+                                  site_url=base_url + "/address/")
+        txns = ethscan.get_ext_txns(addresses)
+        transport.close()
+        return txns
+
+    def record(self, addresses) -> dict:
+        return self.fetch(self.origin_url, addresses, RecordingTransport(self.recording))
+
+    def replay(self, addresses) -> dict:
+        server = ReplayServer(load_recordings([self.recording]), port=0)
+        self.servers.append(server)
+        return self.fetch(serve(server), addresses, HTTPTransport())
+
+    def test_replay_matches_the_recording(self):
+        recorded = self.record(self.small + [self.big])
+        self.assertEqual(len(recorded[self.big]), MAX_RESULTS + 2000)
+
+        self.api.wallets.clear()
+        self.assertEqual(self.replay(self.small + [self.big]), recorded)
+
+        with open(self.recording) as f:
+            self.assertTrue(all("SECRET" not in line and "apikey" not in json.loads(line)["key"] for line in f))
+
+    def test_recordings_of_several_runs(self):
+        # Each run sees a newer chain head, the addresses of the earlier runs must still replay
+        recorded = dict()
+        for addr in self.small:
+            recorded.update(self.record([addr]))
+            self.api.head += 1000
+
+        self.api.wallets.clear()
+        self.assertEqual(self.replay(self.small), recorded)
+
+    def test_unrecorded_requests(self):
+        self.record(self.small[:1])
+        self.assertEqual(self.replay(self.small[1:]), {})
+
+        server = ReplayServer(load_recordings([self.recording]), port=0)
+        self.servers.append(server)
+        self.assertEqual(requests.get(serve(server) + "/address/" + self.small[0]).status_code, 404)
+
+    def test_rate_limiting(self):
+        for kwargs, expected in (({"rate_limit": 2}, [False, False, True]), ({"error_rate": 1}, [True, True, True])):
+            server = ReplayServer(dict(), port=0, **kwargs)
+            try:
+                self.assertEqual([server.rate_limited() for _ in range(3)], expected)
+            finally:
+                server.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()
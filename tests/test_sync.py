@@ -0,0 +1,88 @@
+import unittest
+
+from constants import SANITIZED_DATA, STATS, INBOUND, OUTBOUND, LAST_BLOCK, COUNTERPARTIES, TOTAL_TXNS
+from python_scripts.DigiFax_EthScan_multiproc import DigiFax_EthScan
+from fake_etherscan import FakeEtherscan, make_address, make_txns
+
+COUNT_KEYS = (TOTAL_TXNS, "incoming_txn", "outgoing_txn", "contract_txn", "incoming_uniq", "outgoing_uniq", LAST_BLOCK)
+
+
+def fetch(api, addr) -> tuple:
+    """This function fetches and summarises a wallet addr as the dashboard does, returns its (sanitized, stats)"""
+    ethscan = DigiFax_EthScan(transport=api, rate=0)
+    ethscan.split_txns_based_on_direction(ethscan.get_ext_txns([addr]))
+    ethscan.update_statistics()
+    return ethscan.ADDR_TXNS_SUMMARISED[addr], ethscan.ADDR_TXNS_STATS[addr]
+
+
+class SyncTest(unittest.TestCase):
+    def setUp(self):
+        self.owner = make_address(1)
+        self.counterparties = [make_address(n) for n in range(2, 9)]
+        self.api = FakeEtherscan({self.owner: make_txns(self.owner, self.counterparties, 100)})
+        sanitized, stats = fetch(self.api, self.owner)
+        self.data = {SANITIZED_DATA: {self.owner: sanitized}, STATS: {self.owner: stats}}
+
+    def add_txns(self, count, counterparties=None):
+        """This function appends newer txns (in later blocks) to the stand-in's wallet"""
+        txns = self.api.wallets[self.owner]
+        txns += make_txns(self.owner, counterparties or self.counterparties, count, start=len(txns))
+
+    def assertSameAsFreshFetch(self):
+        sanitized, stats = fetch(self.api, self.owner)
+        synced_sanitized, synced_stats = self.data[SANITIZED_DATA][self.owner], self.data[STATS][self.owner]
+        for direction in (INBOUND, OUTBOUND):
+            self.assertEqual(synced_sanitized[direction], sanitized[direction])
+        for key in COUNT_KEYS:
+            self.assertEqual(synced_stats[key], stats[key], key)
+        self.assertEqual(synced_stats[COUNTERPARTIES].keys(), stats[COUNTERPARTIES].keys())
+        for counterparty, record in stats[COUNTERPARTIES].items():
+            for synced_field, field in zip(synced_stats[COUNTERPARTIES][counterparty], record):
+                self.assertAlmostEqual(synced_field, field)
+
+    def sync(self):
+        return DigiFax_EthScan(transport=self.api, rate=0).sync_ext_txns(self.data)
+
+    def test_sync_only_asks_for_newer_blocks(self):
+        last_block = self.data[STATS][self.owner][LAST_BLOCK]
+        self.add_txns(30)
+        self.api.requests.clear()
+
+        new_txns = self.sync()
+
+        self.assertEqual(len(new_txns[self.owner]), 30)
+        self.assertEqual([int(params["startblock"]) for params in self.api.calls("txlist")], [last_block + 1])
+        self.assertSameAsFreshFetch()
+
+    def test_sync_with_new_counterparties(self):
+        self.add_txns(25, [make_address(n) for n in range(50, 55)])
+        self.sync()
+        self.assertSameAsFreshFetch()
+
+    def test_sync_without_new_txns(self):
+        self.assertEqual(self.sync()[self.owner], [])
+        self.assertSameAsFreshFetch()
+
+    def test_sync_counts_contract_creations(self):
+        self.add_txns(3)
+        self.api.wallets[self.owner][-1]["to"] = ""
+        self.sync()
+        self.assertEqual(self.data[STATS][self.owner]["contract_txn"], 1)
+        self.assertSameAsFreshFetch()
+
+    def test_sync_of_case_without_high_water_mark(self):
+        # Case files saved before the last seen block was recorded
+        del self.data[STATS][self.owner][LAST_BLOCK]
+        self.add_txns(10)
+        self.assertEqual(len(self.sync()[self.owner]), 10)
+        self.assertSameAsFreshFetch()
+
+    def test_failed_sync_leaves_the_case_unchanged(self):
+        self.add_txns(10)
+        self.api.failing.add(self.owner)
+        self.assertEqual(self.sync(), {})
+        self.assertEqual(self.data[STATS][self.owner][TOTAL_TXNS], 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
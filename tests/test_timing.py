@@ -0,0 +1,101 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from python_scripts import DigiFax_Timing as timing
+
+
+class TimingTest(unittest.TestCase):
+    def setUp(self):
+        self.tracing = timing.is_tracing()
+        self.marks = list(timing.marks)
+        timing.reset()
+
+    def tearDown(self):
+        timing.set_tracing(self.tracing)
+        timing.marks[:] = self.marks
+        timing.reset()
+
+    def test_no_span_while_off(self):
+        timing.set_tracing(False)
+        with timing.span("off"):
+            pass
+        timing.end(timing.begin("off"))
+        self.assertIs(timing.span("off"), timing.NO_SPAN)
+        self.assertEqual(timing.aggregates(), [])
+        self.assertEqual(timing.aggregates_report(), "No span recorded (timing is off)")
+
+    def test_aggregates(self):
+        timing.set_tracing(True)
+        for _ in range(3):
+            with timing.span("fetch", "net", txns=10):
+                pass
+        started = timing.begin("render")
+        timing.end(started)
+
+        @timing.traced("sanitize")
+        def sanitize(value):
+            return value * 2
+
+        self.assertEqual(sanitize(21), 42)
+        thread = threading.Thread(target=sanitize, args=(1,), name="worker")
+        thread.start()
+        thread.join()
+
+        counts = {name: count for name, count, total, mean, longest in timing.aggregates()}
+        self.assertEqual(counts, {"fetch": 3, "render": 1, "sanitize": 2})
+        for name, count, total, mean, longest in timing.aggregates():
+            self.assertAlmostEqual(mean, total / count)
+            self.assertLessEqual(longest, total)
+        self.assertIn("worker", timing.thread_names.values())
+        self.assertEqual(len(timing.aggregates_report().splitlines()), 4)
+
+    def test_events_past_the_limit_are_only_counted(self):
+        timing.set_tracing(True)
+        with mock.patch.object(timing, "MAX_EVENTS", 2):
+            for _ in range(5):
+                with timing.span("many"):
+                    pass
+            self.assertEqual(len(timing.events), 2)
+            self.assertEqual(timing.aggregates()[0][1], 5)
+            self.assertIn("3 spans past the first 2", timing.aggregates_report())
+
+    def test_chrome_trace(self):
+        timing.set_tracing(True)
+        timing.mark("window shown")
+        with timing.span("load", "io", path="case.json"):
+            pass
+        with tempfile.TemporaryDirectory() as workdir:
+            path = os.path.join(workdir, "trace.json")
+            timing.export_chrome_trace(path)
+            with open(path, 'r') as f:
+                trace = json.load(f)["traceEvents"]
+        spans = [event for event in trace if event["ph"] == "X"]
+        self.assertEqual([(event["name"], event["cat"], event["args"]) for event in spans],
+                         [("load", "io", {"path": "case.json"})])
+        self.assertGreaterEqual(spans[0]["ts"], 0)
+        self.assertGreaterEqual(spans[0]["dur"], 0)
+        self.assertIn(spans[0]["tid"], [event["tid"] for event in trace if event["ph"] == "M"])
+        self.assertEqual([event["name"] for event in trace if event["ph"] == "i"][-1], "window shown")
+
+    def test_startup_report(self):
+        timing.marks.clear()
+        timing.mark("imports")
+        timing.mark("home window")
+        lines = timing.report().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[1].endswith("imports") and lines[2].endswith("home window"))
+
+        with mock.patch.dict(os.environ, {timing.REPORT_ENV: ""}), mock.patch("sys.argv", ["digitrace"]):
+            self.assertFalse(timing.report_enabled())
+        with mock.patch("sys.argv", ["digitrace", timing.REPORT_FLAG]):
+            self.assertTrue(timing.report_enabled())
+        with mock.patch.dict(os.environ, {timing.REPORT_ENV: "1"}):
+            self.assertTrue(timing.report_enabled())
+
+
+if __name__ == '__main__':
+    unittest.main()
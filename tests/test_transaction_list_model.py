@@ -0,0 +1,58 @@
+import os
+import random
+import unittest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QApplication
+
+from transactionListModel import TransactionListModel, ADDRESS_ROLE
+
+app = QApplication.instance() or QApplication([])
+
+
+def make_counts(count, seed=0) -> dict:
+    """This function generates {counterparty address: number of transactions}, with repeated counts"""
+    rnd = random.Random(seed)
+    return {"0x%040x" % rnd.getrandbits(160): rnd.randrange(1, 20) for _ in range(count)}
+
+
+class TransactionListModelTest(unittest.TestCase):
+    def rows(self, model) -> list:
+        return [(model.data(model.index(row), ADDRESS_ROLE), model.data(model.index(row)))
+                for row in range(model.rowCount())]
+
+    def test_rows_sorted_by_count(self):
+        counts = make_counts(500)
+        model = TransactionListModel()
+        for descending in (True, False):
+            model.setCounts(counts, descending=descending)
+            expected = sorted(counts.items(), key=lambda item: item[1], reverse=descending)
+            self.assertEqual(self.rows(model), [(addr, f"[{count}] {addr}") for addr, count in expected])
+
+    def test_custom_sort_key(self):
+        counts = make_counts(200, seed=1)
+        model = TransactionListModel()
+        model.setCounts(counts, descending=False, key=lambda addr: addr)
+        self.assertEqual([addr for addr, _ in self.rows(model)], sorted(counts))
+
+    def test_reset_signals_and_clear(self):
+        model = TransactionListModel()
+        resets = []
+        model.modelReset.connect(lambda: resets.append(model.rowCount()))
+        model.setCounts(make_counts(50))
+        model.setCounts(make_counts(10, seed=2))
+        model.clear()
+        self.assertEqual(resets, [50, 10, 0])
+
+    def test_invalid_rows_and_roles(self):
+        model = TransactionListModel()
+        model.setCounts({"0xabc": 3})
+        self.assertEqual(model.rowCount(model.index(0)), 0)
+        self.assertIsNone(model.data(model.index(1)))
+        self.assertIsNone(model.data(model.index(0), Qt.ToolTipRole))
+
+
+if __name__ == '__main__':
+    unittest.main()
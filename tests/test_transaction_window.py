@@ -0,0 +1,94 @@
+import os
+import random
+import unittest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import Qt, QPersistentModelIndex
+from PyQt5.QtWidgets import QApplication
+
+from constants import IN, OUT
+from transactionWindow import TransactionTableModel, TransactionProxyModel, HEADERS, DATETIME_COLUMN, \
+    FROM_LABEL_COLUMN, TO_LABEL_COLUMN, VALUE_COLUMN, DIRECTION_COLUMN, BLOCKNUMBER_COLUMN, TXN_HASH_COLUMN
+
+app = QApplication.instance() or QApplication([])
+
+WEI = 10 ** -18
+
+
+def make_window_txns(count, seed=0) -> list:
+    """This function generates the txns shown by the transaction window, with labels on some of the addresses and
+    values differing below float precision"""
+    rnd = random.Random(seed)
+    labels = [None, ["Exchange"], ["Phish", "Hack"]]
+    txns = []
+    for i in range(count):
+        value = 10 ** 20 + rnd.randrange(1000)
+        txns.append({"timestamp": str(1500000000 + rnd.randrange(count * 10)),
+                     "blockNumber": str(rnd.randrange(10 ** 6)),
+                     "hash": "0x%064x" % rnd.getrandbits(256),
+                     "from": "0x%040x" % rnd.getrandbits(160),
+                     "from_labels": rnd.choice(labels),
+                     "to": "0x%040x" % rnd.getrandbits(160),
+                     "to_labels": rnd.choice(labels),
+                     "value": value * WEI,
+                     "value_wei": str(value),
+                     "direction": rnd.choice((IN, OUT))})
+    return txns
+
+
+class TransactionTableModelTest(unittest.TestCase):
+    def test_sort_on_typed_values(self):
+        txns = make_window_txns(300)
+        model = TransactionTableModel(txns)
+        keys = {DATETIME_COLUMN: lambda x: int(x["timestamp"]),
+                VALUE_COLUMN: lambda x: int(x["value_wei"]),
+                BLOCKNUMBER_COLUMN: lambda x: int(x["blockNumber"]),
+                TXN_HASH_COLUMN: lambda x: x["hash"]}
+        for column, key in keys.items():
+            for order in (Qt.AscendingOrder, Qt.DescendingOrder):
+                model.sort(column, order)
+                self.assertEqual([key(x) for x in model.txns],
+                                 sorted(map(key, txns), reverse=order == Qt.DescendingOrder))
+
+    def test_sort_keeps_selection_on_same_rows(self):
+        model = TransactionTableModel(make_window_txns(100, seed=1))
+        proxy = TransactionProxyModel()
+        proxy.setSourceModel(model)
+        selected = [model.txnHash(row) for row in (3, 40, 99)]
+        persistent = [QPersistentModelIndex(model.index(row, 0)) for row in (3, 40, 99)]
+        proxy.sort(BLOCKNUMBER_COLUMN, Qt.DescendingOrder)
+        self.assertEqual([model.txnHash(index.row()) for index in persistent], selected)
+
+    def test_cells(self):
+        txn = make_window_txns(1)[0]
+        txn.update({"timestamp": "0", "from_labels": ["A", "B"], "to_labels": None, "direction": OUT})
+        model = TransactionTableModel([txn])
+        cells = [model.data(model.index(0, column)) for column in range(model.columnCount())]
+        self.assertEqual(len(cells), len(HEADERS))
+        self.assertEqual(cells[DATETIME_COLUMN], "1970/01/01 00:00:00")
+        self.assertEqual(cells[FROM_LABEL_COLUMN], "A,B")
+        self.assertEqual(cells[TO_LABEL_COLUMN], "None")
+        self.assertEqual(cells[DIRECTION_COLUMN], "Outgoing")
+        self.assertEqual(cells[TXN_HASH_COLUMN], txn["hash"])
+        self.assertIsNone(model.data(model.index(0, 0), Qt.ToolTipRole))
+        self.assertEqual(model.headerData(VALUE_COLUMN, Qt.Horizontal), HEADERS[VALUE_COLUMN])
+
+    def test_search_matches_brute_force(self):
+        txns = make_window_txns(400, seed=2)
+        model = TransactionTableModel(txns)
+        proxy = TransactionProxyModel()
+        proxy.setSourceModel(model)
+        for search_str in ("PHISH", "exchange", txns[7]["hash"][5:15].upper(), txns[9]["from"][-6:], "zz", ""):
+            proxy.setSearchString(search_str)
+            shown = [model.txnHash(proxy.mapToSource(proxy.index(row, 0)).row()) for row in range(proxy.rowCount())]
+            needle = search_str.lower()
+            expected = [x["hash"] for x in txns
+                        if any(needle in field.lower() for field in (x["from"], x["to"], x["hash"],
+                                                                      ",".join(x["from_labels"] or ["None"]),
+                                                                      ",".join(x["to_labels"] or ["None"])))]
+            self.assertEqual(shown, expected, search_str)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,207 @@
+import random
+import unittest
+
+from constants import IN, OUT, INBOUND, OUTBOUND, ALL, IN_COUNT, OUT_COUNT, IN_VALUE, OUT_VALUE, FIRST_SEEN, \
+    LAST_SEEN
+from python_scripts.DigiFax_TxnTable import AddressBook, TxnTable, WEI, SEARCH_CHUNK
+
+OWNER = "0x" + "1" * 40
+
+
+def make_sanitized_txns(count, seed=0, counterparties=40) -> list:
+    """This function generates random sanitized txns of OWNER, in no particular order and with repeated timestamps"""
+    rnd = random.Random(seed)
+    pool = ["0x%040x" % rnd.getrandbits(160) for _ in range(counterparties)]
+    txns = []
+    for i in range(count):
+        direction = rnd.choice((IN, OUT))
+        counterparty = rnd.choice(pool)
+        value = rnd.choice((0, rnd.randrange(10 ** 9), rnd.randrange(10 ** 25)))
+        txns.append({"timestamp": str(1500000000 + rnd.randrange(count * 10)),
+                     "blockNumber": str(1000 + i),
+                     "hash": "0x%064x" % i,
+                     "from": counterparty if direction == IN else OWNER,
+                     "from_labels": None,
+                     "to": OWNER if direction == IN else counterparty,
+                     "to_labels": None,
+                     "value": value * WEI,
+                     "value_wei": str(value),
+                     "direction": direction})
+    return txns
+
+
+def counterparty_of(txn) -> str:
+    return txn["from"] if txn["direction"] == IN else txn["to"]
+
+
+def in_time_range(txn, trans_type, start, end) -> bool:
+    """This function is the brute force version of TxnTable.time_range for one txn"""
+    if trans_type == INBOUND and txn["direction"] != IN or trans_type == OUTBOUND and txn["direction"] != OUT:
+        return False
+    return start <= int(txn["timestamp"]) <= end
+
+
+class TxnTableTest(unittest.TestCase):
+    def setUp(self):
+        self.txns = make_sanitized_txns(2000)
+        self.table = TxnTable.from_txns(OWNER, self.txns)
+
+    def test_rows_are_sorted_by_timestamp(self):
+        self.assertEqual(len(self.table), len(self.txns))
+        self.assertTrue((self.table.timestamp[1:] >= self.table.timestamp[:-1]).all())
+
+    def test_round_trip_keeps_exact_values(self):
+        by_hash = {txn["hash"]: txn for txn in self.txns}
+        for txn in self.table.to_txns():
+            original = by_hash[txn["hash"]]
+            for key in ("timestamp", "blockNumber", "from", "to", "value_wei", "direction"):
+                self.assertEqual(txn[key], original[key], key)
+        self.assertEqual(sorted(self.table.values_wei()), sorted(int(txn["value_wei"]) for txn in self.txns))
+
+    def test_txns_of_old_case_files_without_exact_values(self):
+        txns = [{key: value for key, value in txn.items() if key != "value_wei"} for txn in self.txns[:50]]
+        table = TxnTable.from_txns(OWNER, txns)
+        by_hash = {txn["hash"]: txn for txn in txns}
+        for txn, value in zip(table.to_txns(), table.values_eth()):
+            self.assertAlmostEqual(value, by_hash[txn["hash"]]["value"], delta=by_hash[txn["hash"]]["value"] * 1e-9)
+
+    def test_count_by_counterparty(self):
+        for direction in (None, IN, OUT):
+            expected = dict()
+            for txn in self.txns:
+                if direction is None or txn["direction"] == direction:
+                    expected[counterparty_of(txn)] = expected.get(counterparty_of(txn), 0) + 1
+            self.assertEqual(self.table.count_by_counterparty(direction), expected)
+
+    def test_select_counterparty(self):
+        counterparty = counterparty_of(self.txns[0])
+        selected = self.table.select_counterparty(counterparty)
+        self.assertEqual(sorted(selected.hashes), sorted(txn["hash"] for txn in self.txns
+                                                          if counterparty_of(txn) == counterparty))
+        self.assertEqual(len(self.table.select_counterparty("0x" + "f" * 40)), 0)
+
+    def test_tables_share_an_address_book(self):
+        book = AddressBook()
+        first = TxnTable.from_txns(OWNER, self.txns[:100], book)
+        second = TxnTable.from_txns(OWNER, self.txns[100:300], book)
+        self.assertEqual(first.count_by_counterparty().keys() | second.count_by_counterparty().keys(),
+                         {counterparty_of(txn) for txn in self.txns[:300]})
+        self.assertEqual(len(book.ids), len({counterparty_of(txn) for txn in self.txns[:300]}))
+
+    def test_time_range_against_brute_force(self):
+        rnd = random.Random(1)
+        timestamps = sorted(int(txn["timestamp"]) for txn in self.txns)
+
+        def bound():
+            # Existing (and repeated) timestamps as well as times between and around them
+            if rnd.random() < 0.5:
+                return rnd.choice(timestamps)
+            return rnd.randrange(timestamps[0] - 5, timestamps[-1] + 5)
+
+        for _ in range(200):
+            start, end = sorted((bound(), bound()))
+            for trans_type in (INBOUND, OUTBOUND, ALL):
+                expected = sorted(txn["hash"] for txn in self.txns if in_time_range(txn, trans_type, start, end))
+                rows = self.table.take(self.table.time_range(trans_type, start, end))
+                self.assertEqual(sorted(rows.hashes), expected, (trans_type, start, end))
+                self.assertTrue((rows.timestamp[1:] >= rows.timestamp[:-1]).all())
+
+    def test_empty_time_range(self):
+        start = int(self.table.timestamp[-1]) + 1
+        for trans_type in (INBOUND, OUTBOUND, ALL):
+            self.assertEqual(len(self.table.take(self.table.time_range(trans_type, start, start + 100))), 0)
+            self.assertEqual(len(self.table.take(self.table.time_range(trans_type, 10, 5))), 0)
+
+    def test_search_against_brute_force(self):
+        rnd = random.Random(2)
+        counterparties = sorted({counterparty_of(txn) for txn in self.txns})
+        searches = ["", "0", "0x", "ab", "zzz", "0x0x", "\u00e9\u00e9\u00e9"]
+        # Substrings of every length of the counterparties (most of them matching a single address), and strings
+        # whose trigrams are all indexed but not in that order
+        for length in range(1, 43):
+            addr = rnd.choice(counterparties)
+            offset = rnd.randrange(len(addr) - length + 1)
+            searches.append(addr[offset:offset + length])
+        searches += [addr[10:13] + addr[4:7] for addr in counterparties[:5]]
+
+        for search_str in searches:
+            expected = sorted(txn["hash"] for txn in self.txns if search_str in counterparty_of(txn))
+            self.assertEqual(sorted(self.table.search(search_str).hashes), expected, search_str)
+
+    def test_search_on_selected_rows(self):
+        # Selected tables share the index of the whole table, whose ids may not be among their rows
+        selected = self.table.take(self.table.time_range(INBOUND, int(self.table.timestamp[0]),
+                                                         int(self.table.timestamp[len(self.table) // 2])))
+        for search_str in ("a", "0f", "1f2", counterparty_of(self.txns[-1])[5:20]):
+            expected = sorted(txn["hash"] for txn in selected.to_txns() if search_str in counterparty_of(txn))
+            self.assertEqual(sorted(selected.search(search_str).hashes), expected, search_str)
+            self.assertEqual(sorted(self.table.filter(INBOUND, int(self.table.timestamp[0]),
+                                                      int(self.table.timestamp[len(self.table) // 2]),
+                                                      search_str).hashes), expected)
+
+    def test_cancelled_search(self):
+        self.assertIsNone(self.table.search(counterparty_of(self.txns[0])[2:8], cancelled=lambda: True))
+        self.assertIsNone(self.table.search("a", cancelled=lambda: True))
+
+    def test_search_cancelled_between_chunks(self):
+        txns = make_sanitized_txns(3 * SEARCH_CHUNK, seed=3, counterparties=3 * SEARCH_CHUNK)
+        table = TxnTable.from_txns(OWNER, txns)
+        checks = []
+
+        def cancelled_after(count):
+            def cancelled():
+                checks.append(count)
+                return len(checks) > count
+            return cancelled
+
+        self.assertIsNone(table.search("0", cancelled=cancelled_after(1)))
+        self.assertEqual(len(checks), 2)
+        checks.clear()
+        expected = sorted(txn["hash"] for txn in txns if "0" in counterparty_of(txn))
+        self.assertEqual(sorted(table.search("0", cancelled=cancelled_after(100)).hashes), expected)
+        self.assertGreater(len(checks), 1)
+
+    def test_refined_search_matches_full_search(self):
+        addr = counterparty_of(self.txns[0])
+        previous = self.table
+        for length in range(1, 12):
+            search_str = addr[2:2 + length]
+            previous = previous.search(search_str)
+            self.assertEqual(sorted(previous.hashes), sorted(self.table.search(search_str).hashes), search_str)
+
+    def test_aggregates_against_brute_force(self):
+        expected = dict()
+        for txn in self.txns:
+            record = expected.setdefault(counterparty_of(txn), [0, 0, 0, 0, None, None])
+            timestamp = int(txn["timestamp"])
+            record[IN_COUNT if txn["direction"] == IN else OUT_COUNT] += 1
+            # Summed in wei, as the table does, to compare against exact totals
+            record[IN_VALUE if txn["direction"] == IN else OUT_VALUE] += int(txn["value_wei"])
+            record[FIRST_SEEN] = min(record[FIRST_SEEN] or timestamp, timestamp)
+            record[LAST_SEEN] = max(record[LAST_SEEN] or timestamp, timestamp)
+
+        aggregates = self.table.aggregate_by_counterparty()
+        self.assertEqual(aggregates.keys(), expected.keys())
+        for counterparty, record in expected.items():
+            for field in (IN_VALUE, OUT_VALUE):
+                record[field] *= WEI
+            self.assertEqual(aggregates[counterparty], record, counterparty)
+
+    def test_aggregates_of_selected_rows(self):
+        selected = self.table.take(self.table.time_range(OUTBOUND, 0, int(self.table.timestamp[-1])))
+        aggregates = selected.aggregate_by_counterparty()
+        self.assertTrue(all(record[IN_COUNT] == 0 and record[IN_VALUE] == 0 for record in aggregates.values()))
+        self.assertEqual({addr: record[OUT_COUNT] for addr, record in aggregates.items()},
+                         self.table.count_by_counterparty(OUT))
+
+    def test_empty_table(self):
+        table = TxnTable.from_txns(OWNER, [])
+        self.assertEqual(len(table), 0)
+        self.assertEqual(table.to_txns(), [])
+        self.assertEqual(table.count_by_counterparty(), {})
+        self.assertEqual(len(table.search("abc")), 0)
+        self.assertEqual(table.aggregate_by_counterparty(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex
+
+# Item data role holding the bare counterparty address of a row
+ADDRESS_ROLE = Qt.UserRole
+
+
+class TransactionListModel(QAbstractListModel):
+    """
+    Class definition for the model behind the Dashboard's Transaction List view.
+    Holds the grouped transaction counts of the focused WOI as two parallel lists (addresses and counts) in display
+    order, rows are only formatted when the view asks for the ones it is drawing
+    """
+    def __init__(self, parent=None):
+        super(TransactionListModel, self).__init__(parent)
+        self.addresses = list()
+        self.counts = list()
+
+    def rowCount(self, parent=QModelIndex()):
+        """
+        Function to get the number of rows (unique counterparties) in the model
+        :param parent: Parent index, always invalid for a list model
+        :return: Number of rows
+        """
+        return 0 if parent.isValid() else len(self.addresses)
+
+    def data(self, index, role=Qt.DisplayRole):
+        """
+        Function to get the data of a row for the given role
+        :param index: QModelIndex of the row
+        :param role: Qt.DisplayRole for the "[count] address" text, ADDRESS_ROLE for the bare address
+        :return: Requested data, None if not available
+        """
+        if not index.isValid() or index.row() >= len(self.addresses):
+            return None
+        if role == Qt.DisplayRole:
+            return f"[{self.counts[index.row()]}] {self.addresses[index.row()]}"
+        if role == ADDRESS_ROLE:
+            return self.addresses[index.row()]
+        return None
+
+    def setCounts(self, transactions_by_address, descending=True, key=None):
+        """
+        Function to replace the rows of the model with a new grouping, sorted by transaction count
+        :param transactions_by_address: Dictionary of {counterparty address: number of transactions}
+        :param descending: Sort the rows from the highest count to the lowest if True, else the other way round
+        :param key: Optional function called as key(address), giving the value to sort on instead of the count
+        :return: None
+        """
+        sort_key = (lambda item: key(item[0])) if key else (lambda item: item[1])
+        sorted_addresses = sorted(transactions_by_address.items(), key=sort_key, reverse=descending)
+        self.beginResetModel()
+        self.addresses = [addr for addr, _ in sorted_addresses]
+        self.counts = [count for _, count in sorted_addresses]
+        self.endResetModel()
+
+    def clear(self):
+        """
+        Function to remove every row of the model
+        :return: None
+        """
+        self.beginResetModel()
+        self.addresses = list()
+        self.counts = list()
+        self.endResetModel()
@@ -1,4 +1,5 @@
-from PyQt5.QtWidgets import QApplication, QMainWindow, QTableWidget, QTableWidgetItem
+from PyQt5.QtWidgets import QApplication, QMainWindow, QTableView, QHeaderView
+from PyQt5.QtCore import Qt, QAbstractTableModel, QSortFilterProxyModel, QModelIndex
 from PyQt5 import uic
 import time
 import datetime
@@ -101,6 +102,173 @@ data = [{ 'blockNumber': '6141243',
           'value': 7.158110000000001}]
 
 
+DATETIME_COLUMN = 0
+FROM_COLUMN = 1
+FROM_LABEL_COLUMN = 2
+TO_COLUMN = 3
+TO_LABEL_COLUMN = 4
+VALUE_COLUMN = 5
+DIRECTION_COLUMN = 6
+BLOCKNUMBER_COLUMN = 7
+TXN_HASH_COLUMN = 8
+
+HEADERS = ["Datetime (YYYY/MM/DD)", "From", "From_Labels", "To", "To_Labels", "Value", "Direction", "Blocknumber",
+           "Hash"]
+
+
+def labels_str(labels):
+    """
+    Function to combine a list of labels into a single string
+    :param labels: List of labels (or None)
+    :return: Comma separated labels, "None" if there are no labels
+    """
+    return ",".join(labels) if labels else "None"
+
+
+class TransactionTableModel(QAbstractTableModel):
+    """
+    Class definition for the model behind the transaction window's table.
+    Keeps the transactions as they are received and only formats the cells the view asks for (i.e. the ones painted),
+    sorting works on the typed values of a column (integers for datetimes, values and block numbers)
+    """
+    def __init__(self, data, parent=None):
+        super(TransactionTableModel, self).__init__(parent)
+        self.txns = list(data)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.txns)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return HEADERS[section]
+        return super(TransactionTableModel, self).headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        """
+        Function to format a single cell of the table
+        :param index: QModelIndex of the cell
+        :param role: Only Qt.DisplayRole is provided
+        :return: Text of the cell, None for other roles
+        """
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        x = self.txns[index.row()]
+        column = index.column()
+
+        if column == DATETIME_COLUMN:
+            return datetime.datetime.utcfromtimestamp(int(x["timestamp"])).strftime('%Y/%m/%d %H:%M:%S')
+        elif column == FROM_COLUMN:
+            return x["from"]
+        elif column == FROM_LABEL_COLUMN:
+            return labels_str(x["from_labels"])
+        elif column == TO_COLUMN:
+            return x["to"]
+        elif column == TO_LABEL_COLUMN:
+            return labels_str(x["to_labels"])
+        elif column == VALUE_COLUMN:
+            return str(x["value"])
+        elif column == DIRECTION_COLUMN:
+            return "Incoming" if x["direction"] == 0 else "Outgoing"
+        elif column == BLOCKNUMBER_COLUMN:
+            return x["blockNumber"]
+        elif column == TXN_HASH_COLUMN:
+            return x["hash"]
+        return None
+
+    def sortKey(self, column):
+        """
+        Function to get the function giving the typed sort value of a transaction for a column
+        :param column: Column number
+        :return: Function called as key(txn)
+        """
+        if column == DATETIME_COLUMN:
+            return lambda x: int(x["timestamp"])
+        elif column == FROM_LABEL_COLUMN:
+            return lambda x: labels_str(x["from_labels"])
+        elif column == TO_LABEL_COLUMN:
+            return lambda x: labels_str(x["to_labels"])
+        elif column == VALUE_COLUMN:
+            # Exact wei where available, so that values differing below float precision still sort correctly
+            return lambda x: int(x["value_wei"]) if "value_wei" in x else x["value"]
+        elif column == DIRECTION_COLUMN:
+            return lambda x: x["direction"]
+        elif column == BLOCKNUMBER_COLUMN:
+            return lambda x: int(x["blockNumber"])
+        return lambda x: x[{FROM_COLUMN: "from", TO_COLUMN: "to", TXN_HASH_COLUMN: "hash"}[column]]
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """
+        Function to sort the transactions on the typed values of a column, keeping the selection on the same rows
+        :param column: Column number to sort on
+        :param order: Qt.AscendingOrder / Qt.DescendingOrder
+        :return: None
+        """
+        if not 0 <= column < len(HEADERS):
+            return
+        self.layoutAboutToBeChanged.emit()
+        key = self.sortKey(column)
+        keys = [key(x) for x in self.txns]
+        order = sorted(range(len(self.txns)), key=keys.__getitem__, reverse=order == Qt.DescendingOrder)
+        self.txns = [self.txns[i] for i in order]
+
+        new_rows = [0] * len(order)
+        for new_row, old_row in enumerate(order):
+            new_rows[old_row] = new_row
+        persistent = self.persistentIndexList()
+        self.changePersistentIndexList(persistent, [self.index(new_rows[index.row()], index.column())
+                                                    for index in persistent])
+        self.layoutChanged.emit()
+
+    def rowMatches(self, row, search_str):
+        """
+        Function to check if the addresses, labels or hash of a transaction contain a search string
+        :param row: Row number
+        :param search_str: Lowercase string to look for
+        :return: True if the transaction matches, else False
+        """
+        x = self.txns[row]
+        return any(search_str in field.lower() for field in (x["from"], x["to"], x["hash"],
+                                                              labels_str(x["from_labels"]), labels_str(x["to_labels"])))
+
+    def txnHash(self, row):
+        """
+        Function to get the transaction hash of a row
+        :param row: Row number
+        :return: Transaction hash
+        """
+        return self.txns[row]["hash"]
+
+
+class TransactionProxyModel(QSortFilterProxyModel):
+    """
+    Class definition for the sort/filter proxy in front of the TransactionTableModel.
+    Sorting is handed to the source model, which sorts on typed values in one pass instead of the proxy comparing
+    display strings pair by pair
+    """
+    def __init__(self, parent=None):
+        super(TransactionProxyModel, self).__init__(parent)
+        self.search_str = ""
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.sourceModel().sort(column, order)
+
+    def setSearchString(self, search_str):
+        """
+        Function to only show the transactions whose addresses, labels or hash contain a search string
+        :param search_str: String to look for (case insensitive), empty to show every transaction
+        :return: None
+        """
+        self.search_str = search_str.lower()
+        # Rebuild the whole mapping at once, invalidateFilter() would remove the filtered out rows range by range
+        self.invalidate()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        return not self.search_str or self.sourceModel().rowMatches(source_row, self.search_str)
+
+
 class TransactionWindow(QMainWindow):
     """
     Class definition for transaction window
@@ -113,95 +281,41 @@ class TransactionWindow(QMainWindow):
         # Load the Home Window UI design from file
         uic.loadUi("./UI/transactions.ui", self)
 
-        self.tableWidget.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.tableView.setEditTriggers(QTableView.NoEditTriggers)
+        self.tableView.setSelectionBehavior(QTableView.SelectRows)
+        # Fixed row heights, so that the view never has to measure every row
+        self.tableView.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.tableView.verticalHeader().setDefaultSectionSize(self.tableView.fontMetrics().height() + 8)
 
         self.setFixedSize(self.width(), self.height())
         self.loadData(data)
-        self.tableWidget.resizeColumnsToContents()
-        self.tableWidget.resizeRowsToContents()
-        self.tableWidget.setSortingEnabled(True)
+        # Column widths are measured on the first rows only (see QHeaderView.resizeContentsPrecision)
+        self.tableView.resizeColumnsToContents()
+        self.tableView.setSortingEnabled(True)
         self.setFixedSize(self.width(), self.height())
 
         self.websiteButton.clicked.connect(self.openSite)
+        self.filterEdit.textChanged.connect(self.proxy.setSearchString)
 
     def openSite(self):
-        txn_hash_column = 8
         selected_rows = []
-        for index in self.tableWidget.selectedIndexes():
-            selected_rows.append(index.row())
+        for index in self.tableView.selectionModel().selectedIndexes():
+            selected_rows.append(self.proxy.mapToSource(index).row())
 
         for row in set(selected_rows):
-            txn_hash = self.tableWidget.item(row, txn_hash_column).text()
+            txn_hash = self.model.txnHash(row)
             webbrowser.open(f"https://etherscan.io/tx/{txn_hash}")
 
     def loadData(self, data):
-        self.tableWidget.setRowCount(len(data))
-
-        row = 0
-
-        datetime_column = 0
-        from_column = 1
-        from_label_column = 2
-        to_column = 3
-        to_label_column = 4
-        value_column = 5
-        direction_column = 6
-        blocknumber_column = 7
-        txn_hash_column = 8
-
-        # Used for combining elements of list of labels into a string
-        from_label_str = ""
-        to_label_str = ""
-
-        for row, x in enumerate(data):
-            # Set local timezone for date column
-            self.tableWidget.setHorizontalHeaderLabels([f"Datetime (YYYY/MM/DD)"])
-
-            # Set data for column -> datetime
-            converted_datetime = datetime.datetime.utcfromtimestamp(int(x["timestamp"])).strftime('%Y/%m/%d %H:%M:%S')
-            self.tableWidget.setItem(row, datetime_column, QTableWidgetItem(converted_datetime))
-
-            # Set data for column -> from
-            self.tableWidget.setItem(row, from_column, QTableWidgetItem(x["from"]))
-
-            # Set data for column -> from labels
-            if x["from_labels"]:
-                if len(x["from_labels"]) > 1:
-                    from_label_str = ",".join(x["from_labels"])
-                    self.tableWidget.setItem(row, from_label_column, QTableWidgetItem(from_label_str))
-                else:
-                    # print(f"<{type(x['from_labels'])}> {x['from_labels']}")
-                    self.tableWidget.setItem(row, from_label_column, QTableWidgetItem(x["from_labels"][0]))
-            else:
-                self.tableWidget.setItem(row, from_label_column, QTableWidgetItem("None"))
-
-            # Set data for column -> to
-            self.tableWidget.setItem(row, to_column, QTableWidgetItem(x["to"]))
-
-            # Set data for column -> to labels
-            if x["to_labels"]:
-                if len(x["to_labels"]) > 1:
-                    to_label_str = ",".join(x["to_labels"])
-                    self.tableWidget.setItem(row, to_label_column, QTableWidgetItem(to_label_str))
-                else:
-                    self.tableWidget.setItem(row, to_label_column, QTableWidgetItem(x["to_labels"][0]))
-            else:
-                self.tableWidget.setItem(row, to_label_column, QTableWidgetItem("None"))
-
-            # Set data for column -> value
-            self.tableWidget.setItem(row, value_column, QTableWidgetItem(str(x["value"])))
-
-            # Set data for column -> direction
-            if x["direction"] == 0:
-                self.tableWidget.setItem(row, direction_column, QTableWidgetItem("Incoming"))
-            else:
-                self.tableWidget.setItem(row, direction_column, QTableWidgetItem("Outgoing"))
-
-            # Set data for column -> blockNumber
-            self.tableWidget.setItem(row, blocknumber_column, QTableWidgetItem(x["blockNumber"]))
-
-            # Set data for column -> hash
-            self.tableWidget.setItem(row, txn_hash_column, QTableWidgetItem(x["hash"]))
+        """
+        Function to display a list of sanitized transactions, cells are only formatted once they are painted
+        :param data: List of sanitized transactions
+        :return: None
+        """
+        self.model = TransactionTableModel(data, self)
+        self.proxy = TransactionProxyModel(self)
+        self.proxy.setSourceModel(self.model)
+        self.tableView.setModel(self.proxy)
 
 
 def main():